@@ -0,0 +1,46 @@
+"""
+Benchmark: documents_to_matrix on synthetic parsed documents
+
+Each file holds one list attribute whose items are drawn from a pool of distinct
+values, so the number of rows and files can be scaled independently:
+
+    python -m yamalahurry.benchmarks.bench_converter --files 10000 --values 100000 --items 100
+"""
+from argparse import ArgumentParser, Namespace
+from time import perf_counter
+from typing import Dict, List, Tuple
+import random
+import sys
+
+from yamalahurry.yamala.converters import documents_to_matrix
+
+
+def build_files(files: int, values: int, items: int, seed: int = 0) -> List[Tuple[str, List]]:
+    generator: random.Random = random.Random(seed)
+    pool: List[str] = ['user{}@poke.mon'.format(index) for index in range(values)]
+    return [
+        ('config_{}.yaml'.format(index), [{'users': generator.sample(pool, items)}])
+        for index in range(files)
+    ]
+
+
+def main(argv: List[str]) -> None:
+    parser: ArgumentParser = ArgumentParser(description='Time the documents-to-matrix conversion')
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--values', type=int, default=20000)
+    parser.add_argument('--items', type=int, default=100)
+    namespace: Namespace = parser.parse_args(argv)
+
+    files: List[Tuple[str, List]] = build_files(namespace.files, namespace.values, namespace.items)
+    start: float = perf_counter()
+    sheets: Dict = documents_to_matrix(files)
+    elapsed: float = perf_counter() - start
+
+    rows: int = len(sheets['users']['rows'])
+    print('files: {}  list items: {}  rows: {}'.format(namespace.files, namespace.files * namespace.items, rows))
+    print('cells: {}'.format(rows * namespace.files))
+    print('documents_to_matrix: {:.3f}s'.format(elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,93 @@
+"""
+Benchmark: peak resident memory and time of the ingestion modes
+
+    - text:   the former path, open(filepath, 'r') handed to pyyaml
+    - binary: buffered binary file, decoded by the parser chunk by chunk
+    - mmap:   memory-mapped file, consumed pages released while parsing
+
+Each mode runs in a fresh interpreter, so ru_maxrss is not shared between them.
+Documents are consumed through iter_documents and dropped, which isolates the
+cost of ingesting the file from the cost of keeping its object graph.
+
+    python -m yamalahurry.benchmarks.bench_ingestion --megabytes 100
+"""
+from argparse import ArgumentParser, Namespace, SUPPRESS
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Dict, List
+import resource
+import subprocess
+import sys
+
+import yaml
+
+from yamalahurry.yamala.reader import get_reader
+
+
+_MODES: List[str] = ['text', 'binary', 'mmap']
+
+
+def build_file(path: Path, megabytes: int) -> None:
+    document: str = '---\nname: service-{0}\nusers: [user{0}@poke.mon, admin@poke.mon]\nport: {0}\n'
+    written: int = 0
+    index: int = 0
+    with open(path, 'w') as f:
+        while written < megabytes * 1024 * 1024:
+            chunk: str = ''.join(document.format(index + i) for i in range(1000))
+            f.write(chunk)
+            written += len(chunk)
+            index += 1000
+
+
+def child(mode: str, path: str) -> None:
+    reader = get_reader()
+    start: float = perf_counter()
+    count: int = 0
+    if mode == 'text':
+        with open(path, 'r') as f:
+            for _ in yaml.load_all(f, Loader=reader.loader):
+                count += 1
+
+    else:
+        reader.use_mmap = mode == 'mmap'
+        for _ in reader.iter_documents(path):
+            count += 1
+
+    elapsed: float = perf_counter() - start
+    peak_kb: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print('{} {} {:.3f}'.format(count, peak_kb, elapsed))
+
+
+def main(argv: List[str]) -> None:
+    parser: ArgumentParser = ArgumentParser(description='Compare peak RSS of the ingestion modes')
+    parser.add_argument('--megabytes', type=int, default=20)
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=SUPPRESS)
+    namespace: Namespace = parser.parse_args(argv)
+
+    if namespace.child:
+        child(*namespace.child)
+        return None
+
+    results: Dict[str, List[str]] = {}
+    with TemporaryDirectory() as folder:
+        path: Path = Path(folder) / 'big.yaml'
+        build_file(path, namespace.megabytes)
+        for mode in _MODES:
+            output: str = subprocess.run(
+                [sys.executable, '-m', __spec__.name, '--child', mode, str(path)],
+                check=True, stdout=subprocess.PIPE, universal_newlines=True
+            ).stdout
+            results[mode] = output.split()
+
+    print('file: {} MB, reader: {}'.format(namespace.megabytes, type(get_reader()).__name__))
+    baseline: int = int(results['text'][1])
+    for mode in _MODES:
+        count, peak_kb, elapsed = results[mode]
+        print('{:<7} documents: {}  peak RSS: {:>8.1f} MB ({:+.1f} MB vs text)  time: {}s'.format(
+            mode, count, int(peak_kb) / 1024, (int(peak_kb) - baseline) / 1024, elapsed
+        ))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
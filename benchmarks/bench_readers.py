@@ -0,0 +1,83 @@
+"""
+Benchmark: PyYamlReader (pure Python) against LibYamlReader (CSafeLoader)
+
+Run it from the folder that contains the project:
+
+    python -m yamalahurry.benchmarks.bench_readers --files 2000
+"""
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import List
+import sys
+
+from yamalahurry.yamala.reader import AbstractReader, LibYamlReader, PyYamlReader, LIBYAML_AVAILABLE
+
+
+_TEMPLATE: str = """
+version: '{index}'
+app: service-{index}
+users:
+{users}
+services:
+    redis:
+        image: 'redis:5.0.{index}'
+        ports: [6379, {port}]
+    postgres:
+        image: postgres:9.6
+        env:
+            POSTGRES_DB: db_{index}
+            POSTGRES_USER: user_{index}
+"""
+
+
+def build_corpus(folder: Path, files: int, users: int) -> List[Path]:
+    paths: List[Path] = []
+    for index in range(files):
+        user_lines: str = '\n'.join('    - user{}@poke.mon'.format((index + u) % (users * 2)) for u in range(users))
+        path: Path = folder / 'config_{}.yaml'.format(index)
+        path.write_text(_TEMPLATE.format(index=index, users=user_lines, port=1000 + index))
+        paths.append(path)
+
+    return paths
+
+
+def time_reader(reader: AbstractReader, paths: List[Path], repeat: int) -> float:
+    best: float = float('inf')
+    for _ in range(repeat):
+        start: float = perf_counter()
+        for path in paths:
+            reader.load(path)
+        best = min(best, perf_counter() - start)
+
+    return best
+
+
+def main(argv: List[str]) -> None:
+    parser: ArgumentParser = ArgumentParser(description='Compare the pure-Python and LibYAML readers')
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    namespace: Namespace = parser.parse_args(argv)
+
+    if not LIBYAML_AVAILABLE:
+        print('pyyaml was built without LibYAML: nothing to compare')
+        return None
+
+    with TemporaryDirectory() as folder:
+        paths: List[Path] = build_corpus(Path(folder), namespace.files, namespace.users)
+        for path in paths:
+            assert PyYamlReader().load(path) == LibYamlReader().load(path)
+
+        python_time: float = time_reader(PyYamlReader(), paths, namespace.repeat)
+        libyaml_time: float = time_reader(LibYamlReader(), paths, namespace.repeat)
+
+    print('files: {}'.format(namespace.files))
+    print('PyYamlReader:  {:.3f}s'.format(python_time))
+    print('LibYamlReader: {:.3f}s'.format(libyaml_time))
+    print('speed-up:      {:.1f}x'.format(python_time / libyaml_time))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,81 @@
+"""
+Benchmark: OpenxlpyWriter.process on a synthetic presence sheet
+
+Compares the former per-cell write path (one sheet.cell() call per value, column by
+column) with the row-major one (whole rows appended), the write-only mode and the
+direct xlsx serializer:
+
+    python -m yamalahurry.benchmarks.bench_writer --rows 10000 --columns 1000
+"""
+from argparse import ArgumentParser, Namespace
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict, List
+import random
+import sys
+
+from openpyxl.worksheet.worksheet import Worksheet
+
+from yamalahurry.yamala.writer import AbstractWriter, OpenxlpyWriter, XlsxStreamWriter
+
+
+def build_sheet(rows: int, columns: int, density: float = 0.5, seed: int = 0) -> Dict[str, Dict]:
+    generator: random.Random = random.Random(seed)
+    return {
+        'users': {
+            'rows': ['user{}@poke.mon'.format(index) for index in range(rows)],
+            'columns': {
+                'config_{}.yaml'.format(column): [int(generator.random() < density) for _ in range(rows)]
+                for column in range(columns)
+            }
+        }
+    }
+
+
+def per_cell_process(writer: OpenxlpyWriter, inputs: Dict[str, Dict]) -> None:
+    """
+    The write path process used before rows were appended in bulk
+    """
+    writer.workbook.remove(writer.workbook.worksheets[0])
+    for index, (name, sheet) in enumerate(inputs.items()):
+        current_sheet: Worksheet = writer.workbook.create_sheet(title=name, index=index)
+        row_number: int = 1
+        col_number: int = 1
+        for row_number, row_content in enumerate(sheet['rows'], start=2):
+            current_sheet.cell(row_number, 1, row_content)
+
+        for col_number, (header, values) in enumerate(sheet['columns'].items(), start=2):
+            current_sheet.cell(1, col_number, header)
+            for row, row_content in enumerate(values, start=2):
+                current_sheet.cell(row, col_number, row_content)
+
+        writer._style.apply(current_sheet, row_number, col_number)
+
+
+def _time(label: str, writer: AbstractWriter, process: Callable[[AbstractWriter, Dict], None], inputs: Dict) -> None:
+    start: float = perf_counter()
+    process(writer, inputs)
+    middle: float = perf_counter()
+    writer.save(label)
+    print('{}: process {:.3f}s  save {:.3f}s'.format(label, middle - start, perf_counter() - middle))
+
+
+def main(argv: List[str]) -> None:
+    parser: ArgumentParser = ArgumentParser(description='Time the writer process step')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--columns', type=int, default=1000)
+    namespace: Namespace = parser.parse_args(argv)
+
+    inputs: Dict[str, Dict] = build_sheet(namespace.rows, namespace.columns)
+    print('cells: {}'.format(namespace.rows * namespace.columns))
+    with TemporaryDirectory() as folder:
+        _time('per-cell', OpenxlpyWriter(folder), per_cell_process, inputs)
+        _time('row-major', OpenxlpyWriter(folder), OpenxlpyWriter.process, inputs)
+        #Rows are serialized while they are appended, so process also does most of the saving
+        _time('write-only', OpenxlpyWriter(folder, write_only=True), OpenxlpyWriter.process, inputs)
+        #Nothing is serialized before save
+        _time('xlsx-stream', XlsxStreamWriter(folder), XlsxStreamWriter.process, inputs)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
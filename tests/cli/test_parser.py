@@ -4,12 +4,14 @@ Test cases for the application entrypoint
 
 import pytest
 
-from yamalahurry.yamala.cli import get_parser
+from yamalahurry.yamala.cli import get_parser, main
 
 from argparse import ArgumentParser, Namespace
+from openpyxl import load_workbook
 from pathlib import Path
 from typing import List
 import sys
+import zipfile
 
 
 @pytest.fixture()
@@ -35,66 +37,402 @@ def monkey_factory(monkeypatch):
                          [
                              (#Test 1
                                      ['read-files', 'file1'],
-                                     {'files': ['file1'], 'destination': Path.cwd()}
+                                     {
+                                         'command': 'read-files',
+                                         'files': ['file1'],
+                                         'destination': Path.cwd(),
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
+                                     }
                              ),
                              (#Test 2
                                      ['read-files', 'file1', 'file2'],
-                                     {'files': ['file1', 'file2'], 'destination': Path.cwd()}
+                                     {
+                                         'command': 'read-files',
+                                         'files': ['file1', 'file2'],
+                                         'destination': Path.cwd(),
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
+                                     }
                              ),
                              (#Test 3
                                      ['read-files', 'file1', 'file2', '-d', '/folder/'],
-                                     {'files': ['file1', 'file2'], 'destination': Path('/folder/')}
+                                     {
+                                         'command': 'read-files',
+                                         'files': ['file1', 'file2'],
+                                         'destination': Path('/folder/'),
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
+                                     }
                              ),
                              (#Test 4
                                      ['read-files', 'file1', 'file2', '--destination', '/folder/'],
-                                     {'files': ['file1', 'file2'], 'destination': Path('/folder/')}
+                                     {
+                                         'command': 'read-files',
+                                         'files': ['file1', 'file2'],
+                                         'destination': Path('/folder/'),
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
+                                     }
                              ),
                              (#Test 5
                                     ['read-folders', 'folder1'],
-                                    {'files': ['folder1'], 'destination': Path.cwd(), 'recursive': False}
+                                    {
+                                        'command': 'read-folders',
+                                        'files': ['folder1'],
+                                        'destination': Path.cwd(),
+                                        'recursive': False,
+                                        'jobs': 1,
+                                        'cache_dir': None,
+                                        'name': 'yamala',
+                                        'output_format': 'xlsx',
+                                        'bundle': False,
+                                        'similarity': None,
+                                        'near_duplicates': None,
+                                        'differences': False,
+                                        'drop_unchanged': False,
+                                        'duplicates': 'parse'
+                                    }
                              ),
                              (#Test 6
                                     ['read-folders', 'folder1', 'folder2'],
-                                    {'files': ['folder1', 'folder2'], 'destination': Path.cwd(), 'recursive': False}
+                                    {
+                                        'command': 'read-folders',
+                                        'files': ['folder1', 'folder2'],
+                                        'destination': Path.cwd(),
+                                        'recursive': False,
+                                        'jobs': 1,
+                                        'cache_dir': None,
+                                        'name': 'yamala',
+                                        'output_format': 'xlsx',
+                                        'bundle': False,
+                                        'similarity': None,
+                                        'near_duplicates': None,
+                                        'differences': False,
+                                        'drop_unchanged': False,
+                                        'duplicates': 'parse'
+                                    }
                              ),
                              (#Test 7
                                     ['read-folders', 'folder1', 'folder2', '-d', '/folder/'],
                                     {
+                                        'command': 'read-folders',
                                         'files': ['folder1', 'folder2'],
                                         'destination': Path('/folder/'),
-                                        'recursive': False
+                                        'recursive': False,
+                                        'jobs': 1,
+                                        'cache_dir': None,
+                                        'name': 'yamala',
+                                        'output_format': 'xlsx',
+                                        'bundle': False,
+                                        'similarity': None,
+                                        'near_duplicates': None,
+                                        'differences': False,
+                                        'drop_unchanged': False,
+                                        'duplicates': 'parse'
                                     }
                              ),
                              (#Test 8
                                      ['read-folders', 'folder1', 'folder2', '--destination', '/folder/'],
                                      {
+                                         'command': 'read-folders',
                                          'files':['folder1', 'folder2'],
                                          'destination':Path('/folder/'),
-                                         'recursive': False
+                                         'recursive': False,
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
                                      }
                              ),
                              (#Test 9
                                      ['read-folders', 'folder1', '-r'],
-                                     {'files':['folder1'], 'destination':Path.cwd(), 'recursive': True}
+                                     {
+                                         'command': 'read-folders',
+                                         'files':['folder1'],
+                                         'destination':Path.cwd(),
+                                         'recursive': True,
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
+                                     }
                              ),
                              (#Test 10
                                      ['read-folders', 'folder1', '--recursive'],
-                                     {'files':['folder1'], 'destination':Path.cwd(), 'recursive': True}
+                                     {
+                                         'command': 'read-folders',
+                                         'files':['folder1'],
+                                         'destination':Path.cwd(),
+                                         'recursive': True,
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
+                                     }
                              ),
                              (#Test 11
                                      ['read-folders', 'folder1', '-d', '/folder/', '-r'],
                                      {
+                                         'command': 'read-folders',
                                          'files':['folder1'],
                                          'destination':Path('/folder/'),
-                                         'recursive': True
+                                         'recursive': True,
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
                                      }
                              ),
                              (#Test 12
                                      ['read-folders', 'folder1', '-d', '/folder/', '--recursive'],
                                      {
+                                         'command': 'read-folders',
                                          'files':['folder1'],
                                          'destination':Path('/folder/'),
-                                         'recursive':True
+                                         'recursive':True,
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
+                                     }
+                             ),
+                             (#Test 13
+                                     ['read-files', 'file1', 'file2', '-j', '4'],
+                                     {
+                                         'command': 'read-files',
+                                         'files': ['file1', 'file2'],
+                                         'destination': Path.cwd(),
+                                         'jobs': 4,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
+                                     }
+                             ),
+                             (#Test 14
+                                     ['read-folders', 'folder1', '-r', '--jobs', '0'],
+                                     {
+                                         'command': 'read-folders',
+                                         'files':['folder1'],
+                                         'destination':Path.cwd(),
+                                         'recursive': True,
+                                         'jobs': 0,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
+                                     }
+                             ),
+                             (#Test 15
+                                     ['read-files', 'file1', '--cache-dir', '/cache/'],
+                                     {
+                                         'command': 'read-files',
+                                         'files': ['file1'],
+                                         'destination': Path.cwd(),
+                                         'jobs': 1,
+                                         'cache_dir': Path('/cache/'),
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
+                                     }
+                             ),
+                             (#Test 16
+                                     ['read-archives', 'bundle.zip', 'bundle.tar.gz', '-d', '/folder/'],
+                                     {
+                                         'command': 'read-archives',
+                                         'files': ['bundle.zip', 'bundle.tar.gz'],
+                                         'destination': Path('/folder/'),
+                                         'jobs': 1,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False
+                                     }
+                             ),
+                             (#Test 17
+                                     ['read-files', 'file1', '-n', 'report'],
+                                     {
+                                         'command': 'read-files',
+                                         'files': ['file1'],
+                                         'destination': Path.cwd(),
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'report',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
+                                     }
+                             ),
+                             (#Test 18
+                                     ['read-folders', 'folder1', '--differences', '--drop-unchanged'],
+                                     {
+                                         'command': 'read-folders',
+                                         'files': ['folder1'],
+                                         'destination': Path.cwd(),
+                                         'recursive': False,
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': True,
+                                         'drop_unchanged': True,
+                                         'duplicates': 'parse'
+                                     }
+                             ),
+                             (#Test 19
+                                     ['read-files', 'file1', '--duplicates', 'collapse'],
+                                     {
+                                         'command': 'read-files',
+                                         'files': ['file1'],
+                                         'destination': Path.cwd(),
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'collapse'
+                                     }
+                             ),
+                             (#Test 20
+                                     ['read-archives', 'bundle.zip', '--similarity', 'overlap'],
+                                     {
+                                         'command': 'read-archives',
+                                         'files': ['bundle.zip'],
+                                         'destination': Path.cwd(),
+                                         'jobs': 1,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': 'overlap',
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False
+                                     }
+                             ),
+                             (#Test 21
+                                     ['read-files', 'file1', '--near-duplicates', '0.9'],
+                                     {
+                                         'command': 'read-files',
+                                         'files': ['file1'],
+                                         'destination': Path.cwd(),
+                                         'jobs': 1,
+                                         'cache_dir': None,
+                                         'name': 'yamala',
+                                         'output_format': 'xlsx',
+                                         'bundle': False,
+                                         'similarity': None,
+                                         'near_duplicates': 0.9,
+                                         'differences': False,
+                                         'drop_unchanged': False,
+                                         'duplicates': 'parse'
+                                     }
+                             ),
+                             (#Test 22
+                                     ['read-archives', 'bundle.zip', '-f', 'tsv', '--bundle'],
+                                     {
+                                         'command': 'read-archives',
+                                         'files': ['bundle.zip'],
+                                         'destination': Path.cwd(),
+                                         'jobs': 1,
+                                         'name': 'yamala',
+                                         'output_format': 'tsv',
+                                         'bundle': True,
+                                         'similarity': None,
+                                         'near_duplicates': None,
+                                         'differences': False,
+                                         'drop_unchanged': False
                                      }
                              )
                          ], ids=['read_files-one_file-default_cwd',
@@ -109,6 +447,16 @@ def monkey_factory(monkeypatch):
                                  'read_folders-one_file-default_cwd-recursive',
                                  'read_folders-one_file-d-r',
                                  'read_folders-one_file-d-recursive',
+                                 'read_files-two_files-j',
+                                 'read_folders-one_file-r-jobs',
+                                 'read_files-one_file-cache_dir',
+                                 'read_archives-two_archives-d',
+                                 'read_files-one_file-n',
+                                 'read_folders-one_file-differences-drop_unchanged',
+                                 'read_files-one_file-duplicates',
+                                 'read_archives-one_archive-similarity',
+                                 'read_files-one_file-near_duplicates',
+                                 'read_archives-one_archive-f-bundle',
                                  ]
                          )
 def test_parser(create_parser, monkey_factory, arguments, expected):
@@ -119,4 +467,148 @@ def test_parser(create_parser, monkey_factory, arguments, expected):
     assert isinstance(namespace.files, List)
     if hasattr(namespace, 'recursive'):
         assert isinstance(namespace.recursive, bool)
+    assert isinstance(namespace.jobs, int)
+
+
+@pytest.mark.parametrize('arguments',
+                         [
+                             ['read-files', 'file1', '-j', '-1'],
+                             ['read-folders', 'folder1', '--jobs', 'many'],
+                             ['read-files', 'file1', '--duplicates', 'drop'],
+                             ['read-archives', 'bundle.zip', '--duplicates', 'reference'],
+                             ['read-archives', 'bundle.zip', '--cache-dir', '/cache/'],
+                             ['read-files', 'file1', '--similarity', 'cosine'],
+                             ['read-files', 'file1', '--near-duplicates', '0'],
+                             ['read-files', 'file1', '--near-duplicates', '1.5'],
+                             ['read-files', 'file1', '--format', 'json']
+                         ], ids=[
+                                 'negative-jobs', 'non-numeric-jobs', 'unknown-duplicates-mode', 'duplicates-on-archives',
+                                 'cache-dir-on-archives', 'unknown-similarity-metric', 'zero-threshold',
+                                 'threshold-above-one', 'unknown-format'
+                                 ]
+                         )
+def test_parser_wrong_arguments(create_parser, monkey_factory, arguments):
+    monkey_factory(arguments)
+    with pytest.raises(SystemExit):
+        create_parser.parse_args(sys.argv)
+
+
+@pytest.fixture
+def build_inputs(tmp_path):
+    folder = tmp_path / 'inputs'
+    (folder / 'sub').mkdir(parents=True)
+    (folder / 'a.yaml').write_text('users: [charmander, squirtle]\n')
+    (folder / 'sub' / 'b.yml').write_text('users: [squirtle, pikachu]\n')
+    return folder
+
+
+@pytest.mark.parametrize('command',
+                         [
+                             ['read-files', '{folder}/a.yaml', '{folder}/sub/b.yml'],
+                             ['read-folders', '{folder}', '-r', '-j', '2'],
+                             ['read-files', '{folder}/a.yaml', '{folder}/sub/b.yml', '--cache-dir', '{folder}/cache'],
+                             ['read-archives', '{folder}/bundle.zip']
+                         ], ids=['read-files', 'read-folders', 'read-files-cached', 'read-archives']
+                         )
+def test_main(build_inputs, tmp_path, command):
+    with zipfile.ZipFile(build_inputs / 'bundle.zip', 'w') as archive:
+        archive.write(build_inputs / 'a.yaml', 'a.yaml')
+        archive.write(build_inputs / 'sub' / 'b.yml', 'sub/b.yml')
+
+    arguments = [argument.format(folder=build_inputs) for argument in command]
+    main(arguments + ['-d', str(tmp_path), '-n', 'report'])
+    sheet = load_workbook(tmp_path / 'report.xlsx')['users']
+    assert [[cell.value for cell in row][1:] for row in sheet.iter_rows(min_row=2)] == [[1, 0], [1, 1], [0, 1]]
+    assert [cell.value for cell in sheet[1]][1:][0].endswith('a.yaml')
+
+
+def test_main_differences(build_inputs, tmp_path):
+    (build_inputs / 'c.yaml').write_text('users: [squirtle]\nports: [80]\n')
+    (build_inputs / 'd.yaml').write_text('users: [squirtle, pikachu]\nports: [80]\n')
+    files = [str(build_inputs / name) for name in ('c.yaml', 'd.yaml')]
+    main(['read-files'] + files + ['-d', str(tmp_path), '--differences'])
+    workbook = load_workbook(tmp_path / 'yamala.xlsx')
+    assert workbook.sheetnames == ['users', 'ports']
+    assert [[cell.value for cell in row] for row in workbook['users'].iter_rows(min_row=2)] == [['pikachu', 0, 1]]
+    assert workbook['ports'].max_row == 1
+
+    main(['read-files'] + files + ['-d', str(tmp_path), '-n', 'dropped', '--differences', '--drop-unchanged'])
+    assert load_workbook(tmp_path / 'dropped.xlsx').sheetnames == ['users']
+
+    with pytest.raises(SystemExit) as exp:
+        main(['read-files', files[0], files[0], '-d', str(tmp_path), '--differences', '--drop-unchanged'])
+
+    assert exp.value.code == 1
+
+
+def test_main_duplicates(build_inputs, tmp_path):
+    (build_inputs / 'copy.yaml').write_bytes((build_inputs / 'a.yaml').read_bytes())
+    files = [str(build_inputs / name) for name in ('a.yaml', 'sub/b.yml', 'copy.yaml')]
+    main(['read-files'] + files + ['-d', str(tmp_path), '--duplicates', 'collapse'])
+    sheet = load_workbook(tmp_path / 'yamala.xlsx')['users']
+    assert [cell.value for cell in sheet[1]][1:] == [files[0] + ', ' + files[2], files[1]]
+    assert [[cell.value for cell in row][1:] for row in sheet.iter_rows(min_row=2)] == [[1, 0], [1, 1], [0, 1]]
+
+
+def test_main_similarity(build_inputs, tmp_path):
+    files = [str(build_inputs / 'a.yaml'), str(build_inputs / 'sub' / 'b.yml')]
+    main(['read-files'] + files + ['-d', str(tmp_path), '--similarity', 'jaccard', '--differences'])
+    workbook = load_workbook(tmp_path / 'yamala.xlsx')
+    assert workbook.sheetnames == ['users', 'similarity']
+    rows = [[cell.value for cell in row] for row in workbook['similarity'].iter_rows()]
+    assert rows == [[None] + files, [files[0], 1, 0.3333], [files[1], 0.3333, 1]]
+
+
+def test_main_near_duplicates(build_inputs, tmp_path):
+    (build_inputs / 'copy.yaml').write_text('users: [squirtle, charmander]\n')
+    files = [str(build_inputs / name) for name in ('a.yaml', 'sub/b.yml', 'copy.yaml')]
+    main(['read-files'] + files + ['-d', str(tmp_path), '--near-duplicates', '0.8'])
+    workbook = load_workbook(tmp_path / 'yamala.xlsx')
+    assert workbook.sheetnames == ['users', 'clusters']
+    assert [cell.value for cell in workbook['users'][1]][1:] == files[:2]
+    rows = [[cell.value for cell in row] for row in workbook['clusters'].iter_rows()]
+    assert rows == [
+        [None, 'representative', 'similarity'],
+        [files[0], files[0], 1], [files[1], files[1], 1], [files[2], files[0], 1]
+    ]
+
+
+@pytest.mark.parametrize(('output_format', 'bundle', 'expected'),
+                         [
+                             (#Test 1
+                                 'csv', False, 'report_users.csv'
+                             ),
+                             (#Test 2
+                                 'tsv', True, 'report/users.tsv'
+                             )
+                         ], ids=['csv', 'tsv-bundle']
+                         )
+def test_main_delimited_formats(build_inputs, tmp_path, output_format, bundle, expected):
+    files = [str(build_inputs / 'a.yaml'), str(build_inputs / 'sub' / 'b.yml')]
+    arguments = ['read-files'] + files + ['-d', str(tmp_path), '-n', 'report', '--format', output_format]
+    main(arguments + (['--bundle'] if bundle else []))
+    separator = ',' if output_format == 'csv' else '\t'
+    lines = (tmp_path / expected).read_text(encoding='utf-8').splitlines()
+    assert lines == [
+        separator.join(['', files[0], files[1]]),
+        separator.join(['charmander', '1', '0']),
+        separator.join(['squirtle', '1', '1']),
+        separator.join(['pikachu', '0', '1'])
+    ]
+
+
+def test_main_direct_xlsx(build_inputs, tmp_path):
+    files = [str(build_inputs / 'a.yaml'), str(build_inputs / 'sub' / 'b.yml')]
+    main(['read-files'] + files + ['-d', str(tmp_path), '--format', 'xlsx-direct'])
+    sheet = load_workbook(tmp_path / 'yamala.xlsx')['users']
+    assert [[cell.value for cell in row] for row in sheet.iter_rows()] == [
+        [None] + files, ['charmander', 1, 0], ['squirtle', 1, 1], ['pikachu', 0, 1]
+    ]
+
+
+def test_main_without_lists(build_inputs, tmp_path):
+    (build_inputs / 'c.yaml').write_text('a: 1\n')
+    with pytest.raises(SystemExit) as exp:
+        main(['read-files', str(build_inputs / 'c.yaml'), '-d', str(tmp_path)])
 
+    assert exp.value.code == 1
@@ -0,0 +1,19 @@
+"""
+Fixtures shared by the reader tests
+"""
+
+import pytest
+
+
+@pytest.fixture
+def build_temp_file_factory(tmp_path):
+    folder = tmp_path / 'test_files'
+    folder.mkdir()
+
+    def wrapper(text: str, file_name: str, encoding: str = 'utf-8'):
+        filepath = folder / file_name
+        filepath.write_bytes(text.encode(encoding))
+
+        return filepath
+
+    return wrapper
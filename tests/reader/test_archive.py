@@ -0,0 +1,67 @@
+"""
+Tests for the zip and tar archive source
+"""
+
+import pytest
+
+from yamalahurry.yamala.reader import ArchiveTypeError, PyYamlReader, iter_archive, load_archives
+from typing import Dict
+import gzip
+import io
+import tarfile
+import zipfile
+
+_MEMBERS: Dict = {
+    'a.yaml': b'users: [charmander@poke.mon]\n',
+    'sub/b.yml': b'---\nusers: [squirtle@poke.mon]\n---\nusers: [pikachu@poke.mon]\n',
+    'notes.txt': b'not yaml',
+    'sub/c.yaml.gz': gzip.compress(b'users: [bulbasaur@poke.mon]\n')
+}
+_EXPECTED = [
+    ('a.yaml', [{'users': ['charmander@poke.mon']}]),
+    ('sub/b.yml', [{'users': ['squirtle@poke.mon']}, {'users': ['pikachu@poke.mon']}]),
+    ('sub/c.yaml.gz', [{'users': ['bulbasaur@poke.mon']}])
+]
+
+
+# #### Fixtures
+@pytest.fixture
+def build_archive_factory(tmp_path):
+    def wrapper(name: str):
+        path = tmp_path / name
+        if name.endswith('.zip'):
+            with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr('sub/', b'')
+                for member, content in _MEMBERS.items():
+                    archive.writestr(member, content)
+
+        else:
+            mode = 'w' if name.endswith('.tar') else 'w:' + name.rsplit('.', 1)[-1]
+            with tarfile.open(path, mode) as archive:
+                for member, content in _MEMBERS.items():
+                    info = tarfile.TarInfo(member)
+                    info.size = len(content)
+                    archive.addfile(info, io.BytesIO(content))
+
+        return path
+
+    return wrapper
+
+
+# #### Happy Path
+@pytest.mark.parametrize('name', ['bundle.zip', 'bundle.tar', 'bundle.tar.gz', 'bundle.tar.bz2', 'bundle.tar.xz'])
+def test_iter_archive(build_archive_factory, name):
+    path = build_archive_factory(name)
+    assert list(iter_archive(path, PyYamlReader())) == _EXPECTED
+
+
+@pytest.mark.parametrize('jobs', [1, 2], ids=['serial', 'pool'])
+def test_load_archives(build_archive_factory, jobs):
+    paths = [build_archive_factory('bundle.zip'), build_archive_factory('bundle.tar.gz')]
+    assert list(load_archives(paths, PyYamlReader(), jobs=jobs)) == _EXPECTED * 2
+
+
+# #### Sad Path
+def test_unsupported_archive(tmp_path):
+    with pytest.raises(ArchiveTypeError):
+        iter_archive(tmp_path / 'bundle.rar')
@@ -0,0 +1,172 @@
+"""
+Tests for the on-disk parse cache
+"""
+
+import pytest
+
+from yamalahurry.yamala.reader import CachedReader, FileTypeError, ProjectionReader, PyYamlReader
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+import os
+
+
+class CountingReader(PyYamlReader):
+    """
+    PyYamlReader that records which files it actually parsed
+    """
+    def __init__(self):
+        PyYamlReader.__init__(self)
+        self.parsed: List = []
+
+    def load(self, filepath):
+        self.parsed.append(filepath)
+        return PyYamlReader.load(self, filepath)
+
+
+def _load_shared(folderpath, paths: List, max_bytes: int) -> int:
+    """
+    Worker of the multi-process test: every process loads every file through the
+    same cache folder
+    """
+    reader = CachedReader(folderpath, PyYamlReader(), max_bytes=max_bytes)
+    for _ in range(5):
+        for path in paths:
+            reader.load(path)
+
+    return len(paths)
+
+
+# #### Fixtures
+@pytest.fixture
+def cached_reader_factory(tmp_path):
+    def wrapper(max_bytes: int = 1024 * 1024):
+        return CachedReader(tmp_path / 'cache', CountingReader(), max_bytes=max_bytes)
+
+    return wrapper
+
+
+# #### Happy Path
+def test_warm_hit_skips_parsing(cached_reader_factory, build_temp_file_factory):
+    path = build_temp_file_factory('users: [charmander@poke.mon]\n', 'test.yaml')
+    reader = cached_reader_factory()
+    assert reader.load(path) == [{'users': ['charmander@poke.mon']}]
+    assert reader.load(path) == [{'users': ['charmander@poke.mon']}]
+    assert reader.reader.parsed == [path]
+
+    #A brand new instance over the same folder also finds the entry
+    other = CachedReader(reader.folderpath, CountingReader())
+    assert other.load(path) == [{'users': ['charmander@poke.mon']}]
+    assert other.reader.parsed == []
+
+
+def test_modified_file_is_parsed_again(cached_reader_factory, build_temp_file_factory):
+    path = build_temp_file_factory('users: [charmander@poke.mon]\n', 'test.yaml')
+    reader = cached_reader_factory()
+    reader.load(path)
+    path.write_text('users: [squirtle@poke.mon, pikachu@poke.mon]\n')
+    assert reader.load(path) == [{'users': ['squirtle@poke.mon', 'pikachu@poke.mon']}]
+    assert reader.reader.parsed == [path, path]
+
+
+def test_touched_file_is_not_parsed_again(cached_reader_factory, build_temp_file_factory):
+    path = build_temp_file_factory('users: [charmander@poke.mon]\n', 'test.yaml')
+    reader = cached_reader_factory()
+    reader.load(path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert reader.load(path) == [{'users': ['charmander@poke.mon']}]
+    assert reader.load(path) == [{'users': ['charmander@poke.mon']}]
+    assert reader.reader.parsed == [path]
+
+
+def test_invalidation(cached_reader_factory, build_temp_file_factory):
+    first = build_temp_file_factory('a: 1\n', 'first.yaml')
+    second = build_temp_file_factory('b: 2\n', 'second.yml')
+    reader = cached_reader_factory()
+    reader.load(first)
+    reader.load(second)
+
+    reader.invalidate(first)
+    reader.load(first)
+    reader.load(second)
+    assert reader.reader.parsed == [first, second, first]
+
+    reader.clear()
+    assert list(reader.folderpath.iterdir()) == []
+    reader.load(second)
+    assert reader.reader.parsed == [first, second, first, second]
+
+
+def test_eviction_keeps_cache_bounded(cached_reader_factory, build_temp_file_factory):
+    paths = [
+        build_temp_file_factory('users: [{}]\n'.format(', '.join(['user{}'.format(i)] * 50)), 'f{}.yaml'.format(i))
+        for i in range(20)
+    ]
+    reader = cached_reader_factory(max_bytes=2048)
+    for path in paths:
+        reader.load(path)
+
+    entries = list(reader.folderpath.iterdir())
+    assert 0 < len(entries) < len(paths)
+    assert sum(entry.stat().st_size for entry in entries) <= 2048
+    #The most recent entry survives
+    reader.reader.parsed.clear()
+    reader.load(paths[-1])
+    assert reader.reader.parsed == []
+
+
+def test_corrupt_entry_is_replaced(cached_reader_factory, build_temp_file_factory):
+    path = build_temp_file_factory('a: 1\n', 'test.yaml')
+    reader = cached_reader_factory()
+    reader.load(path)
+    for entry in reader.folderpath.iterdir():
+        entry.write_bytes(b'not a pickle')
+
+    assert reader.load(path) == [{'a': 1}]
+    assert reader.load(path) == [{'a': 1}]
+    assert reader.reader.parsed == [path, path]
+
+
+def test_readers_do_not_share_entries(tmp_path, build_temp_file_factory):
+    path = build_temp_file_factory('name: bulbasur\nusers: [charmander@poke.mon]\n', 'test.yaml')
+    assert CachedReader(tmp_path / 'cache', ProjectionReader()).load(path) == [{'users': ['charmander@poke.mon']}]
+    assert CachedReader(tmp_path / 'cache', PyYamlReader()).load(path) == [
+        {'name': 'bulbasur', 'users': ['charmander@poke.mon']}
+    ]
+    assert len(list((tmp_path / 'cache').iterdir())) == 2
+
+
+def test_version_bump_invalidates_entries(cached_reader_factory, build_temp_file_factory):
+    path = build_temp_file_factory('a: 1\n', 'test.yaml')
+    reader = cached_reader_factory()
+    reader.load(path)
+    #Same content, new identity: only the version tells the entry apart
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    reader.version += 1
+    assert reader.load(path) == [{'a': 1}]
+    assert reader.reader.parsed == [path, path]
+
+
+def test_processes_share_the_cache_folder(tmp_path, build_temp_file_factory):
+    #60 entries of about 1kB, twice max_bytes: processes keep evicting each other's entries
+    paths = [
+        build_temp_file_factory(
+            'users: [{}]\n'.format(', '.join('user{}-{}'.format(i, j) for j in range(100))), 'f{}.yaml'.format(i)
+        )
+        for i in range(60)
+    ]
+    folderpath = tmp_path / 'cache'
+    with ProcessPoolExecutor(8) as executor:
+        futures = [executor.submit(_load_shared, folderpath, paths, 20000) for _ in range(8)]
+        assert [future.result() for future in futures] == [len(paths)] * 8
+
+    reader = CachedReader(folderpath, PyYamlReader(), max_bytes=20000)
+    assert reader.load(paths[0]) == [{'users': ['user0-{}'.format(j) for j in range(100)]}]
+    assert 0 < len(list(folderpath.iterdir())) < len(paths)
+
+
+# #### Sad Path
+def test_cache_validates_extension(cached_reader_factory):
+    with pytest.raises(FileTypeError):
+        cached_reader_factory().load('/home/path/file.xlsx')
@@ -0,0 +1,75 @@
+"""
+Tests for the folder discovery
+"""
+
+import pytest
+
+from yamalahurry.yamala.reader import discover_files
+import os
+
+
+# #### Fixtures
+@pytest.fixture
+def build_tree(tmp_path):
+    """
+    root/
+        a.yaml, b.yml, notes.txt, c.yaml.bak, h.yaml.gz, i.yml.xz, j.txt.gz
+        sub/
+            d.yaml
+            deeper/e.yml
+            loop -> root
+        .git/f.yaml
+        folder.yaml/g.yaml
+    """
+    root = tmp_path / 'root'
+    (root / 'sub' / 'deeper').mkdir(parents=True)
+    (root / '.git').mkdir()
+    (root / 'folder.yaml').mkdir()
+    for relative in ('a.yaml', 'b.yml', 'notes.txt', 'c.yaml.bak', 'sub/d.yaml', 'sub/deeper/e.yml',
+                     '.git/f.yaml', 'folder.yaml/g.yaml', 'h.yaml.gz', 'i.yml.xz', 'j.txt.gz'):
+        (root / relative).write_text('a: 1\n')
+
+    os.symlink(root, root / 'sub' / 'loop')
+    return root
+
+
+# #### Happy Path
+@pytest.mark.parametrize(('recursive', 'expected'),
+                         [
+                             (#Test 1
+                                 False,
+                                 ['a.yaml', 'b.yml', 'h.yaml.gz', 'i.yml.xz']
+                             ),
+                             (#Test 2
+                                 True,
+                                 [
+                                     'a.yaml', 'b.yml', 'h.yaml.gz', 'i.yml.xz', 'folder.yaml/g.yaml',
+                                     'sub/d.yaml', 'sub/deeper/e.yml'
+                                 ]
+                             )
+                         ], ids=[
+                                    'flat-1',
+                                    'recursive-with-loop-and-pruning-1'
+                                ]
+                         )
+def test_discover_files(build_tree, recursive, expected):
+    found = list(discover_files([build_tree], recursive=recursive))
+    assert [os.path.relpath(path, build_tree) for path in found] == expected
+
+
+def test_discover_files_is_lazy(build_tree):
+    files = discover_files([build_tree], recursive=True)
+    assert os.path.basename(next(files)) == 'a.yaml'
+
+
+def test_discover_files_custom_filters(build_tree):
+    found = list(discover_files([str(build_tree / 'sub'), build_tree], recursive=True, extensions=('.yml',),
+                                excluded=('deeper',)))
+    #root is first reached through the symbolic link, so it is not walked a second time
+    assert [os.path.relpath(path, build_tree) for path in found] == ['sub/loop/b.yml']
+
+
+# #### Sad Path
+def test_discover_missing_folder(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        list(discover_files([tmp_path / 'missing']))
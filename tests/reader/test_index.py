@@ -0,0 +1,152 @@
+"""
+Tests for the document index of multi-document yaml files
+"""
+
+import pytest
+
+from yamalahurry.yamala.reader import DocumentIndex, DocumentIndexError, IndexedReader, PyYamlReader
+from textwrap import dedent
+import os
+
+
+# #### Happy Path
+@pytest.mark.parametrize('text',
+                         [
+                             (#Test 1
+                                 'a: 1\n---\nb: 2\n'
+                             ),
+                             (#Test 2
+                                 dedent(
+                                     """
+                                     # comment
+                                     %YAML 1.1
+                                     ---
+                                     a: [1, 2]
+                                     ...
+                                     %YAML 1.1
+                                     ---
+                                     b: [3]
+                                     ...
+                                     # trailing comment
+                                     """
+                                 )
+                             ),
+                             (#Test 3
+                                 '---\n---\n'
+                             ),
+                             (#Test 4
+                                 dedent(
+                                     """
+                                     a: |
+                                         ---
+                                         not a marker
+                                     b: '
+                                         ... nor this'
+                                     --- inline
+                                     --- >
+                                         folded
+                                     """
+                                 )
+                             ),
+                             (#Test 5
+                                 '﻿a: 1\r\n---\r\nb: 2\r\n'
+                             ),
+                             (#Test 6
+                                 '# nothing but comments\n'
+                             ),
+                             (#Test 7
+                                 ''
+                             )
+                         ], ids=[
+                                    'implicit-first-document-1',
+                                    'directives-and-end-markers-1',
+                                    'empty-documents-1',
+                                    'markers-inside-scalars-1',
+                                    'bom-and-crlf-1',
+                                    'comments-only-1',
+                                    'empty-file-1'
+                                ]
+                         )
+def test_index_matches_full_load(build_temp_file_factory, text):
+    path = build_temp_file_factory(text, 'test.yaml')
+    expected = PyYamlReader().load(path)
+    reader = IndexedReader()
+    assert len(reader.index(path)) == len(expected)
+    assert [reader.load_document(path, position) for position in range(len(expected))] == expected
+
+
+def test_load_documents_slice(build_temp_file_factory):
+    text = ''.join('---\nindex: {0}\nusers: [user{0}]\n'.format(index) for index in range(100))
+    path = build_temp_file_factory(text, 'test.yaml')
+    reader = IndexedReader()
+    assert reader.load_document(path, 90) == {'index': 90, 'users': ['user90']}
+    assert reader.load_documents(path, 10, 13) == [{'index': i, 'users': ['user{}'.format(i)]} for i in (10, 11, 12)]
+
+
+def test_index_persistence(build_temp_file_factory, tmp_path):
+    path = build_temp_file_factory('a: 1\n---\nb: 2\n', 'test.yaml')
+    index = DocumentIndex.load_or_build(path)
+    assert DocumentIndex.index_path(path).exists()
+    assert list(DocumentIndex.read(DocumentIndex.index_path(path)).starts) == list(index.starts)
+
+    #A stale index is rebuilt
+    path.write_text('a: 1\n---\nb: 2\n---\nc: 3\n')
+    os.utime(path, ns=(0, index.mtime_ns + 10 ** 9))
+    assert len(DocumentIndex.load_or_build(path)) == 3
+
+    #Indexes can live in a cache folder instead
+    folder = tmp_path / 'indexes'
+    folder.mkdir()
+    reader = IndexedReader(folder)
+    assert reader.load_document(path, 2) == {'c': 3}
+    assert [entry.suffix for entry in folder.iterdir()] == ['.idx']
+
+
+def test_reader_without_folder_writes_nothing(build_temp_file_factory):
+    path = build_temp_file_factory('a: 1\n---\nb: 2\n', 'test.yaml')
+    reader = IndexedReader()
+    assert reader.load_document(path, 1) == {'b': 2}
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_index_is_used_when_it_cannot_be_saved(build_temp_file_factory, tmp_path):
+    path = build_temp_file_factory('a: 1\n---\nb: 2\n', 'test.yaml')
+    #A file where the cache folder should be: every save fails
+    folder = tmp_path / 'not_a_folder'
+    folder.write_text('')
+    assert len(DocumentIndex.load_or_build(path, folder)) == 2
+    assert IndexedReader(folder).load_document(path, 0) == {'a': 1}
+
+
+@pytest.mark.parametrize(('parts', 'expected'),
+                         [
+                             (1, [(0, 8)]),
+                             (2, [(0, 4), (4, 8)]),
+                             (4, [(0, 2), (2, 4), (4, 6), (6, 8)]),
+                             (20, [(i, i + 1) for i in range(8)])
+                         ], ids=['one-part', 'two-parts', 'four-parts', 'more-parts-than-documents']
+                         )
+def test_partition(build_temp_file_factory, parts, expected):
+    text = ''.join('---\nindex: {}\n'.format(index) for index in range(8))
+    path = build_temp_file_factory(text, 'test.yaml')
+    assert DocumentIndex.build(path).partition(parts) == expected
+
+
+# #### Sad Path
+def test_index_rejects_utf16(build_temp_file_factory):
+    path = build_temp_file_factory('a: 1\n---\nb: 2\n', 'test.yaml', encoding='utf-16')
+    with pytest.raises(DocumentIndexError):
+        DocumentIndex.build(path)
+
+
+def test_index_rejects_compressed_files(tmp_path):
+    path = tmp_path / 'test.yaml.gz'
+    path.write_bytes(b'')
+    with pytest.raises(DocumentIndexError):
+        DocumentIndex.build(path)
+
+
+def test_document_out_of_range(build_temp_file_factory):
+    path = build_temp_file_factory('a: 1\n---\nb: 2\n', 'test.yaml')
+    with pytest.raises(IndexError):
+        IndexedReader().load_document(path, 2)
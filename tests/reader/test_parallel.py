@@ -0,0 +1,55 @@
+"""
+Tests for the parallel loading of yaml files
+"""
+
+import pytest
+
+from yamalahurry.yamala.reader import PyYamlReader, load_files
+from typing import List
+
+
+@pytest.fixture
+def build_corpus(tmp_path):
+    folder = tmp_path / 'test_files'
+    folder.mkdir()
+
+    def wrapper(count: int) -> List:
+        paths: List = []
+        for index in range(count):
+            filepath = folder / 'file_{}.yaml'.format(index)
+            filepath.write_text('---\nindex: {0}\nusers: [user{0}@poke.mon]\n---\nb: {0}\n'.format(index))
+            paths.append(filepath)
+
+        return paths
+
+    return wrapper
+
+
+# #### Happy Path
+@pytest.mark.parametrize(('count', 'jobs', 'chunksize'),
+                         [
+                             (#Test 1
+                                 5, 1, None
+                             ),
+                             (#Test 2
+                                 12, 3, None
+                             ),
+                             (#Test 3
+                                 7, 2, 1
+                             ),
+                             (#Test 4
+                                 3, 0, None
+                             )
+                         ], ids=[
+                                    'serial-1',
+                                    'pool-default-chunks-1',
+                                    'pool-one-file-per-chunk-1',
+                                    'pool-all-cores-1'
+                                ]
+                         )
+def test_load_files_order(build_corpus, count, jobs, chunksize):
+    paths = build_corpus(count)
+    content = list(load_files(paths, PyYamlReader(), jobs=jobs, chunksize=chunksize))
+    assert [path for path, _ in content] == paths
+    for index, (_, documents) in enumerate(content):
+        assert documents == [{'index': index, 'users': ['user{}@poke.mon'.format(index)]}, {'b': index}]
@@ -0,0 +1,135 @@
+"""
+Tests for the event-stream projection reader
+"""
+
+import pytest
+
+from yamalahurry.yamala.reader import FileTypeError, ProjectionReader, PyYamlReader
+from textwrap import dedent
+
+
+def prune(value, root: bool = False):
+    """
+    Reference projection computed from a fully constructed document
+    """
+    if isinstance(value, list):
+        return value
+
+    if isinstance(value, dict):
+        pruned = {key: prune(item) for key, item in value.items()}
+        pruned = {key: item for key, item in pruned.items() if item is not None}
+        if pruned or root:
+            return pruned
+
+    return None
+
+
+# #### Happy Path
+@pytest.mark.parametrize(('text', 'expected'),
+                         [
+                             (#Test 1
+                                 dedent(
+                                     """
+                                     version: 1.0
+                                     app: yamala
+                                     users:
+                                         - charmander@poke.mon
+                                         - squirtle@poke.mon
+                                     services:
+                                         redis:
+                                             image: 'redis:5.0.5'
+                                             ports: [6379, 6380]
+                                         postgres:
+                                             image: postgres:9.6
+                                     """
+                                 ),
+                                 [
+                                     {
+                                         'users': ['charmander@poke.mon', 'squirtle@poke.mon'],
+                                         'services': {'redis': {'ports': [6379, 6380]}}
+                                     }
+                                 ]
+                             ),
+                             (#Test 2
+                                 dedent(
+                                     """
+                                     ---
+                                     a: 1
+                                     b: {c: 2}
+                                     ---
+                                     just a scalar
+                                     ---
+                                     - 1
+                                     - {a: [2, 3]}
+                                     """
+                                 ),
+                                 [{}, None, [1, {'a': [2, 3]}]]
+                             )
+                         ], ids=[
+                                    'mini-docker-compose-1',
+                                    'documents-without-lists-1'
+                                ]
+                         )
+def test_projection_content(build_temp_file_factory, text, expected):
+    path = build_temp_file_factory(text, 'test.yaml')
+    assert ProjectionReader().load(path) == expected
+
+
+@pytest.mark.parametrize('text',
+                         [
+                             (#Test 1
+                                 """
+                                 users: [a, b, 1, yes, 2001-12-14, ~, 1e3]
+                                 nested: {deep: {deeper: {items: [{k: v}, [1, 2]]}}, other: 1}
+                                 """
+                             ),
+                             (#Test 2
+                                 """
+                                 base: &base
+                                     images: [redis, postgres]
+                                     name: base
+                                 plain: &plain {x: 1}
+                                 service:
+                                     <<: *base
+                                     ports: [80]
+                                 overridden:
+                                     <<: [*plain, *base]
+                                     images: none
+                                 aliased: [*base, *plain]
+                                 """
+                             ),
+                             (#Test 3
+                                 """
+                                 a: &list [1, 2]
+                                 b: *list
+                                 c: &scalar value
+                                 d: [*scalar]
+                                 e: [1]
+                                 e: 2
+                                 """
+                             ),
+                             (#Test 4
+                                 """
+                                 pairs: !!omap [a: 1, b: 2]
+                                 set: !!set {a, b}
+                                 blob: [!!binary aGVsbG8=]
+                                 1: [int, key]
+                                 """
+                             )
+                         ], ids=[
+                                    'implicit-types-1',
+                                    'anchors-and-merge-keys-1',
+                                    'aliases-and-duplicates-1',
+                                    'explicit-tags-1'
+                                ]
+                         )
+def test_projection_matches_full_load(build_temp_file_factory, text):
+    path = build_temp_file_factory(dedent(text), 'test.yml')
+    expected = [prune(document, root=True) for document in PyYamlReader().load(path)]
+    assert ProjectionReader().load(path) == expected
+
+
+# #### Sad Path
+def test_projection_validates_extension():
+    with pytest.raises(FileTypeError):
+        ProjectionReader().load('/home/path/file.xlsx')
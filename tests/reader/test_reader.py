@@ -4,9 +4,21 @@ Tests for the yaml parser
 
 import pytest
 
-from yamalahurry.yamala.reader import FileTypeError, PyYamlReader
-from typing import Iterable
+from yamalahurry.yamala.reader import (
+    FileTypeError, LibYamlNotAvailable, LibYamlReader, PyYamlReader, LIBYAML_AVAILABLE, detect_encoding, get_reader
+)
+from yamalahurry.yamala.reader import reader as reader_module
+from pathlib import Path
+from typing import Iterable, Iterator
 from textwrap import dedent
+import bz2
+import gzip
+import lzma
+import yaml
+
+_EXTENSION_MESSAGE: str = (
+    'File extension must be one of .yml, .yaml, .yml.gz, .yml.bz2, .yml.xz, .yaml.gz, .yaml.bz2, .yaml.xz'
+)
 
 
 # #### Fixtures
@@ -15,20 +27,6 @@ def instantiate_pyyaml_reader():
     return PyYamlReader()
 
 
-@pytest.fixture
-def build_temp_file_factory(tmp_path):
-    folder = tmp_path / 'test_files'
-    folder.mkdir()
-
-    def wrapper(text: str, file_name: str):
-        filepath = folder / file_name
-        filepath.write_text(text)
-
-        return filepath
-
-    return wrapper
-
-
 # #### Happy Path
 @pytest.mark.parametrize(('text', 'name', 'expected'),
                          [
@@ -142,18 +140,181 @@ def test_pyyaml_content_retrieval(instantiate_pyyaml_reader, build_temp_file_fac
     assert content == expected
 
 
+@pytest.mark.skipif(not LIBYAML_AVAILABLE, reason='pyyaml built without LibYAML')
+@pytest.mark.parametrize(('text', 'name'),
+                         [
+                             (#Test 1
+                                 dedent(
+                                     """
+                                     version: 1.0
+                                     enabled: yes
+                                     created: 2001-12-14t21:59:43.10-05:00
+                                     day: 2002-12-14
+                                     big: 1e3
+                                     octal: 0o14
+                                     empty: ~
+                                     users: [charmander@poke.mon, squirtle@poke.mon]
+                                     """
+                                 ),
+                                 'test_1.yaml'
+                             ),
+                             (#Test 2
+                                 dedent(
+                                     """
+                                     ---
+                                     version: 1
+                                     ---
+                                     base: &base
+                                         images:
+                                             - redis:5.0.5
+                                             - postgres:9.6
+                                     service:
+                                         <<: *base
+                                         ports: [80, 443]
+                                     ...
+                                     """
+                                 ),
+                                 'test_2.yml'
+                             ),
+                             (#Test 3
+                                 dedent(
+                                     """
+                                     text: |
+                                         multi
+                                         line
+                                     blob: !!binary aGVsbG8=
+                                     set: !!set {a, b}
+                                     pairs: !!omap [a: 1, b: 2]
+                                     """
+                                 ),
+                                 'test_3.yaml'
+                             )
+                         ], ids=[
+                                    'implicit-types-1',
+                                    'anchors-and-merge-keys-1',
+                                    'explicit-tags-1'
+                                ]
+                         )
+def test_libyaml_matches_pyyaml(instantiate_pyyaml_reader, build_temp_file_factory, text, name):
+    path = build_temp_file_factory(text, name)
+    assert LibYamlReader().load(path) == instantiate_pyyaml_reader.load(path)
+
+
+def test_get_reader_fallback(monkeypatch):
+    assert isinstance(get_reader(), LibYamlReader if LIBYAML_AVAILABLE else PyYamlReader)
+
+    monkeypatch.setattr(reader_module, 'LIBYAML_AVAILABLE', False)
+    reader = get_reader()
+    assert type(reader) is PyYamlReader
+    with pytest.raises(LibYamlNotAvailable):
+        LibYamlReader()
+
+
+@pytest.mark.parametrize('reader_class', [PyYamlReader, LibYamlReader], ids=['pyyaml', 'libyaml'])
+def test_iter_documents_is_lazy(build_temp_file_factory, reader_class):
+    if reader_class is LibYamlReader and not LIBYAML_AVAILABLE:
+        pytest.skip('pyyaml built without LibYAML')
+
+    text = dedent(
+        """
+        ---
+        users: [charmander@poke.mon]
+        ---
+        users: [squirtle@poke.mon]
+        ---
+        users: [pikachu@poke.mon
+        """
+    )
+    path = build_temp_file_factory(text, 'test_lazy.yaml')
+    documents = reader_class().iter_documents(path)
+    assert isinstance(documents, Iterator)
+    assert next(documents) == {'users': ['charmander@poke.mon']}
+    assert next(documents) == {'users': ['squirtle@poke.mon']}
+    with pytest.raises(yaml.YAMLError):
+        next(documents)
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'utf-8-sig', 'utf-16', 'utf-16-le', 'utf-32'])
+@pytest.mark.parametrize('use_mmap', [True, False], ids=['mmap', 'buffered'])
+@pytest.mark.parametrize('reader_class', [PyYamlReader, LibYamlReader], ids=['pyyaml', 'libyaml'])
+def test_binary_ingestion(tmp_path, reader_class, use_mmap, encoding):
+    if reader_class is LibYamlReader and not LIBYAML_AVAILABLE:
+        pytest.skip('pyyaml built without LibYAML')
+
+    text = 'users: [charmander@poké.mon, squirtle@poké.mon]\n---\nname: pikachü\n'
+    data = text.encode(encoding)
+    if encoding == 'utf-16-le':
+        #No codec writes the BOM for explicit endianness
+        data = b'\xff\xfe' + data
+
+    path = tmp_path / 'test.yaml'
+    path.write_bytes(data)
+    assert reader_class(use_mmap=use_mmap).load(path) == [
+        {'users': ['charmander@poké.mon', 'squirtle@poké.mon']},
+        {'name': 'pikachü'}
+    ]
+
+
+@pytest.mark.parametrize(('prefix', 'expected'),
+                         [
+                             (b'a: 1', 'utf-8'),
+                             (b'\xef\xbb\xbfa', 'utf-8-sig'),
+                             (b'\xff\xfea\x00', 'utf-16'),
+                             (b'\xfe\xff\x00a', 'utf-16'),
+                             (b'\xff\xfe\x00\x00', 'utf-32'),
+                             (b'\x00\x00\xfe\xff', 'utf-32'),
+                             (b'', 'utf-8')
+                         ], ids=['no-bom', 'utf8-bom', 'utf16-le', 'utf16-be', 'utf32-le', 'utf32-be', 'empty']
+                         )
+def test_detect_encoding(prefix, expected):
+    assert detect_encoding(prefix) == expected
+
+
+@pytest.mark.parametrize(('name', 'compress'),
+                         [
+                             ('test.yaml.gz', gzip.compress),
+                             ('test.yml.bz2', bz2.compress),
+                             ('test.yaml.xz', lzma.compress)
+                         ], ids=['gzip', 'bz2', 'xz']
+                         )
+@pytest.mark.parametrize('reader_class', [PyYamlReader, LibYamlReader], ids=['pyyaml', 'libyaml'])
+def test_compressed_input(tmp_path, reader_class, name, compress):
+    if reader_class is LibYamlReader and not LIBYAML_AVAILABLE:
+        pytest.skip('pyyaml built without LibYAML')
+
+    text = ''.join('---\nindex: {0}\nusers: [user{0}@poke.mon]\n'.format(index) for index in range(2000))
+    path = tmp_path / name
+    path.write_bytes(compress(text.encode('utf-8')))
+    documents = reader_class().iter_documents(path)
+    assert next(documents) == {'index': 0, 'users': ['user0@poke.mon']}
+    assert len(list(documents)) == 1999
+
+
+def test_empty_file(instantiate_pyyaml_reader, build_temp_file_factory):
+    path = build_temp_file_factory('', 'empty.yaml')
+    assert instantiate_pyyaml_reader.load(path) == []
+
+
 # #### Sad Path
 @pytest.mark.parametrize(('filepath', 'output'),
                          [
                              (#Test 1
-                                 '/home/path/file.xlsx', 'File extension must be .yaml or .yml'
+                                 '/home/path/file.xlsx', _EXTENSION_MESSAGE
                              ),
                              (#Test2
-                                 '/home/path/file.yeml', 'File extension must be .yaml or .yml'
+                                 '/home/path/file.yeml', _EXTENSION_MESSAGE
+                             ),
+                             (#Test3
+                                 '/home/path/file.json.gz', _EXTENSION_MESSAGE
+                             ),
+                             (#Test4
+                                 Path('/home/path/file.gz'), _EXTENSION_MESSAGE
                              )
                          ], ids=[
                                     'excel_file-str',
-                                    'yeml_extension'
+                                    'yeml_extension',
+                                    'compressed-json',
+                                    'compressed-without-yaml-extension'
                                 ]
                          )
 def test_file_ext(instantiate_pyyaml_reader, filepath, output):
@@ -161,3 +322,8 @@ def test_file_ext(instantiate_pyyaml_reader, filepath, output):
         instantiate_pyyaml_reader.load(filepath)
 
     assert exp.value.args[0] == output
+
+
+def test_iter_documents_validates_eagerly(instantiate_pyyaml_reader):
+    with pytest.raises(FileTypeError):
+        instantiate_pyyaml_reader.iter_documents('/home/path/file.xlsx')
@@ -0,0 +1,136 @@
+"""
+Tests for the MinHash/LSH near-duplicate clustering
+"""
+
+import pytest
+
+from yamalahurry.yamala.clustering import (
+    add_cluster_sheet, cluster_near_duplicates, estimate, lsh_bands, lsh_clusters, minhash_signatures
+)
+from yamalahurry.yamala.converters import MatrixAccumulator
+import random
+
+
+def _family_files(families: int = 3, members: int = 4, size: int = 100, changed: int = 2):
+    """
+    Files grouped in families: every member keeps all but changed items of its family
+    """
+    generator = random.Random(11)
+    files = []
+    for family in range(families):
+        items = ['f{}-{}'.format(family, item) for item in range(size)]
+        for member in range(members):
+            kept = generator.sample(items, size - changed)
+            extra = ['m{}-{}-{}'.format(family, member, item) for item in range(changed)]
+            files.append(('f{}m{}.yaml'.format(family, member), [{'items': kept + extra}]))
+
+    generator.shuffle(files)
+    return files
+
+
+def _accumulator(files, layout: str = 'dense'):
+    accumulator = MatrixAccumulator(layout)
+    for file_id, documents in files:
+        accumulator.add(file_id, documents)
+
+    return accumulator
+
+
+# #### Happy Path
+def test_signatures_follow_the_items():
+    files = [
+        ('a.yaml', [{'users': ['charmander', 'squirtle'], 'ports': [80]}]),
+        ('b.yaml', [{'ports': [80], 'users': ['squirtle', 'charmander']}]),
+        ('c.yaml', [{'ports': ['80'], 'users': ['squirtle', 'charmander']}]),
+        ('d.yaml', [{'name': 'no lists'}]),
+        ('e.yaml', [])
+    ]
+    first, second, third, fourth, fifth = minhash_signatures(_accumulator(files))
+    assert len(first) == 128
+    assert first == second
+    #'80' and 80 are different items
+    assert first != third
+    assert fourth == fifth
+    #Signatures do not depend on the order the files were read
+    assert minhash_signatures(_accumulator(files[::-1]))[-1] == first
+
+
+def test_estimate_is_close_to_jaccard():
+    generator = random.Random(3)
+    population = list(range(1000))
+    for _ in range(20):
+        first = set(generator.sample(population, 200))
+        second = set(generator.sample(sorted(first), generator.randint(20, 200)))
+        second.update(generator.sample(population, generator.randint(0, 200)))
+        signatures = minhash_signatures(_accumulator([('a', [sorted(first)]), ('b', [sorted(second)])]))
+        jaccard = len(first & second) / len(first | second)
+        assert abs(estimate(*signatures) - jaccard) < 0.2
+
+
+@pytest.mark.parametrize(('threshold', 'expected'),
+                         [
+                             (#Test 1
+                                 1.0, 1
+                             ),
+                             (#Test 2
+                                 0.95, 8
+                             ),
+                             (#Test 3
+                                 0.8, 32
+                             ),
+                             (#Test 4
+                                 0.01, 128
+                             )
+                         ], ids=['identical', 'very-close', 'default', 'too-low']
+                         )
+def test_lsh_bands(threshold, expected):
+    assert lsh_bands(threshold) == expected
+
+
+@pytest.mark.parametrize('layout', ['dense', 'bitset', 'sparse'], ids=['dense', 'bitset', 'sparse'])
+def test_cluster_near_duplicates(layout):
+    files = _family_files()
+    accumulator = _accumulator(files, layout)
+    clusters = cluster_near_duplicates(accumulator, threshold=0.8)
+    names = [file_id for file_id, _ in files]
+    assert clusters['rows'] == names
+    representatives = clusters['columns']['representative']
+    #Every family collapses onto the first of its files
+    for name, representative in zip(names, representatives):
+        first = next(other for other in names if other[:2] == name[:2])
+        assert representative == first
+
+    assert all(similarity >= 0.8 for similarity in clusters['columns']['similarity'])
+    assert accumulator.headers == sorted(set(representatives), key=names.index)
+    sheet = accumulator.finalize()['items']
+    headers = sheet['columns'] if layout == 'dense' else sheet.headers
+    assert list(headers) == accumulator.headers
+
+
+def test_dissimilar_files_stay_apart():
+    files = [('a.yaml', [{'items': list(range(0, 100))}]), ('b.yaml', [{'items': list(range(50, 150))}])]
+    accumulator = _accumulator(files)
+    clusters = cluster_near_duplicates(accumulator, threshold=0.9)
+    assert clusters['columns']['representative'] == ['a.yaml', 'b.yaml']
+    assert clusters['columns']['similarity'] == [1.0, 1.0]
+    assert accumulator.headers == ['a.yaml', 'b.yaml']
+
+
+def test_lsh_clusters_without_files():
+    assert lsh_clusters([], 0.8) == []
+
+
+def test_add_cluster_sheet():
+    clusters = {'rows': ['a'], 'columns': {'representative': ['a'], 'similarity': [1.0]}}
+    sheets = {'clusters': {'rows': [1], 'columns': {'a': [1]}}}
+    result = add_cluster_sheet(sheets, clusters)
+    assert list(result) == ['clusters', 'clusters_1']
+    assert result['clusters_1'] is clusters
+    assert list(sheets) == ['clusters']
+
+
+# #### Sad Path
+@pytest.mark.parametrize('threshold', [0, -0.5, 1.5], ids=['zero', 'negative', 'above-one'])
+def test_wrong_threshold(threshold):
+    with pytest.raises(ValueError):
+        lsh_bands(threshold)
@@ -0,0 +1,334 @@
+"""
+Tests for the documents-to-matrix converter
+"""
+
+import pytest
+
+from yamalahurry.yamala.converters import (
+    MatrixAccumulator, accumulate_files, convert_files, documents_to_matrix, keep_differences, to_label, unique_name
+)
+from yamalahurry.yamala.matrix import PresenceMatrix, SparseMatrix
+from yamalahurry.yamala.reader import PyYamlReader
+from yamalahurry.yamala.writer import OpenxlpyWriter
+from datetime import date
+
+
+# #### Happy Path
+@pytest.mark.parametrize(('files', 'expected'),
+                         [
+                             (#Test 1
+                                 [
+                                     ('a.yaml', [{'users': ['charmander', 'squirtle']}]),
+                                     ('b.yaml', [{'users': ['squirtle', 'pikachu']}])
+                                 ],
+                                 {
+                                     'users': {
+                                         'rows': ['charmander', 'squirtle', 'pikachu'],
+                                         'columns': {
+                                             'a.yaml': [1, 1, 0],
+                                             'b.yaml': [0, 1, 1]
+                                         }
+                                     }
+                                 }
+                             ),
+                             (#Test 2
+                                 [
+                                     ('a.yaml', [{'version': 1, 'services': {'web': {'ports': [80, 443]}}}]),
+                                     ('b.yaml', [{'version': 2, 'services': {'db': {'ports': [5432]}}}]),
+                                     ('c.yaml', [{'services': {'web': {'ports': [443], 'image': 'nginx'}}}])
+                                 ],
+                                 {
+                                     'services.web.ports': {
+                                         'rows': [80, 443],
+                                         'columns': {
+                                             'a.yaml': [1, 1],
+                                             'b.yaml': [0, 0],
+                                             'c.yaml': [0, 1]
+                                         }
+                                     },
+                                     'services.db.ports': {
+                                         'rows': [5432],
+                                         'columns': {
+                                             'a.yaml': [0],
+                                             'b.yaml': [1],
+                                             'c.yaml': [0]
+                                         }
+                                     }
+                                 }
+                             ),
+                             (#Test 3
+                                 [
+                                     ('a.yaml', [{'tags': ['x']}, {'tags': ['y']}, None]),
+                                     ('b.yaml', [['root-item']])
+                                 ],
+                                 {
+                                     'tags': {
+                                         'rows': ['x', 'y'],
+                                         'columns': {
+                                             'a.yaml': [1, 1],
+                                             'b.yaml': [0, 0]
+                                         }
+                                     },
+                                     'root': {
+                                         'rows': ['root-item'],
+                                         'columns': {
+                                             'a.yaml': [0],
+                                             'b.yaml': [1]
+                                         }
+                                     }
+                                 }
+                             ),
+                             (#Test 4
+                                 [
+                                     ('a.yaml', [{'values': [1, True, 1.0, '1', None, {'k': 1}]}]),
+                                     ('a.yaml', [{'values': [1, 1], 'empty': []}])
+                                 ],
+                                 {
+                                     'values': {
+                                         'rows': [1, True, 1.0, '1', 'null', '{"k": 1}'],
+                                         'columns': {
+                                             'a.yaml': [1, 1, 1, 1, 1, 1],
+                                             'a.yaml_1': [1, 0, 0, 0, 0, 0]
+                                         }
+                                     }
+                                 }
+                             )
+                         ], ids=[
+                                    'single-attribute-1',
+                                    'nested-attributes-1',
+                                    'multi-documents-and-root-lists-1',
+                                    'typed-items-and-duplicate-files-1'
+                                ]
+                         )
+def test_documents_to_matrix(files, expected):
+    assert documents_to_matrix(files) == expected
+
+
+@pytest.mark.parametrize(('item', 'expected'),
+                         [
+                             ('text', 'text'),
+                             (3, 3),
+                             (date(2020, 1, 1), date(2020, 1, 1)),
+                             (None, 'null'),
+                             ({'b': 1, 'a': [2]}, '{"a": [2], "b": 1}'),
+                             ({1: 'a', 'b': 2}, "{1: 'a', 'b': 2}"),
+                             (b'bytes', "b'bytes'")
+                         ], ids=['str', 'int', 'date', 'none', 'mapping', 'mixed-keys-mapping', 'bytes']
+                         )
+def test_to_label(item, expected):
+    assert to_label(item) == expected
+
+
+def test_matrix_is_writer_input(tmp_path):
+    files = [('a.yaml', [{'users': ['charmander']}]), ('b.yaml', [{'users': ['pikachu']}])]
+    writer = OpenxlpyWriter(tmp_path)
+    writer.process(documents_to_matrix(files))
+    assert writer.workbook.sheetnames == ['users']
+
+
+def test_bitset_layout():
+    files = [
+        ('a.yaml', [{'users': ['charmander', 'squirtle'], 'ports': [80]}]),
+        ('b.yaml', [{'users': ['squirtle', 'pikachu']}])
+    ]
+    dense = documents_to_matrix(files)
+    packed = documents_to_matrix(files, layout='bitset')
+    assert all(isinstance(sheet, PresenceMatrix) for sheet in packed.values())
+    assert {name: sheet.to_dict() for name, sheet in packed.items()} == dense
+
+
+def test_sparse_layout():
+    files = [
+        ('a.yaml', [{'users': ['charmander', 'squirtle']}, {'users': ['charmander']}]),
+        ('b.yaml', [{'ports': [80]}]),
+        ('c.yaml', [{'users': ['squirtle', 'pikachu', 'pikachu']}])
+    ]
+    dense = documents_to_matrix(files)
+    sparse = documents_to_matrix(files, layout='sparse')
+    assert all(isinstance(sheet, SparseMatrix) for sheet in sparse.values())
+    assert sparse['users'].nnz == 4
+    assert {name: sheet.to_dict() for name, sheet in sparse.items()} == dense
+
+
+@pytest.mark.parametrize('layout', ['dense', 'bitset', 'sparse'], ids=['dense', 'bitset', 'sparse'])
+def test_keep_differences(layout):
+    files = [
+        ('a.yaml', [{'users': ['charmander', 'squirtle'], 'ports': [80]}]),
+        ('b.yaml', [{'users': ['squirtle', 'pikachu'], 'ports': [80]}])
+    ]
+    sheets = keep_differences(documents_to_matrix(files, layout=layout))
+    as_dict = {name: sheet if layout == 'dense' else sheet.to_dict() for name, sheet in sheets.items()}
+    assert as_dict == {
+        'users': {'rows': ['charmander', 'pikachu'], 'columns': {'a.yaml': [1, 0], 'b.yaml': [0, 1]}},
+        'ports': {'rows': [], 'columns': {'a.yaml': [], 'b.yaml': []}}
+    }
+    assert list(keep_differences(documents_to_matrix(files, layout=layout), drop_unchanged=True)) == ['users']
+
+
+@pytest.mark.parametrize('layout', ['dense', 'bitset', 'sparse'], ids=['dense', 'bitset', 'sparse'])
+def test_accumulator(layout):
+    files = [
+        ('a.yaml', [{'users': ['charmander', 'squirtle']}]),
+        ('a.yaml', [{'users': ['pikachu'], 'ports': [80]}]),
+        ('c.yaml', iter([{'users': ['squirtle']}]))
+    ]
+    accumulator = MatrixAccumulator(layout)
+    assert accumulator.add(*files[0]) == 'a.yaml'
+    assert accumulator.add(*files[1]) == 'a.yaml_1'
+    partial = accumulator.finalize()
+    assert accumulator.add(*files[2]) == 'c.yaml'
+    assert len(accumulator) == 3
+
+    def as_dict(sheets):
+        return {name: sheet if layout == 'dense' else sheet.to_dict() for name, sheet in sheets.items()}
+
+    assert as_dict(partial) == documents_to_matrix(files[:2])
+    assert as_dict(accumulator.finalize()) == documents_to_matrix(files[:2] + [('c.yaml', [{'users': ['squirtle']}])])
+
+
+def test_accumulator_merge():
+    files = [
+        ('a.yaml', [{'users': ['charmander', 'squirtle'], 'empty': []}]),
+        ('b.yaml', [{'users': ['pikachu', 'squirtle'], 'empty': [1]}]),
+        ('a.yaml', [{'ports': [80], 'users': ['eevee', 'charmander']}]),
+        ('d.yaml', [{'users': [1, True, 'charmander']}])
+    ]
+    left, right = MatrixAccumulator(), MatrixAccumulator()
+    for file_id, documents in files[:1]:
+        left.add(file_id, documents)
+
+    for file_id, documents in files[1:]:
+        right.add(file_id, documents)
+
+    left.merge(right)
+    assert left.headers == ['a.yaml', 'b.yaml', 'a.yaml_1', 'd.yaml']
+    assert left.finalize() == documents_to_matrix(files)
+    assert list(left.finalize()) == list(documents_to_matrix(files))
+
+
+@pytest.mark.parametrize(('jobs', 'layout'),
+                         [
+                             (1, 'dense'),
+                             (2, 'dense'),
+                             (3, 'bitset'),
+                             (2, 'sparse')
+                         ], ids=['serial', 'two-workers', 'three-workers-bitset', 'two-workers-sparse']
+                         )
+def test_convert_files(tmp_path, jobs, layout):
+    paths = []
+    for index in range(11):
+        filepath = tmp_path / 'file_{}.yaml'.format(index)
+        filepath.write_text('users: [user{}, admin]\n---\nports: [{}]\n'.format(index % 4, 80 + index % 3))
+        paths.append(filepath)
+
+    expected = documents_to_matrix(((str(path), [{'users': ['user{}'.format(index % 4), 'admin']},
+                                                 {'ports': [80 + index % 3]}])
+                                    for index, path in enumerate(paths)), layout)
+    result = convert_files(paths, jobs=jobs, layout=layout)
+    assert result == expected
+    assert list(result) == list(expected)
+
+
+def test_accumulate_files_streams_paths(tmp_path, monkeypatch):
+    """
+    A serial run parses every path as soon as it is produced, before the rest of
+    the generator (e.g. a folder walk) runs
+    """
+    events = []
+
+    def paths():
+        for index in range(3):
+            filepath = tmp_path / 'file_{}.yaml'.format(index)
+            filepath.write_text('users: [user{}]\n'.format(index))
+            events.append(('found', index))
+            yield filepath
+
+    reader = PyYamlReader()
+    original_load = reader.load
+    monkeypatch.setattr(
+        reader, 'load', lambda filepath: events.append(('parsed', filepath.stem)) or original_load(filepath)
+    )
+    accumulator = accumulate_files(paths(), reader)
+    assert events == [
+        ('found', 0), ('parsed', 'file_0'), ('found', 1), ('parsed', 'file_1'), ('found', 2), ('parsed', 'file_2')
+    ]
+    assert accumulator.headers == [str(tmp_path / 'file_{}.yaml'.format(index)) for index in range(3)]
+
+
+@pytest.mark.parametrize(('duplicates', 'jobs', 'layout'),
+                         [
+                             ('reference', 1, 'dense'),
+                             ('reference', 2, 'bitset'),
+                             ('collapse', 1, 'sparse'),
+                             ('collapse', 2, 'dense')
+                         ], ids=['reference', 'reference-two-workers-bitset', 'collapse-sparse', 'collapse-two-workers']
+                         )
+def test_convert_files_duplicates(tmp_path, monkeypatch, duplicates, jobs, layout):
+    contents = ['users: [a, b]\n', 'users: [b, c]\n', 'users: [a, b]\n', 'users: [b, a]\n', 'users: [b, c]\n']
+    paths = []
+    for index, content in enumerate(contents):
+        filepath = tmp_path / 'file_{}.yaml'.format(index)
+        filepath.write_text(content)
+        paths.append(filepath)
+
+    loaded = []
+    reader = PyYamlReader()
+    if jobs == 1:
+        #Workers would need to pickle the patched reader
+        original_load = reader.load
+        monkeypatch.setattr(reader, 'load', lambda filepath: loaded.append(filepath) or original_load(filepath))
+
+    result = convert_files(paths, reader, jobs=jobs, layout=layout, duplicates=duplicates)
+    if jobs == 1:
+        assert loaded == [paths[0], paths[1], paths[3]]
+
+    sheet = result['users'] if layout == 'dense' else result['users'].to_dict()
+    if duplicates == 'reference':
+        assert sheet == convert_files(paths)['users']
+
+    else:
+        assert sheet == {
+            'rows': ['a', 'b', 'c'],
+            'columns': {
+                '{}, {}'.format(paths[0], paths[2]): [1, 1, 0],
+                '{}, {}'.format(paths[1], paths[4]): [0, 1, 1],
+                str(paths[3]): [1, 1, 0]
+            }
+        }
+
+
+def test_labels_are_shared():
+    files = [
+        ('a.yaml', [{'users': ['squirtle'], 'admins': ['squirtle', 'pikachu']}]),
+        ('b.yaml', [{'users': ['pikachu', 'squirtle']}])
+    ]
+    sheets = documents_to_matrix(files, layout='bitset')
+    assert sheets['users'].labels is sheets['admins'].labels
+    assert sheets['users'].labels.labels == ['squirtle', 'pikachu']
+    assert list(sheets['users'].rows) == [0, 1]
+    assert list(sheets['admins'].rows) == [0, 1]
+    dense = documents_to_matrix(files)
+    assert dense['users']['rows'][1] is dense['admins']['rows'][1]
+
+
+def test_unknown_layout():
+    with pytest.raises(ValueError):
+        documents_to_matrix([], layout='wide')
+
+    with pytest.raises(ValueError):
+        MatrixAccumulator('wide')
+
+    with pytest.raises(ValueError):
+        convert_files([], layout='wide')
+
+    with pytest.raises(ValueError):
+        convert_files([], duplicates='drop')
+
+
+def test_unique_name():
+    assert unique_name('similarity', {'users'}) == 'similarity'
+    assert unique_name('similarity', {'similarity', 'similarity_1'}) == 'similarity_2'
+
+
+def test_no_lists():
+    assert documents_to_matrix([('a.yaml', [{'a': 1}]), ('b.yaml', [{'empty': []}])]) == {}
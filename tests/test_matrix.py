@@ -0,0 +1,168 @@
+"""
+Tests for the compact presence matrix
+"""
+
+import pytest
+
+from array import array
+
+from yamalahurry.yamala.matrix import LabelTable, PresenceMatrix, SparseMatrix, iter_set_bits, popcount
+
+_SHEET = {
+    'rows': ['charmander', 'squirtle', 'pikachu'],
+    'columns': {
+        'a.yaml': [1, 1, 0],
+        'b.yaml': [0, 1, 1],
+        'c.yaml': [0, 0, 0]
+    }
+}
+
+
+# #### Happy Path
+def test_from_dict_round_trip():
+    matrix = PresenceMatrix.from_dict(_SHEET)
+    assert matrix.columns == [0b011, 0b110, 0]
+    assert matrix.shape == (3, 3)
+    assert matrix.to_dict() == _SHEET
+
+
+def test_lookups():
+    matrix = PresenceMatrix.from_dict(_SHEET)
+    assert matrix.get('pikachu', 'b.yaml') == 1
+    assert matrix.get('pikachu', 'a.yaml') == 0
+    assert matrix.row_index['squirtle'] == 1
+    assert matrix.column_index['c.yaml'] == 2
+    assert [matrix.count(position) for position in range(3)] == [2, 2, 0]
+
+
+def test_iter_rows():
+    matrix = PresenceMatrix.from_dict(_SHEET)
+    assert list(matrix.iter_rows()) == [
+        ('charmander', [1, 0, 0]),
+        ('squirtle', [1, 1, 0]),
+        ('pikachu', [0, 1, 0])
+    ]
+
+
+@pytest.mark.parametrize('size', [1, 7, 8, 9, 1000], ids=['1', '7', '8', '9', '1000'])
+def test_byte_boundaries(size):
+    hits = [[row for row in range(size) if row % 3 == 0], list(range(size))]
+    matrix = PresenceMatrix.from_hits(list(range(size)), ['x', 'y'], hits)
+    assert matrix.column(0) == [1 if row % 3 == 0 else 0 for row in range(size)]
+    assert matrix.column(1) == [1] * size
+    assert matrix.count(1) == popcount(matrix.columns[1]) == size
+
+
+@pytest.mark.parametrize(('bits', 'expected'),
+                         [
+                             (0, []),
+                             (0b1, [0]),
+                             (0b10000001, [0, 7]),
+                             (1 << 8 | 1 << 1000, [8, 1000])
+                         ], ids=['zero', 'first-bit', 'byte-ends', 'far-apart']
+                         )
+def test_iter_set_bits(bits, expected):
+    assert list(iter_set_bits(bits)) == expected
+
+
+def test_sparse_from_dict_round_trip():
+    matrix = SparseMatrix.from_dict(_SHEET)
+    assert list(matrix.indptr) == [0, 1, 3, 4]
+    assert list(matrix.indices) == [0, 0, 1, 1]
+    assert matrix.nnz == 4
+    assert matrix.to_dict() == _SHEET
+
+
+def test_sparse_lookups():
+    matrix = SparseMatrix.from_dict(_SHEET)
+    assert matrix.get('squirtle', 'b.yaml') == 1
+    assert matrix.get('squirtle', 'c.yaml') == 0
+    assert list(matrix.iter_nonzero()) == [(0, 0), (1, 0), (1, 1), (2, 1)]
+    assert list(matrix.iter_rows()) == list(PresenceMatrix.from_dict(_SHEET).iter_rows())
+
+
+def test_sparse_empty_rows():
+    matrix = SparseMatrix.from_hits(['a', 'b', 'c'], ['x', 'y'], [[2], []])
+    assert list(matrix.indptr) == [0, 0, 0, 1]
+    assert matrix.to_dict() == {'rows': ['a', 'b', 'c'], 'columns': {'x': [0, 0, 1], 'y': [0, 0, 0]}}
+
+
+@pytest.mark.parametrize('matrix_type', [PresenceMatrix, SparseMatrix], ids=['bitset', 'sparse'])
+def test_differences(matrix_type):
+    sheet = {
+        'rows': ['everywhere', 'nowhere', 'some', 'one'],
+        'columns': {
+            'a.yaml': [1, 0, 1, 0],
+            'b.yaml': [1, 0, 1, 1],
+            'c.yaml': [1, 0, 0, 0]
+        }
+    }
+    kept = matrix_type.from_dict(sheet).differences()
+    assert kept.to_dict() == {
+        'rows': ['some', 'one'],
+        'columns': {'a.yaml': [1, 0], 'b.yaml': [1, 1], 'c.yaml': [0, 0]}
+    }
+
+
+@pytest.mark.parametrize('matrix_type', [PresenceMatrix, SparseMatrix], ids=['bitset', 'sparse'])
+def test_differences_across_bytes(matrix_type):
+    size = 20
+    hits = [list(range(size)), [row for row in range(size) if row % 4], [row for row in range(size) if row > 9]]
+    kept = matrix_type.from_hits(list(range(size)), ['x', 'y', 'z'], hits).differences()
+    assert kept.rows == [row for row in range(size) if not (row % 4 and row > 9)]
+    assert kept.to_dict()['columns']['x'] == [1] * len(kept.rows)
+
+
+def test_label_table():
+    table = LabelTable()
+    assert [table.encode(label) for label in ['a', 1, True, 1.0, 'a', 1]] == [0, 1, 2, 3, 0, 1]
+    assert table.encode('{"k": 1}', dict) == 4
+    assert table.encode('{"k": 1}') == 5
+    assert table.decode([3, 0]) == [1.0, 'a']
+    other = LabelTable()
+    for label in ['z', 'a', True]:
+        other.encode(label)
+
+    assert list(table.merge(other)) == [6, 0, 2]
+    assert len(table) == 7 and table[6] == 'z'
+
+
+@pytest.mark.parametrize('matrix_type', [PresenceMatrix, SparseMatrix], ids=['bitset', 'sparse'])
+def test_coded_rows(matrix_type):
+    table = LabelTable()
+    codes = array('q', [table.encode(label) for label in _SHEET['rows']])
+    matrix = matrix_type.from_hits(codes, list(_SHEET['columns']), [[0, 1], [1, 2], []], table)
+    assert matrix.to_dict() == _SHEET
+    assert matrix.get('pikachu', 'b.yaml') == 1
+    assert matrix == matrix_type.from_dict(_SHEET)
+    kept = matrix_type.from_hits(codes, ['a.yaml', 'b.yaml'], [[0, 1], [1, 2]], table).differences()
+    assert kept.labels is table
+    assert list(kept.rows) == [0, 2]
+    assert kept.row_labels == ['charmander', 'pikachu']
+
+
+# #### Sad Path
+@pytest.mark.parametrize(('headers', 'columns'),
+                         [
+                             (['a'], [1, 2]),
+                             (['a'], [0b1000]),
+                             (['a'], [-1]),
+                             (['a'], ['1'])
+                         ], ids=['headers-and-columns-mismatch', 'bits-beyond-rows', 'negative', 'not-an-int']
+                         )
+def test_wrong_columns(headers, columns):
+    with pytest.raises(ValueError):
+        PresenceMatrix(['x', 'y', 'z'], headers, columns)
+
+
+@pytest.mark.parametrize(('indptr', 'indices'),
+                         [
+                             ([0, 1], [0]),
+                             ([1, 1, 2, 2], [0, 1]),
+                             ([0, 1, 2, 3], [0, 1]),
+                             ([0, 1, 1, 2], [0, 2])
+                         ], ids=['short-indptr', 'indptr-not-from-zero', 'indptr-past-indices', 'column-out-of-range']
+                         )
+def test_wrong_sparse_arrays(indptr, indices):
+    with pytest.raises(ValueError):
+        SparseMatrix(['x', 'y', 'z'], ['a', 'b'], array('q', indptr), array('q', indices))
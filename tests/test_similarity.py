@@ -0,0 +1,86 @@
+"""
+Tests for the pairwise file similarity
+"""
+
+import pytest
+
+from yamalahurry.yamala.converters import documents_to_matrix
+from yamalahurry.yamala import similarity
+from yamalahurry.yamala.similarity import add_similarity_sheet, file_bitsets, similarity_matrix
+import random
+from yamalahurry.yamala.writer import OpenxlpyWriter
+
+_FILES = [
+    ('a.yaml', [{'users': ['charmander', 'squirtle'], 'ports': [80, 443]}]),
+    ('b.yaml', [{'users': ['squirtle'], 'ports': [80]}]),
+    ('c.yaml', [{'users': ['pikachu']}]),
+    ('d.yaml', [{'name': 'no lists'}])
+]
+
+
+# #### Happy Path
+@pytest.mark.parametrize('layout', ['dense', 'bitset', 'sparse'], ids=['dense', 'bitset', 'sparse'])
+def test_file_bitsets(layout):
+    headers, bitsets = file_bitsets(documents_to_matrix(_FILES, layout=layout))
+    assert headers == ['a.yaml', 'b.yaml', 'c.yaml', 'd.yaml']
+    #users rows take the first byte, ports rows the second one
+    assert bitsets == [0b11 | 0b11 << 8, 0b10 | 0b01 << 8, 0b100, 0]
+
+
+@pytest.mark.parametrize(('metric', 'expected'),
+                         [
+                             (#Test 1
+                                 'jaccard',
+                                 {
+                                     'a.yaml': [1.0, 0.5, 0.0, 0.0],
+                                     'b.yaml': [0.5, 1.0, 0.0, 0.0],
+                                     'c.yaml': [0.0, 0.0, 1.0, 0.0],
+                                     'd.yaml': [0.0, 0.0, 0.0, 1.0]
+                                 }
+                             ),
+                             (#Test 2
+                                 'overlap',
+                                 {
+                                     'a.yaml': [1.0, 1.0, 0.0, 0.0],
+                                     'b.yaml': [1.0, 1.0, 0.0, 0.0],
+                                     'c.yaml': [0.0, 0.0, 1.0, 0.0],
+                                     'd.yaml': [0.0, 0.0, 0.0, 1.0]
+                                 }
+                             )
+                         ], ids=['jaccard', 'overlap']
+                         )
+def test_similarity_matrix(metric, expected):
+    sheet = similarity_matrix(documents_to_matrix(_FILES, layout='bitset'), metric)
+    assert sheet == {'rows': ['a.yaml', 'b.yaml', 'c.yaml', 'd.yaml'], 'columns': expected}
+
+
+def test_dense_and_sparse_counting_agree(monkeypatch):
+    generator = random.Random(7)
+    files = [
+        ('f{}.yaml'.format(index), [{'items': generator.sample(range(60), generator.randint(0, 12))}])
+        for index in range(40)
+    ]
+    sheets = documents_to_matrix(files, layout='bitset')
+    monkeypatch.setattr(similarity, '_COUNTER_COST', 0)
+    sparse = similarity_matrix(sheets, 'overlap')
+    monkeypatch.setattr(similarity, '_COUNTER_COST', 10 ** 9)
+    assert similarity_matrix(sheets, 'overlap') == sparse
+
+
+def test_add_similarity_sheet(tmp_path):
+    files = [('a.yaml', [{'similarity': [1, 2]}]), ('b.yaml', [{'similarity': [2, 3]}])]
+    sheets = documents_to_matrix(files, layout='bitset')
+    result = add_similarity_sheet(sheets)
+    assert list(result) == ['similarity', 'similarity_1']
+    assert result['similarity_1']['columns']['a.yaml'] == [1.0, 0.3333]
+    assert list(sheets) == ['similarity']
+
+    writer = OpenxlpyWriter(tmp_path)
+    writer.process(result)
+    assert writer.workbook['similarity_1']['C2'].value == 0.3333
+
+
+# #### Sad Path
+def test_unknown_metric():
+    with pytest.raises(ValueError):
+        similarity_matrix(documents_to_matrix(_FILES), 'cosine')
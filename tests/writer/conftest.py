@@ -0,0 +1,12 @@
+"""
+Fixtures shared by the writer tests
+"""
+
+import pytest
+
+
+@pytest.fixture
+def make_folder(tmp_path):
+    folder = tmp_path / 'tests'
+    folder.mkdir()
+    return folder
@@ -0,0 +1,85 @@
+"""
+Sheets shared by the writer tests, and the cells OpenxlpyWriter writes for them
+"""
+from typing import Dict
+
+INPUT_ONE: Dict = {
+                    'types':{
+                        'rows':['squirtle', 'charmander', 'bulbasur', 'pikachu'],
+                        'columns':{
+                            'grass':[0, 0, 1, 0],
+                            'water':[1, 0, 0, 0],
+                            'fire':[0, 1, 0, 0],
+                            'electric':[0, 0, 0, 1],
+                            'iron':[0, 0, 0, 0]
+                        }
+                    }
+}
+OUTPUT_ONE: Dict = {
+                    'types':[
+                        [2, 'A', 'squirtle'],
+                        [3, 'A', 'charmander'],
+                        [4, 'A', 'bulbasur'],
+                        [5, 'A', 'pikachu'],
+                        [1, 'B', 'grass'],
+                        [1, 'C', 'water'],
+                        [1, 'D', 'fire'],
+                        [1, 'E', 'electric'],
+                        [1, 'F', 'iron'],
+                        [2, 'B', 0],
+                        [3, 'B', 0],
+                        [4, 'B', 1],
+                        [5, 'B', 0],
+                        [2, 'C', 1],
+                        [3, 'C', 0],
+                        [4, 'C', 0],
+                        [5, 'C', 0],
+                        [2, 'D', 0],
+                        [3, 'D', 1],
+                        [4, 'D', 0],
+                        [5, 'D', 0],
+                        [2, 'E', 0],
+                        [3, 'E', 0],
+                        [4, 'E', 0],
+                        [5, 'E', 1],
+                        [2, 'F', 0],
+                        [3, 'F', 0],
+                        [4, 'F', 0],
+                        [5, 'F', 0],
+                    ]
+}
+INPUT_TWO: Dict = {
+                    'attacks':{
+                        'rows': ['fire', 'electric', 'normal'],
+                        'columns': {
+                            'ember':[1, 0, 0],
+                            'spark':[0, 1, 0],
+                            'calm mind':[0, 0, 0]
+                        }
+                    }
+}
+OUTPUT_TWO: Dict = {
+                        'attacks': [
+                            [2, 'A', 'fire'],
+                            [3, 'A', 'electric'],
+                            [4, 'A', 'normal'],
+                            [1, 'B', 'ember'],
+                            [1, 'C', 'spark'],
+                            [1, 'D', 'calm mind'],
+                            [2, 'B', 1],
+                            [3, 'B', 0],
+                            [4, 'B', 0],
+                            [2, 'C', 0],
+                            [3, 'C', 1],
+                            [4, 'C', 0],
+                            [2, 'D', 0],
+                            [3, 'D', 0],
+                            [4, 'D', 0]
+                        ]
+}
+
+CONSOLIDATED_INPUT: Dict = INPUT_ONE.copy()
+CONSOLIDATED_INPUT.update(INPUT_TWO)
+
+CONSOLIDATED_OUTPUT: Dict = OUTPUT_ONE.copy()
+CONSOLIDATED_OUTPUT.update(OUTPUT_TWO)
@@ -0,0 +1,85 @@
+"""
+Test file for the csv and tsv writers
+"""
+import pytest
+
+import csv
+
+from yamalahurry.yamala.matrix import PresenceMatrix, SparseMatrix
+from yamalahurry.yamala.writer import CsvWriter, TsvWriter, WrongInputStructure
+from yamalahurry.tests.writer.samples import CONSOLIDATED_INPUT, INPUT_ONE
+
+
+def _read(path, delimiter):
+    with open(path, newline='', encoding='utf-8') as stream:
+        return list(csv.reader(stream, delimiter=delimiter))
+
+
+def _expected(sheet):
+    rows = [[''] + list(sheet['columns'])]
+    for position, label in enumerate(sheet['rows']):
+        rows.append([str(label)] + [str(values[position]) for values in sheet['columns'].values()])
+
+    return rows
+
+
+# #### Happy Path
+@pytest.mark.parametrize(
+    'layout',
+    [dict, PresenceMatrix.from_dict, SparseMatrix.from_dict],
+    ids=['dict', 'presence-matrix', 'sparse-matrix']
+)
+@pytest.mark.parametrize(('writer_class', 'delimiter'), [(CsvWriter, ','), (TsvWriter, '\t')], ids=['csv', 'tsv'])
+def test_one_file_per_sheet(make_folder, layout, writer_class, delimiter):
+    writer = writer_class(make_folder)
+    writer.process({name: layout(sheet) for name, sheet in CONSOLIDATED_INPUT.items()})
+    writer.save('report')
+    for name, sheet in CONSOLIDATED_INPUT.items():
+        path = make_folder / 'report_{}{}'.format(name, writer_class.extension)
+        #Zeros of sparse matrices are written too
+        assert _read(path, delimiter) == _expected(sheet)
+
+
+def test_bundle(make_folder):
+    writer = CsvWriter(make_folder, bundle=True)
+    writer.process(CONSOLIDATED_INPUT)
+    writer.save('re:port')
+    assert sorted(path.name for path in (make_folder / 're_port').iterdir()) == sorted(
+        name + '.csv' for name in CONSOLIDATED_INPUT
+    )
+    #Saving again overwrites the bundle
+    writer.save('re:port')
+
+
+def test_file_names(make_folder):
+    writer = CsvWriter(make_folder)
+    writer.process({
+        'Types': INPUT_ONE['types'],
+        'types': INPUT_ONE['types'],
+        'services.web|ports/<tcp>': INPUT_ONE['types']
+    })
+    writer.save('na*me')
+    assert sorted(path.name for path in make_folder.iterdir()) == [
+        'na_me_services.web_ports__tcp_.csv', 'na_me_types.csv', 'na_me_types_1.csv'
+    ]
+
+
+def test_quoted_values(make_folder):
+    labels = ['a, b', 'say "hi"', 'multi\nline']
+    writer = CsvWriter(make_folder)
+    writer.process({'quotes': {'rows': labels, 'columns': {'a.yaml': [1, 0, 1]}}})
+    writer.save('quotes')
+    assert [row[0] for row in _read(make_folder / 'quotes_quotes.csv', ',')][1:] == labels
+
+
+# #### Sad Path
+@pytest.mark.parametrize(
+    'inputs',
+    [{}, [{}, {}], {'sheet1': {'rows': [1], 'columns': {'a': [1, 0]}}}],
+    ids=['empty', 'list', 'wrong-length']
+)
+def test_wrong_input(make_folder, inputs):
+    with pytest.raises(WrongInputStructure) as exp:
+        CsvWriter(make_folder).process(inputs)
+
+    assert exp.value.args[0] == CsvWriter.process.__doc__
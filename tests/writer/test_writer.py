@@ -3,99 +3,14 @@ Test file for the Writer Classes
 """
 import pytest
 
+from openpyxl import load_workbook
 from openpyxl.worksheet.worksheet import Worksheet
 from pathlib import Path
-from typing import Dict, List
+from typing import List
 
+from yamalahurry.yamala.matrix import PresenceMatrix, SparseMatrix
 from yamalahurry.yamala.writer import OpenxlpyWriter, WrongInputStructure
-
-_INPUT_ONE: Dict = {
-                    'types':{
-                        'rows':['squirtle', 'charmander', 'bulbasur', 'pikachu'],
-                        'columns':{
-                            'grass':[0, 0, 1, 0],
-                            'water':[1, 0, 0, 0],
-                            'fire':[0, 1, 0, 0],
-                            'electric':[0, 0, 0, 1],
-                            'iron':[0, 0, 0, 0]
-                        }
-                    }
-}
-_OUTPUT_ONE: Dict = {
-                    'types':[
-                        [2, 'A', 'squirtle'],
-                        [3, 'A', 'charmander'],
-                        [4, 'A', 'bulbasur'],
-                        [5, 'A', 'pikachu'],
-                        [1, 'B', 'grass'],
-                        [1, 'C', 'water'],
-                        [1, 'D', 'fire'],
-                        [1, 'E', 'electric'],
-                        [1, 'F', 'iron'],
-                        [2, 'B', 0],
-                        [3, 'B', 0],
-                        [4, 'B', 1],
-                        [5, 'B', 0],
-                        [2, 'C', 1],
-                        [3, 'C', 0],
-                        [4, 'C', 0],
-                        [5, 'C', 0],
-                        [2, 'D', 0],
-                        [3, 'D', 1],
-                        [4, 'D', 0],
-                        [5, 'D', 0],
-                        [2, 'E', 0],
-                        [3, 'E', 0],
-                        [4, 'E', 0],
-                        [5, 'E', 1],
-                        [2, 'F', 0],
-                        [3, 'F', 0],
-                        [4, 'F', 0],
-                        [5, 'F', 0],
-                    ]
-}
-_INPUT_TWO: Dict = {
-                    'attacks':{
-                        'rows': ['fire', 'electric', 'normal'],
-                        'columns': {
-                            'ember':[1, 0, 0],
-                            'spark':[0, 1, 0],
-                            'calm mind':[0, 0, 0]
-                        }
-                    }
-}
-_OUTPUT_TWO: Dict = {
-                        'attacks': [
-                            [2, 'A', 'fire'],
-                            [3, 'A', 'electric'],
-                            [4, 'A', 'normal'],
-                            [1, 'B', 'ember'],
-                            [1, 'C', 'spark'],
-                            [1, 'D', 'calm mind'],
-                            [2, 'B', 1],
-                            [3, 'B', 0],
-                            [4, 'B', 0],
-                            [2, 'C', 0],
-                            [3, 'C', 1],
-                            [4, 'C', 0],
-                            [2, 'D', 0],
-                            [3, 'D', 0],
-                            [4, 'D', 0]
-                        ]
-}
-
-_CONSOLIDATED_INPUT: Dict = _INPUT_ONE.copy()
-_CONSOLIDATED_INPUT.update(_INPUT_TWO)
-
-_CONSOLIDATED_OUTPUT: Dict = _OUTPUT_ONE.copy()
-_CONSOLIDATED_OUTPUT.update(_OUTPUT_TWO)
-
-
-@pytest.fixture
-def make_folder(tmp_path):
-    folder = tmp_path / 'tests'
-    folder.mkdir()
-    return folder
+from yamalahurry.tests.writer.samples import CONSOLIDATED_INPUT, CONSOLIDATED_OUTPUT, INPUT_ONE, OUTPUT_ONE
 
 
 @pytest.fixture
@@ -390,12 +305,12 @@ def test_excel_sheet_creation(generate_writer, inputs, sheets_count, sheets_name
             }
         ),
         (#Test 2
-            _INPUT_ONE,
-            _OUTPUT_ONE
+            INPUT_ONE,
+            OUTPUT_ONE
         ),
         (#Test 3
-            _CONSOLIDATED_INPUT,
-            _CONSOLIDATED_OUTPUT
+            CONSOLIDATED_INPUT,
+            CONSOLIDATED_OUTPUT
         )
     ], ids=[
         'one-sheet-one-row-one-col-1',
@@ -567,6 +482,102 @@ def test_excel_save(generate_writer, inputs, expected):
     assert '.xlsx' == (generate_writer.folderpath / final_file).suffix
 
 
+def test_presence_matrix_input(generate_writer, make_folder):
+    """
+    A PresenceMatrix sheet must produce the same cells as its dict counterpart
+    """
+    generate_writer.process({name: PresenceMatrix.from_dict(sheet) for name, sheet in CONSOLIDATED_INPUT.items()})
+    reference = OpenxlpyWriter(make_folder)
+    reference.process(CONSOLIDATED_INPUT)
+    assert generate_writer.workbook.sheetnames == reference.workbook.sheetnames
+    for name in reference.workbook.sheetnames:
+        expected = [[cell.value for cell in row] for row in reference.workbook[name].iter_rows()]
+        assert [[cell.value for cell in row] for row in generate_writer.workbook[name].iter_rows()] == expected
+
+
+def test_sparse_matrix_input(generate_writer):
+    """
+    Only the ones of a SparseMatrix are written, and blank cells are still covered
+    by the conditional formatting
+    """
+    generate_writer.process({'types': SparseMatrix.from_dict(INPUT_ONE['types'])})
+    ws: Worksheet = generate_writer.workbook['types']
+    formatted: List = [c for cf in ws.conditional_formatting._cf_rules for c in cf.cells.ranges]
+    assert [c.coord for c in formatted] == ['B2:F5']
+    for row, column, value in OUTPUT_ONE['types']:
+        cell = ws[column + str(row)]
+        if value == 0:
+            assert cell.value is None
+
+        else:
+            assert cell.value == value
+            if row == 1 or column == 'A':
+                assert cell.font.bold
+
+
+@pytest.mark.parametrize(
+    'layout',
+    [dict, PresenceMatrix.from_dict, SparseMatrix.from_dict],
+    ids=['dict', 'presence-matrix', 'sparse-matrix']
+)
+def test_write_only_output(make_folder, layout):
+    """
+    A write-only workbook must store the same values, header styles, column widths and
+    conditional formatting as a regular one
+    """
+    inputs = {name: layout(sheet) for name, sheet in CONSOLIDATED_INPUT.items()}
+    streamed = OpenxlpyWriter(make_folder, write_only=True)
+    streamed.process(inputs)
+    streamed.save('streamed')
+    reference = OpenxlpyWriter(make_folder)
+    reference.process(inputs)
+    reference.save('reference')
+
+    streamed_book = load_workbook(make_folder / 'streamed.xlsx')
+    reference_book = load_workbook(make_folder / 'reference.xlsx')
+    assert streamed_book.sheetnames == reference_book.sheetnames
+    for name in reference_book.sheetnames:
+        ws: Worksheet = streamed_book[name]
+        expected: Worksheet = reference_book[name]
+        assert ws.max_row == expected.max_row and ws.max_column == expected.max_column
+        for row, expected_row in zip(ws.iter_rows(), expected.iter_rows()):
+            for cell, expected_cell in zip(row, expected_row):
+                assert cell.value == expected_cell.value
+                assert cell.font.bold == expected_cell.font.bold
+                assert cell.alignment.horizontal == expected_cell.alignment.horizontal
+                assert cell.fill.start_color.rgb == expected_cell.fill.start_color.rgb
+
+        assert [
+            (str(cf.sqref), [rule.formula for rule in cf.rules]) for cf in ws.conditional_formatting
+        ] == [
+            (str(cf.sqref), [rule.formula for rule in cf.rules]) for cf in expected.conditional_formatting
+        ]
+        for letter, dimension in expected.column_dimensions.items():
+            assert ws.column_dimensions[letter].width == dimension.width
+            assert ws.column_dimensions[letter].bestFit
+
+
+def test_named_header_styles(generate_writer):
+    """
+    Header styles are registered once per workbook, and columns are sized to their
+    longest label
+    """
+    generate_writer.process(CONSOLIDATED_INPUT)
+    style = generate_writer._style
+    named = generate_writer.workbook.named_styles
+    assert named.count(style.column_header_name) == 1 and named.count(style.row_header_name) == 1
+    for name, sheet in CONSOLIDATED_INPUT.items():
+        ws: Worksheet = generate_writer.workbook[name]
+        assert ws['A1'].style == style.row_header_name
+        assert ws['B1'].style == style.column_header_name
+        assert ws['A2'].style == style.row_header_name
+        assert ws['B2'].style == 'Normal'
+        longest = max(len(str(label)) for label in sheet['rows'])
+        assert ws.column_dimensions['A'].width == longest * style.pixels_per_letter
+        for letter, header in zip('BCDEFGHIJ', sheet['columns']):
+            assert ws.column_dimensions[letter].width == len(header) * style.pixels_per_letter
+
+
 # ### Sad path
 @pytest.mark.parametrize(
     ('inputs', 'expected'),
@@ -812,6 +823,6 @@ def test_full_flow():
     """
     target_folder: str = '/home/xavi/Documents/Pynotes/yamalaHarris/yamalahurry/yamala/output'
     writer = OpenxlpyWriter(target_folder)
-    writer.process(_CONSOLIDATED_INPUT)
+    writer.process(CONSOLIDATED_INPUT)
     writer.save('test_10.xlsx')
     assert True
@@ -0,0 +1,170 @@
+"""
+Test file for the direct xlsx serializer
+"""
+import pytest
+
+from datetime import date, datetime
+from openpyxl import load_workbook
+from openpyxl.worksheet.worksheet import Worksheet
+import csv
+import shutil
+import struct
+import subprocess
+import zipfile
+
+from yamalahurry.yamala.matrix import PresenceMatrix, SparseMatrix
+from yamalahurry.yamala.writer import OpenxlpyWriter, WrongInputStructure, XlsxStreamWriter
+from yamalahurry.tests.writer.samples import CONSOLIDATED_INPUT, INPUT_ONE
+
+
+# #### Happy Path
+@pytest.mark.parametrize(
+    'layout',
+    [dict, PresenceMatrix.from_dict, SparseMatrix.from_dict],
+    ids=['dict', 'presence-matrix', 'sparse-matrix']
+)
+def test_same_workbook_as_openpyxl(make_folder, layout):
+    """
+    Values, header styles, column widths and conditional formatting must round-trip
+    through openpyxl as those of OpenxlpyWriter
+    """
+    inputs = {name: layout(sheet) for name, sheet in CONSOLIDATED_INPUT.items()}
+    streamed = XlsxStreamWriter(make_folder)
+    streamed.process(inputs)
+    streamed.save('streamed')
+    reference = OpenxlpyWriter(make_folder)
+    reference.process(inputs)
+    reference.save('reference')
+
+    streamed_book = load_workbook(make_folder / 'streamed.xlsx')
+    reference_book = load_workbook(make_folder / 'reference.xlsx')
+    assert streamed_book.sheetnames == reference_book.sheetnames
+    for name in reference_book.sheetnames:
+        ws: Worksheet = streamed_book[name]
+        expected: Worksheet = reference_book[name]
+        assert ws.max_row == expected.max_row and ws.max_column == expected.max_column
+        for row, expected_row in zip(ws.iter_rows(), expected.iter_rows()):
+            for cell, expected_cell in zip(row, expected_row):
+                assert cell.value == expected_cell.value
+                assert cell.style == expected_cell.style
+                assert cell.font.bold == expected_cell.font.bold
+                assert cell.alignment.horizontal == expected_cell.alignment.horizontal
+                assert cell.fill.start_color.rgb == expected_cell.fill.start_color.rgb
+
+        assert [
+            (str(cf.sqref), [(rule.operator, rule.formula, rule.dxf.fill.fgColor.rgb) for rule in cf.rules])
+            for cf in ws.conditional_formatting
+        ] == [
+            (str(cf.sqref), [(rule.operator, rule.formula, rule.dxf.fill.fgColor.rgb) for rule in cf.rules])
+            for cf in expected.conditional_formatting
+        ]
+        for letter, dimension in expected.column_dimensions.items():
+            assert ws.column_dimensions[letter].width == dimension.width
+
+
+def test_shared_strings(make_folder):
+    """
+    Repeated labels and headers are stored once, and text that XML cannot hold as is
+    is escaped
+    """
+    writer = XlsxStreamWriter(make_folder)
+    writer.process({
+        'first': {'rows': ['<a & b>', ' padded '], 'columns': {'pikachu': [1, 0]}},
+        'second': {'rows': ['<a & b>', 'line\x0bbreak'], 'columns': {'pikachu': [0, 1], 'bulbasur': [1, 1]}}
+    })
+    writer.save('strings')
+    with zipfile.ZipFile(make_folder / 'strings.xlsx') as archive:
+        shared = archive.read('xl/sharedStrings.xml').decode('utf-8')
+
+    assert 'uniqueCount="5"' in shared
+    assert '&lt;a &amp; b&gt;' in shared and 'line_x000B_break' in shared
+    workbook = load_workbook(make_folder / 'strings.xlsx')
+    assert [cell.value for cell in workbook['first']['A']] == [None, '<a & b>', ' padded ']
+    assert [cell.value for cell in workbook['second'][1]] == [None, 'pikachu', 'bulbasur']
+
+
+def test_label_types(make_folder):
+    labels = [80, 1.5, True, date(2020, 1, 2), datetime(2020, 1, 2, 3, 4), 'text']
+    writer = XlsxStreamWriter(make_folder)
+    writer.process({'ports': {'rows': labels, 'columns': {'a.yaml': [1, 0, 1, 0, 1, 0]}}})
+    writer.save('types')
+    ws: Worksheet = load_workbook(make_folder / 'types.xlsx')['ports']
+    cells = [cell for cell in ws['A']][1:]
+    assert [cell.value for cell in cells] == [
+        80, 1.5, True, datetime(2020, 1, 2), datetime(2020, 1, 2, 3, 4), 'text'
+    ]
+    assert all(cell.font.bold for cell in cells)
+    assert cells[3].is_date and cells[4].is_date
+
+
+def test_sheet_names(make_folder):
+    writer = XlsxStreamWriter(make_folder)
+    writer.process({
+        'Types': INPUT_ONE['types'],
+        'types': INPUT_ONE['types'],
+        'a/very:long?name[that]exceeds*thirty-one characters': INPUT_ONE['types']
+    })
+    writer.save('na:me')
+    workbook = load_workbook(make_folder / 'na_me.xlsx')
+    assert workbook.sheetnames == ['types', 'types_1', 't_exceeds_thirty-one characters']
+
+
+def test_headers_only(make_folder):
+    writer = XlsxStreamWriter(make_folder)
+    writer.process({'empty': {'rows': [], 'columns': {'a.yaml': [], 'b.yaml': []}}})
+    writer.save('empty')
+    ws: Worksheet = load_workbook(make_folder / 'empty.xlsx')['empty']
+    assert [[cell.value for cell in row] for row in ws.iter_rows()] == [[None, 'a.yaml', 'b.yaml']]
+    assert not list(ws.conditional_formatting)
+
+
+def test_no_zip64_headers(make_folder):
+    """
+    Local headers and central directory entries must agree, else Excel offers to
+    repair the file: small members have no zip64 header in either
+    """
+    writer = XlsxStreamWriter(make_folder)
+    writer.process(CONSOLIDATED_INPUT)
+    writer.save('headers')
+    with open(make_folder / 'headers.xlsx', 'rb') as f, zipfile.ZipFile(f) as archive:
+        for info in archive.infolist():
+            f.seek(info.header_offset)
+            _, version, _, _, _, _, _, compressed, size = struct.unpack('<4sHHHHHIII', f.read(26))
+            assert version < zipfile.ZIP64_VERSION and info.extract_version < zipfile.ZIP64_VERSION
+            assert (compressed, size) == (info.compress_size, info.file_size)
+
+
+@pytest.mark.skipif(shutil.which('soffice') is None, reason='LibreOffice is not installed')
+def test_opens_in_libreoffice(make_folder):
+    writer = XlsxStreamWriter(make_folder)
+    writer.process({'types': INPUT_ONE['types']})
+    writer.save('office')
+    subprocess.run(
+        [
+            'soffice', '--headless', '-env:UserInstallation=file://{}'.format(make_folder / 'profile'),
+            '--convert-to', 'csv', '--outdir', str(make_folder / 'converted'), str(make_folder / 'office.xlsx')
+        ],
+        check=True, capture_output=True, timeout=120
+    )
+    with open(make_folder / 'converted' / 'office.csv', newline='') as f:
+        converted = list(csv.reader(f))
+
+    sheet = INPUT_ONE['types']
+    assert converted[0] == [''] + list(sheet['columns'])
+    assert converted[1:] == [
+        [label] + [str(values[index]) for values in sheet['columns'].values()]
+        for index, label in enumerate(sheet['rows'])
+    ]
+
+
+# #### Sad Path
+@pytest.mark.parametrize(
+    'inputs',
+    [{}, [{}, {}], {'sheet1': {'rows': [1], 'columns': {'a': [1, 0]}}}],
+    ids=['empty', 'list', 'wrong-length']
+)
+def test_wrong_input(make_folder, inputs):
+    with pytest.raises(WrongInputStructure) as exp:
+        XlsxStreamWriter(make_folder).process(inputs)
+
+    assert exp.value.args[0] == XlsxStreamWriter.process.__doc__
@@ -1 +1,4 @@
 from .converters import *
+from .matrix import *
+from .similarity import *
+from .clustering import *
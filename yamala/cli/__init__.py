@@ -1 +1 @@
-from .parser import get_parser
\ No newline at end of file
+from .parser import get_parser, main
\ No newline at end of file
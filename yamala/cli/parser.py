@@ -2,8 +2,40 @@
 Entrypoint for the client application
 """
 
-from argparse import ArgumentParser, Namespace
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
 from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Union
+
+from ..clustering import add_cluster_sheet, cluster_near_duplicates
+from ..converters import DUPLICATE_MODES, MatrixAccumulator, accumulate_files, keep_differences
+from ..similarity import METRICS, add_similarity_sheet
+from ..reader import AbstractReader, CachedReader, discover_files, get_reader, load_archives
+from ..writer import AbstractWriter, CsvWriter, OpenxlpyWriter, TsvWriter, XlsxStreamWriter
+
+#Writer of every output format, given the destination folder and the bundle flag
+WRITERS: Dict[str, Callable[[Path, bool], AbstractWriter]] = {
+    #Rows are streamed to disk, so the workbook never holds every cell at once
+    'xlsx': lambda folder, bundle: OpenxlpyWriter(folder, write_only=True),
+    'xlsx-direct': lambda folder, bundle: XlsxStreamWriter(folder),
+    'csv': CsvWriter,
+    'tsv': TsvWriter
+}
+
+
+def _non_negative_int(value: str) -> int:
+    number: int = int(value)
+    if number < 0:
+        raise ArgumentTypeError('{} is not a non-negative integer'.format(value))
+
+    return number
+
+
+def _threshold(value: str) -> float:
+    number: float = float(value)
+    if not 0 < number <= 1:
+        raise ArgumentTypeError('{} is not greater than 0 and at most 1'.format(value))
+
+    return number
 
 
 def get_parser() -> ArgumentParser:
@@ -16,9 +48,73 @@ def get_parser() -> ArgumentParser:
                                             epilog='Thank you for using Yamala Hurry!',
                                             prog='yamala'
                                           )
-    subparser = parse.add_subparsers(title='subcommands', description='Available subcommands')
+    subparser = parse.add_subparsers(title='subcommands', description='Available subcommands', dest='command')
 
-    parser_files = subparser.add_parser('read-files', help='Subcommand to process one file or a list of them')
+    #Options shared by every subcommand
+    common: ArgumentParser = ArgumentParser(add_help=False)
+    common.add_argument(
+                            '-j', '--jobs', dest='jobs', default=1, type=_non_negative_int,
+                            help='Number of worker processes used to parse the files. 0 uses one per available'
+                                 ' core. It defaults to 1 (no parallelism).'
+                       )
+    common.add_argument(
+                            '-n', '--name', dest='name', default='yamala',
+                            help='Name of the output file, without extension. It defaults to yamala.'
+                       )
+    common.add_argument(
+                            '-f', '--format', dest='output_format', default='xlsx', choices=list(WRITERS),
+                            help='Format of the output: an Excel workbook built with openpyxl (xlsx) or serialized'
+                                 ' directly (xlsx-direct, faster for very large comparisons), or one comma or tab'
+                                 ' separated file per sheet (csv, tsv). It defaults to xlsx.'
+                       )
+    common.add_argument(
+                            '--bundle', dest='bundle', default=False, action='store_true',
+                            help='If the flag is raised along with a csv or tsv format, the files of the sheets are'
+                                 ' stored in a folder named after --name, instead of being prefixed with it.'
+                                 ' It defaults to False.'
+                       )
+    common.add_argument(
+                            '--differences', dest='differences', default=False, action='store_true',
+                            help='If the flag is raised, only the list items present in some files but not in'
+                                 ' all of them are stored. It defaults to False.'
+                       )
+    common.add_argument(
+                            '--drop-unchanged', dest='drop_unchanged', default=False, action='store_true',
+                            help='If the flag is raised along with --differences, attributes without differences'
+                                 ' get no sheet. It defaults to False.'
+                       )
+    common.add_argument(
+                            '--similarity', dest='similarity', default=None, choices=METRICS,
+                            help='Add a sheet with the similarity of every pair of files, measured over all their'
+                                 ' list items. It defaults to no similarity sheet.'
+                       )
+    common.add_argument(
+                            '--near-duplicates', dest='near_duplicates', default=None, type=_threshold,
+                            metavar='THRESHOLD',
+                            help='Group the files whose estimated jaccard similarity reaches THRESHOLD (between 0'
+                                 ' and 1), keep one column per group and add a sheet telling the group of every'
+                                 ' file. Groups are found with MinHash and LSH, so it scales to very large sets of'
+                                 ' files. It defaults to no grouping.'
+                       )
+
+    #Options of the subcommands reading plain files
+    on_disk: ArgumentParser = ArgumentParser(add_help=False)
+    on_disk.add_argument(
+                            '--duplicates', dest='duplicates', default='parse', choices=DUPLICATE_MODES,
+                            help='What to do with files of identical content: parse every one of them, parse the'
+                                 ' first one and reference it from the others, or collapse them into one column'
+                                 ' headed by all their names. It defaults to parse.'
+                        )
+    on_disk.add_argument(
+                            '--cache-dir', dest='cache_dir', default=None, type=Path,
+                            help='Folder in which parsed files are cached between runs, so that unchanged files'
+                                 ' are not parsed again. It defaults to no caching.'
+                        )
+
+    parser_files = subparser.add_parser(
+                                            'read-files', parents=[common, on_disk],
+                                            help='Subcommand to process one file or a list of them'
+                                        )
     parser_files.add_argument(
                                 'files', nargs='+',
                                 help='Space-separated list containing file paths with yaml extension.'
@@ -30,7 +126,7 @@ def get_parser() -> ArgumentParser:
                               )
 
     parser_folder = subparser.add_parser(
-                                            name='read-folders',
+                                            name='read-folders', parents=[common, on_disk],
                                             help='Subcommand to process one folder or a list of them'
                                          )
     parser_folder.add_argument(
@@ -48,10 +144,81 @@ def get_parser() -> ArgumentParser:
                                      ' folders. It defaults to False.'
                                )
 
+    parser_archives = subparser.add_parser(
+                                            name='read-archives', parents=[common],
+                                            help='Subcommand to process the yaml files inside zip or tar archives'
+                                           )
+    parser_archives.add_argument(
+                                'files', nargs='+', metavar='archives',
+                                help='Space-separated list containing .zip, .tar, .tar.gz, .tar.bz2 or .tar.xz'
+                                     ' archive paths. Member names identify the files in the output.'
+                                )
+    parser_archives.add_argument(
+                                '-d', '--destination', dest='destination', default=Path.cwd(), type=Path,
+                                help='Folder path in which the output will be stored. It defaults to the current'
+                                     ' working directory.'
+                                )
+
     return parse
 
 
+def main(argv: Union[None, List[str]] = None) -> None:
+    """
+    Read the yaml files, compare their list-like attributes and store the result
+    """
+    parser: ArgumentParser = get_parser()
+    namespace: Namespace = parser.parse_args(argv)
+    if namespace.command is None:
+        parser.print_help()
+        parser.exit(2)
+
+    accumulator: MatrixAccumulator = _convert(namespace)
+    clusters: Union[None, Dict] = None
+    if namespace.near_duplicates is not None:
+        clusters = cluster_near_duplicates(accumulator, namespace.near_duplicates)
+
+    sheets: Dict = accumulator.finalize()
+    if not sheets:
+        parser.exit(1, 'No list-like attributes were found in the supplied files\n')
+
+    measured: Dict = sheets
+    if namespace.differences:
+        sheets = keep_differences(sheets, drop_unchanged=namespace.drop_unchanged)
+        if not sheets:
+            parser.exit(1, 'No differences were found between the supplied files\n')
+
+    if namespace.similarity is not None:
+        #Measured over every item, including the ones --differences removed
+        sheets = add_similarity_sheet(sheets, namespace.similarity, measured)
+
+    if clusters is not None:
+        sheets = add_cluster_sheet(sheets, clusters)
+
+    writer: AbstractWriter = WRITERS[namespace.output_format](namespace.destination, namespace.bundle)
+    writer.process(sheets)
+    writer.save(namespace.name)
+
+
+def _convert(namespace: Namespace) -> MatrixAccumulator:
+    reader: AbstractReader = get_reader()
+    if namespace.command == 'read-archives':
+        #Archive members are parsed from streams, so there is no file identity to cache on
+        accumulator: MatrixAccumulator = MatrixAccumulator(layout='bitset')
+        for member, documents in load_archives(namespace.files, reader, namespace.jobs):
+            accumulator.add(member, documents)
+
+        return accumulator
+
+    if namespace.cache_dir is not None:
+        reader = CachedReader(namespace.cache_dir, reader)
+
+    filepaths: Iterable = namespace.files
+    if namespace.command == 'read-folders':
+        filepaths = discover_files(namespace.files, recursive=namespace.recursive)
+
+    return accumulate_files(filepaths, reader, namespace.jobs, layout='bitset', duplicates=namespace.duplicates)
+
+
 if __name__ == '__main__':
 
-    parser: ArgumentParser = get_parser()
-    namespace: Namespace = parser.parse_args()
+    main()
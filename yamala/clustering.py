@@ -0,0 +1,219 @@
+"""
+Near-duplicate clustering of very large file sets: MinHash signatures grouped by
+locality-sensitive hashing, so that files are never compared pair by pair
+"""
+from hashlib import blake2b
+from operator import eq
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from .converters import MatrixAccumulator, unique_name
+from .matrix import PresenceMatrix, SparseMatrix
+
+#Name of the sheet added by add_cluster_sheet
+CLUSTER_SHEET: str = 'clusters'
+#Slots of a signature; the error of an estimated similarity is about 1 / sqrt(PERMUTATIONS)
+PERMUTATIONS: int = 128
+#Smallest chance for two files at the threshold to share an LSH bucket
+RECALL: float = 0.95
+#Decimals kept in the cluster sheet
+PRECISION: int = 4
+#Item hashes are 64-bit, so every slot value is below it
+_EMPTY: int = 1 << 64
+
+
+def minhash_signatures(accumulator: MatrixAccumulator, permutations: int = PERMUTATIONS) -> List[List[int]]:
+    """
+    MinHash signature of every file of the accumulator, over the (sheet, item) pairs
+    it holds, so the share of equal slots of two signatures estimates their jaccard.
+
+    One-permutation hashing is used: every item is hashed once, its hash picks a slot
+    and the rest of it competes for the minimum of that slot. Empty slots borrow the
+    next filled one (rotation densification), which keeps the estimate unbiased for
+    small files. The cost is linear in the ones of the matrix, instead of ones *
+    permutations for classic MinHash.
+
+    Item hashes are stable across runs and processes (blake2b, not hash()). Files
+    without items share a signature, so they are alike, as in similarity_matrix.
+    """
+    keys: List[Tuple[type, Any]] = list(accumulator.labels.keys())
+    items: List[List[int]] = [[] for _ in accumulator.headers]
+    for name, rows, columns in accumulator.iter_hits():
+        #Every row is hashed once, whichever number of files hold it
+        hashes: List[int] = [_item_hash(name, keys[code]) for code in rows]
+        for held, hits in zip(items, columns):
+            held.extend(map(hashes.__getitem__, hits))
+
+    return [_signature(hashes, permutations) for hashes in items]
+
+
+def _item_hash(name: str, key: Tuple[type, Any]) -> int:
+    kind, label = key
+    text: str = '{}\x00{}\x00{!r}'.format(name, kind.__name__, label)
+    return int.from_bytes(blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'little')
+
+
+def _signature(hashes: Iterable[int], permutations: int) -> List[int]:
+    slots: List[int] = [_EMPTY] * permutations
+    for value in hashes:
+        rest, slot = divmod(value, permutations)
+        if rest < slots[slot]:
+            slots[slot] = rest
+
+    filled: List[bool] = [value != _EMPTY for value in slots]
+    if not any(filled):
+        return slots
+
+    #A borrowed value is shifted by its distance, past any value a slot can hold
+    shift: int = _EMPTY // permutations + 1
+    signature: List[int] = list(slots)
+    following: int = 0
+    distance: int = 0
+    #Walking backwards twice over the slots reaches the next filled one of each, wrapping around
+    for step in range(2 * permutations - 1, -1, -1):
+        slot: int = step % permutations
+        if filled[slot]:
+            following = slots[slot]
+            distance = 0
+
+        else:
+            distance += 1
+            if step < permutations:
+                signature[slot] = following + distance * shift
+
+    return signature
+
+
+def lsh_bands(threshold: float, permutations: int = PERMUTATIONS) -> int:
+    """
+    Fewest bands (hence the most rows per band, and the fewest false candidates) for
+    which two files whose similarity is threshold share a bucket with RECALL chance
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError('threshold must be greater than 0 and at most 1')
+
+    divisors: List[int] = [bands for bands in range(1, permutations + 1) if permutations % bands == 0]
+    for bands in divisors:
+        if 1 - (1 - threshold ** (permutations // bands)) ** bands >= RECALL:
+            return bands
+
+    return divisors[-1]
+
+
+def lsh_clusters(signatures: List[List[int]], threshold: float) -> List[int]:
+    """
+    Position of the representative of every file: the first file of its cluster.
+
+    The signatures are split into bands, and files sharing a whole band fall in the
+    same bucket. Within a bucket a file is only checked against the first file of
+    each cluster met there, and joins it when their estimated similarity reaches
+    threshold, so the cost grows with the files times the bands, not files^2.
+    Clusters are the connected components of those matches.
+    """
+    permutations: int = len(signatures[0]) if signatures else PERMUTATIONS
+    bands: int = lsh_bands(threshold, permutations)
+    width: int = permutations // bands
+    parents: List[int] = list(range(len(signatures)))
+    for band in range(bands):
+        start: int = band * width
+        buckets: Dict[Tuple[int, ...], List[int]] = {}
+        for position, signature in enumerate(signatures):
+            buckets.setdefault(tuple(signature[start:start + width]), []).append(position)
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+
+            leaders: List[int] = [members[0]]
+            for member in members[1:]:
+                root: int = _find(parents, member)
+                for leader in leaders:
+                    same: bool = _find(parents, leader) == root
+                    if same or estimate(signatures[leader], signatures[member]) >= threshold:
+                        _union(parents, leader, member)
+                        break
+
+                else:
+                    leaders.append(member)
+
+    return [_find(parents, position) for position in range(len(signatures))]
+
+
+def estimate(first: List[int], second: List[int]) -> float:
+    """
+    Estimated jaccard of two files from their signatures
+    """
+    return sum(map(eq, first, second)) / len(first)
+
+
+def _find(parents: List[int], position: int) -> int:
+    root: int = position
+    while parents[root] != root:
+        root = parents[root]
+
+    #Path compression
+    while parents[position] != root:
+        parents[position], position = root, parents[position]
+
+    return root
+
+
+def _union(parents: List[int], first: int, second: int) -> None:
+    #The smallest position is the root, so it is the representative
+    first, second = _find(parents, first), _find(parents, second)
+    if first < second:
+        parents[second] = first
+
+    elif second < first:
+        parents[first] = second
+
+
+def cluster_near_duplicates(
+        accumulator: MatrixAccumulator,
+        threshold: float = 0.8,
+        permutations: int = PERMUTATIONS
+) -> Dict[str, Union[List, Dict]]:
+    """
+    Group the files of the accumulator whose estimated jaccard reaches threshold, and
+    keep only the column of the first file of every cluster in the accumulator. The
+    returned cluster sheet tells, for every file, its representative and their
+    estimated similarity:
+
+        {
+            'rows': ['file1.yaml', 'file2.yaml', ...],
+            'columns': {
+                'representative': ['file1.yaml', 'file1.yaml', ...],
+                'similarity': [1.0, 0.9531, ...]
+            }
+        }
+
+    Clusters chain matches, so a file may be less similar to its representative than
+    threshold when it joined through another file.
+    """
+    headers: List[str] = list(accumulator.headers)
+    signatures: List[List[int]] = minhash_signatures(accumulator, permutations)
+    representatives: List[int] = lsh_clusters(signatures, threshold)
+    kept: List[int] = sorted(set(representatives))
+    accumulator.remap_columns([headers[position] for position in kept], kept)
+    return {
+        'rows': headers,
+        'columns': {
+            'representative': [headers[position] for position in representatives],
+            'similarity': [
+                round(estimate(signatures[position], signature), PRECISION)
+                for position, signature in zip(representatives, signatures)
+            ]
+        }
+    }
+
+
+def add_cluster_sheet(
+        sheets: Dict[str, Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]],
+        clusters: Dict[str, Union[List, Dict]]
+) -> Dict[str, Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]]:
+    """
+    Copy of sheets with the cluster sheet appended, renamed if an attribute already
+    took its name
+    """
+    result: Dict = dict(sheets)
+    result[unique_name(CLUSTER_SHEET, set(sheets))] = clusters
+    return result
@@ -1 +1,467 @@
-from .reader import AbstractReader, PyYamlReader
+"""
+Converters: turn parsed yaml documents into the structure the writers consume
+"""
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple, Union
+import json
+import os
+
+from .matrix import LabelTable, PresenceMatrix, SparseMatrix
+from .reader import AbstractReader, PathLikeObj, file_digest, get_reader, resolve_jobs
+
+#Sheet name given to documents that are themselves a list
+ROOT_ATTRIBUTE: str = 'root'
+#Shapes of the sheets returned by documents_to_matrix
+LAYOUTS: Tuple[str, ...] = ('dense', 'bitset', 'sparse')
+#How convert_files treats files with identical content
+DUPLICATE_MODES: Tuple[str, ...] = ('parse', 'reference', 'collapse')
+#Joins the names of identical files in a collapsed column header
+ALIAS_SEPARATOR: str = ', '
+
+
+def documents_to_matrix(
+        files: Iterable[Tuple[str, Iterable]],
+        layout: str = 'dense'
+) -> Dict[str, Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]]:
+    """
+    files holds (file identifier, documents) pairs, as yielded by load_files.
+
+    Every list-valued attribute becomes a sheet, named after its dotted key path.
+    Its rows are the union of the list items found in any file, in order of first
+    appearance, and each file gets a presence column (1 if the item is in its list):
+
+        {
+            'services.web.ports': {
+                'rows': [80, 443, ...],
+                'columns': {
+                    'file1.yaml': [1, 0, ...],
+                    'file2.yaml': ...
+                }
+            },
+            ...
+        }
+
+    Items are looked up in a hash index, so the cost is linear in the number of list
+    items read, plus filling the presence columns.
+
+    With layout='bitset' every sheet is a PresenceMatrix instead, which packs each
+    column into rows / 8 bytes, and with layout='sparse' a SparseMatrix, which only
+    stores the positions of the ones.
+    """
+    accumulator: MatrixAccumulator = MatrixAccumulator(layout)
+    for file_id, documents in files:
+        accumulator.add(file_id, documents)
+
+    return accumulator.finalize()
+
+
+def convert_files(
+        filepaths: Iterable[PathLikeObj],
+        reader: Union[None, AbstractReader] = None,
+        jobs: int = 1,
+        layout: str = 'dense',
+        duplicates: str = 'parse'
+) -> Dict[str, Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]]:
+    """
+    Parse and convert yaml files, identified by str(filepath) in the output.
+
+    With jobs > 1 the files are split into contiguous chunks, and every worker both
+    parses its chunk and builds the partial matrix of it with its own row indexes.
+    Only those partial matrices travel back, and the parent merges them in file order
+    by remapping their row positions, which gives the same result as the serial run.
+
+    duplicates decides what happens to files whose bytes are identical:
+        - parse:     every file is parsed
+        - reference: only the first copy is parsed, the others share its column values
+        - collapse:  copies share a single column, headed by all their names
+    """
+    return accumulate_files(filepaths, reader, jobs, layout, duplicates).finalize()
+
+
+def accumulate_files(
+        filepaths: Iterable[PathLikeObj],
+        reader: Union[None, AbstractReader] = None,
+        jobs: int = 1,
+        layout: str = 'dense',
+        duplicates: str = 'parse'
+) -> 'MatrixAccumulator':
+    """
+    Same as convert_files, but the MatrixAccumulator is returned instead of its
+    output, so that it can still be reshaped (e.g. by cluster_near_duplicates)
+    """
+    if layout not in LAYOUTS:
+        raise ValueError('layout must be one of ' + ', '.join(LAYOUTS))
+
+    if duplicates not in DUPLICATE_MODES:
+        raise ValueError('duplicates must be one of ' + ', '.join(DUPLICATE_MODES))
+
+    if reader is None:
+        reader = get_reader()
+
+    if duplicates == 'parse':
+        #Serial runs parse the paths while they are produced, e.g. by discover_files
+        accumulator: MatrixAccumulator = _accumulate(filepaths, reader, jobs, layout)
+
+    else:
+        filepaths = list(filepaths)
+        sources: List[int] = _content_sources(filepaths)
+        originals: List[int] = [position for position, source in enumerate(sources) if source == position]
+        accumulator = _accumulate([filepaths[position] for position in originals], reader, jobs, layout)
+        columns: Dict[int, int] = {position: column for column, position in enumerate(originals)}
+        if duplicates == 'reference':
+            accumulator.remap_columns([str(path) for path in filepaths], [columns[source] for source in sources])
+
+        else:
+            aliases: Dict[int, List[str]] = {}
+            for path, source in zip(filepaths, sources):
+                aliases.setdefault(source, []).append(str(path))
+
+            accumulator.remap_columns(
+                [ALIAS_SEPARATOR.join(aliases[position]) for position in originals], list(range(len(originals)))
+            )
+
+    return accumulator
+
+
+def _accumulate(
+        filepaths: Iterable[PathLikeObj],
+        reader: AbstractReader,
+        jobs: int,
+        layout: str
+) -> 'MatrixAccumulator':
+    jobs = resolve_jobs(jobs)
+    if jobs <= 1:
+        return _convert_chunk(reader, filepaths, layout)
+
+    filepaths = list(filepaths)
+    #A few chunks per worker keeps the load balanced
+    count: int = max(1, min(len(filepaths), jobs * 4))
+    chunks: List[List[PathLikeObj]] = [
+        filepaths[len(filepaths) * part // count:len(filepaths) * (part + 1) // count] for part in range(count)
+    ]
+    #The partial matrices are never finalized, only the one they are merged into
+    accumulator: MatrixAccumulator = MatrixAccumulator(layout)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        #map keeps the submission order, which the merge relies on
+        for chunk in executor.map(partial(_convert_chunk, reader), chunks):
+            accumulator.merge(chunk)
+
+    return accumulator
+
+
+def _content_sources(filepaths: List[PathLikeObj]) -> List[int]:
+    """
+    Position of the first file with the same bytes, for every file. Only files
+    sharing their size with another one are hashed
+    """
+    sizes: List[int] = [os.path.getsize(filepath) for filepath in filepaths]
+    counts: Dict[int, int] = {}
+    for size in sizes:
+        counts[size] = counts.get(size, 0) + 1
+
+    sources: List[int] = []
+    first: Dict[Tuple[int, str], int] = {}
+    for position, (filepath, size) in enumerate(zip(filepaths, sizes)):
+        key: Tuple[int, str] = (size, file_digest(filepath) if counts[size] > 1 else str(position))
+        sources.append(first.setdefault(key, position))
+
+    return sources
+
+
+def _convert_chunk(
+        reader: AbstractReader,
+        filepaths: Iterable[PathLikeObj],
+        layout: str = 'dense'
+) -> 'MatrixAccumulator':
+    accumulator: MatrixAccumulator = MatrixAccumulator(layout)
+    for filepath in filepaths:
+        accumulator.add(str(filepath), reader.load(filepath))
+
+    return accumulator
+
+
+class MatrixAccumulator:
+    """
+    Build the output of documents_to_matrix one file at a time: add folds the
+    documents of a file into the row indexes and presence columns straight away, so
+    they can be dropped as soon as it returns and memory only depends on the matrix.
+
+        accumulator = MatrixAccumulator(layout='bitset')
+        for file_id, documents in load_files(filepaths):
+            accumulator.add(file_id, documents)
+
+        writer.process(accumulator.finalize())
+    """
+    def __init__(self, layout: str = 'dense'):
+        if layout not in LAYOUTS:
+            raise ValueError('layout must be one of ' + ', '.join(LAYOUTS))
+
+        self.layout: str = layout
+        #Row labels of every sheet, each stored once
+        self.labels: LabelTable = LabelTable()
+        self.headers: List[str] = []
+        self._file_ids: List[str] = []
+        self._used: Set[str] = set()
+        self._sheets: Dict[str, _Sheet] = {}
+
+    def __len__(self) -> int:
+        return len(self.headers)
+
+    def add(self, file_id: str, documents: Iterable) -> str:
+        """
+        Append the column of a file and return its header, which is file_id unless
+        an earlier file already took it
+        """
+        column: int = len(self.headers)
+        header: str = self._append_header(str(file_id))
+        for document in documents:
+            for path, items in _iter_lists(document, ()):
+                name: str = '.'.join(path) if path else ROOT_ATTRIBUTE
+                sheet: Union[None, _Sheet] = self._sheets.get(name)
+                if sheet is None:
+                    sheet = self._sheets[name] = _Sheet(self.labels)
+
+                sheet.add(column, items)
+
+        return header
+
+    def merge(self, other: 'MatrixAccumulator') -> None:
+        """
+        Append the columns of another accumulator, as if its files had been added here
+        one by one. Its rows are remapped onto this accumulator's indexes, so no
+        document has to be read again
+        """
+        offset: int = len(self.headers)
+        for file_id in other._file_ids:
+            self._append_header(file_id)
+
+        codes: array = self.labels.merge(other.labels)
+        for name, other_sheet in other._sheets.items():
+            sheet: Union[None, _Sheet] = self._sheets.get(name)
+            if sheet is None:
+                sheet = self._sheets[name] = _Sheet(self.labels)
+
+            sheet.merge(other_sheet, offset, codes)
+
+    def remap_columns(self, file_ids: List[str], columns: List[int]) -> None:
+        """
+        Replace the columns: the new i-th column belongs to file_ids[i] and shows the
+        current column columns[i]. A column may be shown several times, in which case
+        its hits are shared, not copied
+        """
+        self.headers = []
+        self._file_ids = []
+        self._used = set()
+        for file_id in file_ids:
+            self._append_header(file_id)
+
+        for sheet in self._sheets.values():
+            sheet.remap_columns(columns)
+
+    def iter_hits(self) -> Iterator[Tuple[str, array, List[array]]]:
+        """
+        (sheet name, row label codes, row positions present in each column) of every
+        sheet with rows. The arrays are the accumulator's own, so they must not be changed
+        """
+        for name, sheet in self._sheets.items():
+            if sheet.rows:
+                yield name, sheet.rows, sheet.columns(len(self.headers))
+
+    def _append_header(self, file_id: str) -> str:
+        header: str = unique_name(file_id, self._used)
+        self._file_ids.append(file_id)
+        self.headers.append(header)
+        self._used.add(header)
+        return header
+
+    def finalize(self) -> Dict[str, Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]]:
+        """
+        Writer input holding every file added so far. More files may still be added
+        afterwards, and a later call includes them too
+        """
+        if self.layout == 'bitset':
+            return {name: sheet.to_matrix(self.headers) for name, sheet in self._sheets.items() if sheet.rows}
+
+        if self.layout == 'sparse':
+            return {name: sheet.to_sparse(self.headers) for name, sheet in self._sheets.items() if sheet.rows}
+
+        return {
+            name: sheet.to_dict(self.headers) for name, sheet in self._sheets.items() if sheet.rows
+        }
+
+
+def keep_differences(
+        sheets: Dict[str, Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]],
+        drop_unchanged: bool = False
+) -> Dict[str, Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]]:
+    """
+    Keep only the rows that tell files apart: those present in some files but not in
+    all of them. Sheets left without rows keep their headers, or are removed when
+    drop_unchanged is True. Every sheet keeps its layout; dense ones are packed into
+    bitsets to be compared.
+    """
+    result: Dict = {}
+    for name, sheet in sheets.items():
+        if isinstance(sheet, (PresenceMatrix, SparseMatrix)):
+            kept = sheet.differences()
+            size: int = len(kept.rows)
+
+        else:
+            kept = PresenceMatrix.from_dict(sheet).differences().to_dict()
+            size = len(kept['rows'])
+
+        if size or not drop_unchanged:
+            result[name] = kept
+
+    return result
+
+
+class _Sheet:
+    """
+    Row index and presence hits of one list-valued attribute. Rows are codes into the
+    LabelTable shared by every sheet, and the hits of a column are kept as a sorted
+    array of row positions, so memory grows with the ones only
+    """
+    def __init__(self, labels: LabelTable):
+        self.labels: LabelTable = labels
+        self.rows: array = array('q')
+        #Row of every label code
+        self.index: Dict[int, int] = {}
+        self.hits: Dict[int, array] = {}
+        #Rows of the column being filled, packed into hits once the next column starts
+        self._column: int = -1
+        self._pending: Set[int] = set()
+
+    def add(self, column: int, items: List) -> None:
+        if column != self._column:
+            self._pack()
+            self._column = column
+
+        pending: Set[int] = self._pending
+        encode = self.labels.encode
+        for item in items:
+            #Keyed by type too: 1, 1.0 and True are equal for a dict, but not for a user
+            code: int = encode(to_label(item), item.__class__)
+            row: Union[None, int] = self.index.get(code)
+            if row is None:
+                row = self.index[code] = len(self.rows)
+                self.rows.append(code)
+
+            pending.add(row)
+
+    def merge(self, other: '_Sheet', offset: int, codes: array) -> None:
+        """
+        Add the rows and hits of a sheet whose columns start at offset. codes maps the
+        label codes of the other sheet onto this sheet's table
+        """
+        self._pack()
+        other._pack()
+        remap: array = array('q')
+        for other_code in other.rows:
+            code: int = codes[other_code]
+            row: Union[None, int] = self.index.get(code)
+            if row is None:
+                row = self.index[code] = len(self.rows)
+                self.rows.append(code)
+
+            remap.append(row)
+
+        for column, hits in other.hits.items():
+            self.hits[column + offset] = array('q', sorted(remap[row] for row in hits))
+
+    def remap_columns(self, columns: List[int]) -> None:
+        self._pack()
+        hits: Dict[int, array] = self.hits
+        self.hits = {new: hits[old] for new, old in enumerate(columns) if old in hits}
+        self._column = -1
+
+    def _pack(self) -> None:
+        if self._pending:
+            self.hits[self._column] = array('q', sorted(self._pending))
+            self._pending = set()
+
+    def columns(self, count: int) -> List[array]:
+        """
+        Row positions present in each of the first count columns
+        """
+        self._pack()
+        empty: array = array('q')
+        return [self.hits.get(column, empty) for column in range(count)]
+
+    def to_dict(self, headers: List[str]) -> Dict[str, Union[List, Dict]]:
+        size: int = len(self.rows)
+        columns: Dict[str, List[int]] = {}
+        #Columns sharing their hits (identical files) share their values too
+        built: Dict[int, List[int]] = {}
+        for header, hits in zip(headers, self.columns(len(headers))):
+            values: Union[None, List[int]] = built.get(id(hits))
+            if values is None:
+                values = built[id(hits)] = [0] * size
+                for row in hits:
+                    values[row] = 1
+
+            columns[header] = values
+
+        return {'rows': self.labels.decode(self.rows), 'columns': columns}
+
+    def to_matrix(self, headers: List[str]) -> PresenceMatrix:
+        #Rows are copied, since more files may still add some
+        return PresenceMatrix.from_hits(array('q', self.rows), list(headers), self.columns(len(headers)), self.labels)
+
+    def to_sparse(self, headers: List[str]) -> SparseMatrix:
+        return SparseMatrix.from_hits(array('q', self.rows), list(headers), self.columns(len(headers)), self.labels)
+
+
+def to_label(item: Any) -> Any:
+    """
+    Value shown as a row header: scalars are kept as they are, collections become
+    canonical json so that equal items share a row
+    """
+    if isinstance(item, (str, int, float, date)):
+        return item
+
+    if item is None:
+        return 'null'
+
+    if isinstance(item, (dict, list, tuple, set)):
+        try:
+            return json.dumps(_canonical(item), sort_keys=True, default=str, ensure_ascii=False)
+
+        except TypeError:
+            #Keys of mixed types cannot be sorted
+            return str(item)
+
+    return str(item)
+
+
+def _canonical(item: Any) -> Any:
+    if isinstance(item, set):
+        return sorted(item, key=str)
+
+    return item
+
+
+def _iter_lists(value: Any, path: Tuple[str, ...]) -> Iterator[Tuple[Tuple[str, ...], List]]:
+    if isinstance(value, list):
+        yield path, value
+
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            for found in _iter_lists(item, path + (str(key),)):
+                yield found
+
+
+def unique_name(name: str, current: Set[str]) -> str:
+    """
+    Same naming scheme as the writer uses for sheets: 'file' -> 'file_1' -> 'file_2'
+    """
+    candidate: str = name
+    level: int = 1
+    while candidate in current:
+        candidate = '{}_{}'.format(name, level)
+        level += 1
+
+    return candidate
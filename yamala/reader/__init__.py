@@ -1 +1,7 @@
 from .reader import *
+from .parallel import *
+from .cache import *
+from .projection import *
+from .discovery import *
+from .index import *
+from .archive import *
@@ -0,0 +1,101 @@
+"""
+Archive source: parse the yaml members of zip and tar archives without extracting them
+"""
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import BinaryIO, Iterable, Iterator, List, Tuple, Union
+import tarfile
+import zipfile
+
+from .parallel import resolve_jobs
+from .reader import ACCEPTED_EXTENSIONS, PathLikeObj, PyYamlReader, compression_opener, get_reader
+
+ZIP_EXTENSIONS: Tuple[str, ...] = ('.zip',)
+TAR_EXTENSIONS: Tuple[str, ...] = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ARCHIVE_EXTENSIONS: Tuple[str, ...] = ZIP_EXTENSIONS + TAR_EXTENSIONS
+
+
+class ArchiveTypeError(Exception):
+    """
+    Instantiate this class to raise when the supplied file is not a supported archive
+    """
+    def __init__(self):
+        Exception.__init__(self, 'Archive extension must be one of ' + ', '.join(ARCHIVE_EXTENSIONS))
+
+
+def iter_archive(
+        archivepath: PathLikeObj,
+        reader: Union[None, PyYamlReader] = None,
+        extensions: Tuple[str, ...] = ACCEPTED_EXTENSIONS
+) -> Iterator[Tuple[str, List]]:
+    """
+    Yield (member name, documents) for every archive member whose name ends with one
+    of the extensions, in archive order. Members are streamed straight into the parser
+    (tar archives are even read sequentially, so compressed tarballs are never seeked)
+    """
+    if reader is None:
+        reader = get_reader()
+
+    name: str = str(archivepath).lower()
+    if name.endswith(ZIP_EXTENSIONS):
+        return _iter_zip(archivepath, reader, extensions)
+
+    if name.endswith(TAR_EXTENSIONS):
+        return _iter_tar(archivepath, reader, extensions)
+
+    raise ArchiveTypeError()
+
+
+def load_archives(
+        archivepaths: Iterable[PathLikeObj],
+        reader: Union[None, PyYamlReader] = None,
+        jobs: int = 1
+) -> Iterator[Tuple[str, List]]:
+    """
+    Chain the members of several archives. With jobs > 1 each archive is parsed by a
+    worker process, and the results keep the order of archivepaths
+    """
+    if reader is None:
+        reader = get_reader()
+
+    jobs = resolve_jobs(jobs)
+    if jobs <= 1:
+        for archivepath in archivepaths:
+            for member in iter_archive(archivepath, reader):
+                yield member
+
+        return None
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for members in executor.map(partial(_load_archive, reader), archivepaths):
+            for member in members:
+                yield member
+
+
+def _load_archive(reader: PyYamlReader, archivepath: PathLikeObj) -> List[Tuple[str, List]]:
+    return list(iter_archive(archivepath, reader))
+
+
+def _iter_zip(archivepath: PathLikeObj, reader: PyYamlReader, extensions: Tuple[str, ...]) -> Iterator:
+    with zipfile.ZipFile(archivepath) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and info.filename.endswith(extensions):
+                with archive.open(info) as member:
+                    yield info.filename, _load_member(reader, member, info.filename)
+
+
+def _iter_tar(archivepath: PathLikeObj, reader: PyYamlReader, extensions: Tuple[str, ...]) -> Iterator:
+    with tarfile.open(archivepath, mode='r|*') as archive:
+        for info in archive:
+            if info.isfile() and info.name.endswith(extensions):
+                member: BinaryIO = archive.extractfile(info)
+                yield info.name, _load_member(reader, member, info.name)
+
+
+def _load_member(reader: PyYamlReader, member: BinaryIO, name: str) -> List:
+    opener = compression_opener(name)
+    if opener is None:
+        return reader.load_stream(member)
+
+    with opener(member, 'rb') as decompressed:
+        return reader.load_stream(decompressed)
@@ -0,0 +1,236 @@
+"""
+On-disk parse cache that wraps any reader
+"""
+from pathlib import Path
+from typing import Dict, List, Union
+import hashlib
+import os
+import pickle
+
+from .reader import AbstractReader, PathLikeObj, get_reader
+
+
+def file_digest(filepath: PathLikeObj, chunk_size: int = 1 << 20) -> str:
+    """
+    Hash the raw bytes of a file without loading it whole in memory
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class CachedReader(AbstractReader):
+    """
+    Keep the documents parsed by another reader in a cache folder, one entry per file
+    and wrapped reader, so that readers returning different documents never share one.
+
+    An entry is trusted as long as the file's size and mtime are unchanged, so a warm
+    hit costs a stat() plus the unpickling. When those differ, the content hash decides
+    whether the file has to be parsed again. The cache folder is kept under max_bytes
+    by evicting the least recently used entries.
+    """
+    version: int = 1
+    suffix: str = '.pickle'
+
+    def __init__(
+            self,
+            folderpath: PathLikeObj,
+            reader: Union[None, AbstractReader] = None,
+            max_bytes: int = 256 * 1024 * 1024
+    ):
+        AbstractReader.__init__(self)
+        if isinstance(folderpath, str):
+            folderpath = Path(folderpath)
+
+        self.folderpath: Path = folderpath
+        self.reader: AbstractReader = get_reader() if reader is None else reader
+        self.max_bytes: int = max_bytes
+        self._size: Union[None, int] = None
+        self.folderpath.mkdir(parents=True, exist_ok=True)
+
+    def load(self, filepath: PathLikeObj) -> List:
+        self._validate_extension(filepath)
+        key: str = self._key(filepath)
+        entry: Path = self._entry_path(key)
+        stat: os.stat_result = os.stat(filepath)
+        header: Union[None, Dict] = None
+        try:
+            with open(entry, 'rb') as f:
+                header = pickle.load(f)
+                if not self._is_compatible(header, key):
+                    #Written by another version or another reader: parse again and overwrite it
+                    digest: str = file_digest(filepath)
+
+                elif self._is_fresh(header, stat):
+                    files: List = pickle.load(f)
+                    #Entries are evicted by mtime, so a hit renews them
+                    self._touch(entry)
+                    return files
+
+                else:
+                    digest = file_digest(filepath)
+                    if header['digest'] == digest:
+                        #Touched but not modified: keep the documents, refresh the file identity
+                        files = pickle.load(f)
+                        self._store(entry, key, stat, digest, files)
+                        return files
+
+        except FileNotFoundError:
+            digest = file_digest(filepath)
+
+        except (pickle.UnpicklingError, EOFError, KeyError, TypeError, AttributeError):
+            #Corrupt or foreign entry: parse again and overwrite it
+            digest = file_digest(filepath)
+
+        files = self.reader.load(filepath)
+        self._store(entry, key, stat, digest, files)
+        return files
+
+    def invalidate(self, filepath: PathLikeObj) -> None:
+        """
+        Drop the cached documents of a file
+        """
+        entry: Path = self._entry_path(self._key(filepath))
+        try:
+            size: int = entry.stat().st_size
+            entry.unlink()
+
+        except FileNotFoundError:
+            return None
+
+        if self._size is not None:
+            self._size -= size
+
+    def clear(self) -> None:
+        """
+        Drop every cached entry
+        """
+        for entry in self.folderpath.glob('*' + self.suffix):
+            try:
+                entry.unlink()
+
+            except FileNotFoundError:
+                #Already evicted by another process sharing the folder
+                pass
+
+        self._size = 0
+
+    def _is_compatible(self, header: Dict, key: str) -> bool:
+        """
+        The entry was written by this cache version, for this file and this reader
+        """
+        return header['version'] == self.version and header['key'] == key
+
+    @staticmethod
+    def _is_fresh(header: Dict, stat: os.stat_result) -> bool:
+        return header['size'] == stat.st_size and header['mtime_ns'] == stat.st_mtime_ns
+
+    @staticmethod
+    def _touch(entry: Path) -> None:
+        try:
+            os.utime(entry)
+
+        except FileNotFoundError:
+            #Evicted by another process since it was opened
+            pass
+
+    def _store(self, entry: Path, key: str, stat: os.stat_result, digest: str, files: List) -> None:
+        header: Dict = {
+            'version': self.version,
+            'key': key,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'digest': digest
+        }
+        try:
+            previous_size: int = entry.stat().st_size
+
+        except FileNotFoundError:
+            previous_size = 0
+
+        #Write aside and rename, so that concurrent readers never see half an entry
+        temporary: Path = entry.with_name('{}.{}.tmp'.format(entry.name, os.getpid()))
+        with open(temporary, 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(files, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(temporary, entry)
+        if self._size is None:
+            self._size = self._folder_size()
+
+        else:
+            try:
+                self._size += entry.stat().st_size - previous_size
+
+            except FileNotFoundError:
+                #Evicted by another process right after the rename
+                self._size = self._folder_size()
+
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """
+        Remove least recently used entries until the cache is below 90% of max_bytes,
+        so that evictions do not happen on every single store. Other processes may
+        share the folder, so entries can vanish at any point: those are skipped
+        """
+        entries: List = []
+        for entry in os.scandir(self.folderpath):
+            if entry.name.endswith(self.suffix):
+                try:
+                    stat: os.stat_result = entry.stat()
+
+                except FileNotFoundError:
+                    continue
+
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        entries.sort()
+        total: int = sum(size for _, size, _ in entries)
+        target: int = int(self.max_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+
+            try:
+                os.unlink(path)
+
+            except FileNotFoundError:
+                pass
+
+            total -= size
+
+        self._size = total
+
+    def _folder_size(self) -> int:
+        size: int = 0
+        for entry in os.scandir(self.folderpath):
+            if entry.name.endswith(self.suffix):
+                try:
+                    size += entry.stat().st_size
+
+                except FileNotFoundError:
+                    continue
+
+        return size
+
+    def _entry_path(self, key: str) -> Path:
+        return self.folderpath / (hashlib.sha1(key.encode('utf-8')).hexdigest() + self.suffix)
+
+    def _key(self, filepath: PathLikeObj) -> str:
+        """
+        The file's absolute path, prefixed with the wrapped reader and its loader: two
+        readers may return different documents for the same file
+        """
+        reader: type = type(self.reader)
+        loader: Union[None, type] = getattr(self.reader, 'loader', None)
+        return '{}.{}:{}:{}'.format(
+            reader.__module__,
+            reader.__qualname__,
+            None if loader is None else '{}.{}'.format(loader.__module__, loader.__qualname__),
+            os.path.abspath(filepath)
+        )
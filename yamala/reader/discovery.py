@@ -0,0 +1,74 @@
+"""
+Folder discovery: stream the yaml files found under a list of folders
+"""
+from typing import Iterable, Iterator, List, Set, Tuple
+import os
+
+from .reader import PathLikeObj, ACCEPTED_EXTENSIONS
+
+#Folders that never hold configuration worth comparing
+EXCLUDED_FOLDERS: Tuple[str, ...] = ('.git', '.hg', '.svn', '__pycache__', 'node_modules')
+
+
+def discover_files(
+        folders: Iterable[PathLikeObj],
+        recursive: bool = False,
+        extensions: Tuple[str, ...] = ACCEPTED_EXTENSIONS,
+        excluded: Iterable[str] = EXCLUDED_FOLDERS
+) -> Iterator[str]:
+    """
+    Yield the path of every file whose name ends with one of the extensions.
+
+    - Extensions are checked on the directory entry, so other files cost nothing but the listing
+    - Folders named in excluded are pruned before being opened
+    - Symbolic links are followed, but a folder is never visited twice, which breaks loops
+    - Paths are yielded folder by folder (sorted by name inside each one), so parsing can
+      start before the walk is over while the order stays deterministic
+    """
+    excluded_names: Set[str] = set(excluded)
+    visited: Set[Tuple[int, int]] = set()
+    for folder in folders:
+        folder = os.fspath(folder)
+        stat: os.stat_result = os.stat(folder)
+        if not _first_visit(visited, stat):
+            continue
+
+        pending: List[str] = [folder]
+        while pending:
+            current: str = pending.pop()
+            try:
+                with os.scandir(current) as iterator:
+                    entries: List[os.DirEntry] = sorted(iterator, key=lambda e: e.name)
+
+            except OSError:
+                if current == folder:
+                    raise
+
+                #Unreadable subfolders are skipped, like os.walk does
+                continue
+
+            subfolders: List[str] = []
+            for entry in entries:
+                if entry.name.endswith(extensions) and entry.is_file():
+                    yield entry.path
+
+                elif recursive and entry.name not in excluded_names and entry.is_dir():
+                    try:
+                        if _first_visit(visited, entry.stat()):
+                            subfolders.append(entry.path)
+
+                    except OSError:
+                        #Dangling symbolic link
+                        continue
+
+            #Reversed, so that the stack pops them in name order
+            pending.extend(reversed(subfolders))
+
+
+def _first_visit(visited: Set[Tuple[int, int]], stat: os.stat_result) -> bool:
+    identity: Tuple[int, int] = (stat.st_dev, stat.st_ino)
+    if identity in visited:
+        return False
+
+    visited.add(identity)
+    return True
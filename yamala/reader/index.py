@@ -0,0 +1,243 @@
+"""
+Byte-offset index of the documents of a multi-document yaml file
+"""
+from array import array
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+import mmap
+import os
+import pickle
+import re
+import yaml
+
+from .reader import PathLikeObj, PyYamlReader, compression_opener, detect_encoding
+
+#Document markers are only markers at the start of a line and followed by a blank
+_MARKER = re.compile(rb'(?:^|(?<=\A\xef\xbb\xbf))(---|\.\.\.)(?=[ \t\r\n]|\Z)', re.MULTILINE)
+#Any line holding something other than blanks, comments or directives
+_CONTENT = re.compile(rb'(?:^|(?<=\A\xef\xbb\xbf))(?!%|\xef\xbb\xbf)[ \t]*[^ \t\r\n#]', re.MULTILINE)
+
+
+class DocumentIndexError(Exception):
+    """
+    Instantiate this class to raise when a file cannot be indexed
+    """
+    def __init__(self, message: str):
+        Exception.__init__(self, message)
+
+
+class DocumentIndex:
+    """
+    Start and end byte offsets of every document in a yaml file. Each [start, end)
+    slice parses on its own into exactly one document, so any document or run of
+    documents can be loaded without parsing the ones before it.
+
+    The index remembers the size and mtime of the file it was built from, and
+    stale indexes are rebuilt by load_or_build.
+    """
+    version: int = 1
+    suffix: str = '.idx'
+
+    def __init__(self, starts: array, ends: array, size: int, mtime_ns: int):
+        self.starts: array = starts
+        self.ends: array = ends
+        self.size: int = size
+        self.mtime_ns: int = mtime_ns
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def segment(self, start: int, stop: Union[None, int] = None) -> Tuple[int, int]:
+        """
+        Byte range covering documents start to stop - 1 (only start if stop is None)
+        """
+        if stop is None:
+            stop = start + 1
+
+        if not 0 <= start < stop <= len(self):
+            raise IndexError('document range {}:{} out of {} documents'.format(start, stop, len(self)))
+
+        return self.starts[start], self.ends[stop - 1]
+
+    def partition(self, parts: int) -> List[Tuple[int, int]]:
+        """
+        Split the documents into at most parts contiguous (start, stop) ranges holding
+        roughly the same amount of bytes, e.g. one per worker
+        """
+        ranges: List[Tuple[int, int]] = []
+        if not len(self):
+            return ranges
+
+        total: int = self.ends[-1] - self.starts[0]
+        begin: int = 0
+        for position in range(len(self)):
+            share: int = (len(ranges) + 1) * total // parts
+            if self.ends[position] - self.starts[0] >= share and len(ranges) < parts - 1:
+                ranges.append((begin, position + 1))
+                begin = position + 1
+
+        if begin < len(self):
+            ranges.append((begin, len(self)))
+
+        return ranges
+
+    def is_valid_for(self, filepath: PathLikeObj) -> bool:
+        stat: os.stat_result = os.stat(filepath)
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+    def save(self, path: PathLikeObj) -> None:
+        state: Dict = {
+            'version': self.version,
+            'size': self.size,
+            'mtime_ns': self.mtime_ns,
+            'starts': self.starts,
+            'ends': self.ends
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def read(cls, path: PathLikeObj) -> 'DocumentIndex':
+        with open(path, 'rb') as f:
+            state: Dict = pickle.load(f)
+
+        if state.get('version') != cls.version:
+            raise DocumentIndexError('Unsupported index version in {}'.format(path))
+
+        return cls(state['starts'], state['ends'], state['size'], state['mtime_ns'])
+
+    @classmethod
+    def build(cls, filepath: PathLikeObj) -> 'DocumentIndex':
+        """
+        Scan the file once for document markers. The scan runs on a memory map, so
+        the file is never held in memory as a whole
+        """
+        if compression_opener(filepath) is not None:
+            raise DocumentIndexError('Compressed files cannot be indexed: {}'.format(filepath))
+
+        stat: os.stat_result = os.stat(filepath)
+        starts: array = array('q')
+        ends: array = array('q')
+        if stat.st_size == 0:
+            return cls(starts, ends, 0, stat.st_mtime_ns)
+
+        with open(filepath, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                encoding: str = detect_encoding(buffer[:4])
+                if encoding not in ('utf-8', 'utf-8-sig'):
+                    raise DocumentIndexError('Only utf-8 files can be indexed, {} is {}'.format(filepath, encoding))
+
+                cls._scan(buffer, starts, ends)
+
+        return cls(starts, ends, stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def _scan(buffer: mmap.mmap, starts: array, ends: array) -> None:
+        size: int = len(buffer)
+        #Start of the pending segment, and whether it was opened by '---'
+        current: int = 0
+        explicit: bool = False
+        for match in _MARKER.finditer(buffer):
+            position: int = match.start()
+            has_document: bool = explicit or _CONTENT.search(buffer, current, position) is not None
+            if match.group(1) == b'---':
+                #Comments and directives before the first '---' belong to its document
+                if has_document:
+                    starts.append(current)
+                    ends.append(position)
+                    current = position
+
+                explicit = True
+
+            else:
+                line_end: int = buffer.find(b'\n', position)
+                line_end = size if line_end == -1 else line_end + 1
+                if has_document:
+                    starts.append(current)
+                    ends.append(line_end)
+
+                current = line_end
+                explicit = False
+
+        if explicit or _CONTENT.search(buffer, current, size) is not None:
+            starts.append(current)
+            ends.append(size)
+
+    @classmethod
+    def load_or_build(cls, filepath: PathLikeObj, folderpath: Union[None, PathLikeObj] = None) -> 'DocumentIndex':
+        """
+        Reuse the persisted index of a file, or build and persist a new one. Indexes are
+        stored next to the file, or inside folderpath when it is given. Persisting is
+        only a speed-up: when the index cannot be written (read-only folder, full
+        disk), the built one is returned all the same
+        """
+        path: Path = cls.index_path(filepath, folderpath)
+        try:
+            index: DocumentIndex = cls.read(path)
+            if index.is_valid_for(filepath):
+                return index
+
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, DocumentIndexError):
+            pass
+
+        index = cls.build(filepath)
+        try:
+            index.save(path)
+
+        except OSError:
+            pass
+
+        return index
+
+    @classmethod
+    def index_path(cls, filepath: PathLikeObj, folderpath: Union[None, PathLikeObj] = None) -> Path:
+        filepath = Path(filepath)
+        if folderpath is None:
+            return filepath.with_name(filepath.name + cls.suffix)
+
+        #Flatten the absolute path, so that files with the same name do not collide
+        flat: str = os.path.abspath(filepath).replace(os.sep, '_').replace(':', '_')
+        return Path(folderpath) / (flat + cls.suffix)
+
+
+class IndexedReader(PyYamlReader):
+    """
+    Reader giving random access to the documents of large multi-document files
+    through their DocumentIndex.
+
+    Indexes are kept in memory, and persisted inside folderpath when it is given, so
+    that nothing is written next to the input files
+    """
+    def __init__(self, folderpath: Union[None, PathLikeObj] = None, *args, **kwargs):
+        PyYamlReader.__init__(self, *args, **kwargs)
+        self.folderpath: Union[None, PathLikeObj] = folderpath
+        self._indexes: Dict[str, DocumentIndex] = {}
+
+    def index(self, filepath: PathLikeObj) -> DocumentIndex:
+        self._validate_extension(filepath)
+        key: str = os.path.abspath(filepath)
+        index: Union[None, DocumentIndex] = self._indexes.get(key)
+        if index is None or not index.is_valid_for(filepath):
+            if self.folderpath is None:
+                index = DocumentIndex.build(filepath)
+
+            else:
+                index = DocumentIndex.load_or_build(filepath, self.folderpath)
+
+            self._indexes[key] = index
+
+        return index
+
+    def load_document(self, filepath: PathLikeObj, position: int):
+        return self.load_documents(filepath, position, position + 1)[0]
+
+    def load_documents(self, filepath: PathLikeObj, start: int, stop: int) -> List:
+        """
+        Parse documents start to stop - 1 only
+        """
+        begin, end = self.index(filepath).segment(start, stop)
+        with open(filepath, 'rb') as f:
+            f.seek(begin)
+            content: bytes = f.read(end - begin)
+
+        return list(yaml.load_all(content, Loader=self.loader))
@@ -0,0 +1,58 @@
+"""
+Parallel loading: spread yaml files across a pool of worker processes
+"""
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, Iterator, List, Tuple, Union
+import os
+
+from .reader import AbstractReader, PathLikeObj, get_reader
+
+
+def resolve_jobs(jobs: int) -> int:
+    """
+    0 stands for 'one worker per available core'
+    """
+    if jobs == 0:
+        return os.cpu_count() or 1
+
+    return jobs
+
+
+def load_files(
+        filepaths: Iterable[PathLikeObj],
+        reader: Union[None, AbstractReader] = None,
+        jobs: int = 1,
+        chunksize: Union[None, int] = None
+) -> Iterator[Tuple[PathLikeObj, List]]:
+    """
+    Yield (filepath, documents) pairs in the same order as filepaths.
+
+    With jobs > 1 files are parsed in a process pool. Workers only send back the
+    list of documents of each file, which is the smallest thing the parent needs.
+    """
+    if reader is None:
+        reader = get_reader()
+
+    jobs = resolve_jobs(jobs)
+    if jobs <= 1:
+        return ((filepath, reader.load(filepath)) for filepath in filepaths)
+
+    filepaths = list(filepaths)
+    if chunksize is None:
+        #A few chunks per worker: cheap IPC while keeping the load balanced
+        chunksize = max(1, len(filepaths) // (jobs * 4))
+
+    return _load_in_pool(filepaths, reader, jobs, chunksize)
+
+
+def _load_in_pool(filepaths: List[PathLikeObj], reader: AbstractReader, jobs: int, chunksize: int) -> Iterator:
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        #map keeps the submission order, regardless of which worker finishes first
+        documents: Iterator[List] = executor.map(partial(_load_file, reader), filepaths, chunksize=chunksize)
+        for filepath, content in zip(filepaths, documents):
+            yield filepath, content
+
+
+def _load_file(reader: AbstractReader, filepath: PathLikeObj) -> List:
+    return reader.load(filepath)
@@ -0,0 +1,289 @@
+"""
+Projection reader: build only the list-like attributes of each document
+"""
+from typing import BinaryIO, Dict, Iterator, List, Set, Union
+import yaml
+from yaml.composer import ComposerError
+from yaml.constructor import ConstructorError, SafeConstructor
+from yaml.events import (
+    AliasEvent, CollectionStartEvent, DocumentStartEvent, Event, MappingEndEvent, MappingStartEvent,
+    ScalarEvent, SequenceEndEvent, SequenceStartEvent
+)
+from yaml.nodes import MappingNode, Node, ScalarNode, SequenceNode
+from yaml.resolver import Resolver
+
+from .reader import PyYamlReader, CSafeLoader, LIBYAML_AVAILABLE
+
+_MERGE_TAG: str = 'tag:yaml.org,2002:merge'
+_VALUE_TAG: str = 'tag:yaml.org,2002:value'
+_STR_TAG: str = 'tag:yaml.org,2002:str'
+
+
+class _Missing:
+    """
+    Marker for subtrees that do not contain any list
+    """
+
+
+_MISSING: _Missing = _Missing()
+
+
+class ProjectionReader(PyYamlReader):
+    """
+    Reader that walks pyyaml's event stream and only constructs:
+        - sequences, fully (they are the attributes the tool compares)
+        - mappings that lead to a sequence, holding just the keys on that path
+
+    Every other subtree is skipped event by event, so no node or Python object is ever
+    built for it. Scalar documents and mappings without lists project to None and {}.
+    """
+    loader: type = CSafeLoader if LIBYAML_AVAILABLE else yaml.SafeLoader
+
+    def _iter_stream(self, stream: BinaryIO) -> Iterator:
+        for document in _Projector(yaml.parse(stream, Loader=self.loader)).documents():
+            yield document
+
+
+class _Projector:
+    """
+    Consume the events of a yaml stream. Anchored nodes are the only ones whose events
+    are kept, since an alias may later need them
+    """
+    def __init__(self, events: Iterator[Event]):
+        self._events: Iterator[Event] = events
+        self._resolver: Resolver = Resolver()
+        self._constructor: SafeConstructor = SafeConstructor()
+        self._anchors: Dict[str, List[Event]] = {}
+        self._nodes: Dict[str, Node] = {}
+
+    def documents(self) -> Iterator:
+        for event in self._events:
+            if isinstance(event, DocumentStartEvent):
+                self._anchors = {}
+                self._nodes = {}
+                root: Event = next(self._events)
+                value = self._project(root, self._events)
+                #DocumentEndEvent
+                next(self._events)
+                if value is _MISSING:
+                    yield {} if isinstance(root, MappingStartEvent) else None
+
+                else:
+                    yield value
+
+    # #### Projection
+    def _project(self, event: Event, events: Iterator[Event], record: bool = True):
+        if isinstance(event, AliasEvent):
+            recorded: List[Event] = self._recorded(event)
+            return self._project(recorded[0], iter(recorded[1:]), record=False)
+
+        if record and event.anchor is not None:
+            recorded = self._record(event, events)
+            return self._project(recorded[0], iter(recorded[1:]), record=False)
+
+        if isinstance(event, SequenceStartEvent):
+            return self._construct(event, events)
+
+        if isinstance(event, MappingStartEvent):
+            return self._project_mapping(events)
+
+        if isinstance(event, CollectionStartEvent):
+            self._skip(events)
+
+        return _MISSING
+
+    def _project_mapping(self, events: Iterator[Event]):
+        own: Dict = {}
+        dropped: Set = set()
+        merged: List[Dict] = []
+        for key_event in events:
+            if isinstance(key_event, MappingEndEvent):
+                break
+
+            key_node: Union[None, Node] = self._compose_key(key_event, events)
+            value_event: Event = next(events)
+            if key_node is not None and key_node.tag == _MERGE_TAG:
+                merged.extend(self._project_merge(value_event, events))
+                continue
+
+            value = self._project(value_event, events)
+            if key_node is None:
+                continue
+
+            key = self._constructor.construct_document(key_node)
+            if value is _MISSING:
+                #A later duplicate key hides what an earlier one (or a merge) provided
+                own.pop(key, None)
+                dropped.add(key)
+
+            else:
+                own[key] = value
+                dropped.discard(key)
+
+        if merged:
+            #Same precedence as SafeConstructor.flatten_mapping: own keys win, then earlier merges
+            result: Dict = {}
+            for mapping in reversed(merged):
+                result.update(mapping)
+
+            for key in dropped:
+                result.pop(key, None)
+
+            result.update(own)
+            own = result
+
+        return own if own else _MISSING
+
+    def _project_merge(self, event: Event, events: Iterator[Event]) -> List[Dict]:
+        if isinstance(event, AliasEvent):
+            recorded: List[Event] = self._recorded(event)
+            return self._project_merge(recorded[0], iter(recorded[1:]))
+
+        if isinstance(event, CollectionStartEvent) and event.anchor is not None:
+            events = iter(self._record(event, events)[1:])
+
+        if isinstance(event, MappingStartEvent):
+            mapping = self._project_mapping(events)
+            return [] if mapping is _MISSING else [mapping]
+
+        if isinstance(event, SequenceStartEvent):
+            mappings: List[Dict] = []
+            for item in events:
+                if isinstance(item, SequenceEndEvent):
+                    break
+
+                mappings.extend(self._project_merge(item, events))
+
+            return mappings
+
+        raise ConstructorError(
+            'while constructing a mapping', None,
+            'expected a mapping or list of mappings for merging, but found scalar', event.start_mark
+        )
+
+    # #### Event bookkeeping
+    def _record(self, event: Event, events: Iterator[Event]) -> List[Event]:
+        recorded: List[Event] = [event]
+        if isinstance(event, CollectionStartEvent):
+            depth: int = 1
+            for item in events:
+                recorded.append(item)
+                if isinstance(item, CollectionStartEvent):
+                    depth += 1
+
+                elif isinstance(item, (SequenceEndEvent, MappingEndEvent)):
+                    depth -= 1
+                    if depth == 0:
+                        break
+
+        #An anchor may be redefined further down the document
+        self._anchors[event.anchor] = recorded
+        self._nodes.pop(event.anchor, None)
+        return recorded
+
+    def _recorded(self, event: AliasEvent) -> List[Event]:
+        try:
+            return self._anchors[event.anchor]
+
+        except KeyError:
+            raise ComposerError(None, None, 'found undefined alias %r' % event.anchor, event.start_mark)
+
+    @staticmethod
+    def _skip(events: Iterator[Event]) -> None:
+        depth: int = 1
+        for item in events:
+            if isinstance(item, CollectionStartEvent):
+                depth += 1
+
+            elif isinstance(item, (SequenceEndEvent, MappingEndEvent)):
+                depth -= 1
+                if depth == 0:
+                    return None
+
+    # #### Construction
+    def _construct(self, event: Event, events: Iterator[Event]):
+        return self._constructor.construct_document(self._compose(event, events))
+
+    def _compose_key(self, event: Event, events: Iterator[Event]) -> Union[None, Node]:
+        """
+        Only scalar keys are composed; complex keys (and their values) are skipped
+        """
+        if isinstance(event, ScalarEvent) or isinstance(event, AliasEvent):
+            node: Node = self._compose(event, events)
+            if isinstance(node, ScalarNode):
+                if node.tag == _VALUE_TAG:
+                    node.tag = _STR_TAG
+
+                return node
+
+            return None
+
+        if event.anchor is not None:
+            self._record(event, events)
+
+        else:
+            self._skip(events)
+
+        return None
+
+    def _compose(self, event: Event, events: Iterator[Event], record: bool = True) -> Node:
+        """
+        Same as pyyaml's Composer.compose_node, but reading from the given events
+        """
+        if isinstance(event, AliasEvent):
+            if event.anchor not in self._nodes:
+                recorded: List[Event] = self._recorded(event)
+                self._compose(recorded[0], iter(recorded[1:]), record=False)
+
+            return self._nodes[event.anchor]
+
+        if record and event.anchor is not None:
+            recorded = self._record(event, events)
+            return self._compose(recorded[0], iter(recorded[1:]), record=False)
+
+        tag: Union[None, str] = event.tag
+        node: Node
+        if isinstance(event, ScalarEvent):
+            if tag is None or tag == '!':
+                tag = self._resolver.resolve(ScalarNode, event.value, event.implicit)
+
+            node = ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+            if event.anchor is not None:
+                self._nodes[event.anchor] = node
+
+            return node
+
+        if isinstance(event, SequenceStartEvent):
+            if tag is None or tag == '!':
+                tag = self._resolver.resolve(SequenceNode, None, event.implicit)
+
+            node = SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+            if event.anchor is not None:
+                self._nodes[event.anchor] = node
+
+            for item in events:
+                if isinstance(item, SequenceEndEvent):
+                    node.end_mark = item.end_mark
+                    break
+
+                node.value.append(self._compose(item, events))
+
+            return node
+
+        if tag is None or tag == '!':
+            tag = self._resolver.resolve(MappingNode, None, event.implicit)
+
+        node = MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        if event.anchor is not None:
+            self._nodes[event.anchor] = node
+
+        for item in events:
+            if isinstance(item, MappingEndEvent):
+                node.end_mark = item.end_mark
+                break
+
+            key: Node = self._compose(item, events)
+            value: Node = self._compose(next(events), events)
+            node.value.append((key, value))
+
+        return node
@@ -1,20 +1,50 @@
 """
 Yaml readers: interfaces + implementations
 """
-from typing import Dict, List, Union, TypeVar, Iterable, Generator
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, List, Tuple, Union, TypeVar, Iterable, Iterator, Generator
 from pathlib import Path
 import abc
+import bz2
+import codecs
+import gzip
+import lzma
+import mmap
 import yaml
 
 PathLikeObj = TypeVar('PathLikeObj', str, Path)
 
+YAML_EXTENSIONS: Tuple[str, ...] = ('.yml', '.yaml')
+#Compressed inputs are decompressed on the fly, while being parsed
+COMPRESSION_OPENERS: Dict[str, Callable] = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+COMPRESSED_YAML_EXTENSIONS: Tuple[str, ...] = tuple(
+    extension + compression for extension in YAML_EXTENSIONS for compression in COMPRESSION_OPENERS
+)
+ACCEPTED_EXTENSIONS: Tuple[str, ...] = YAML_EXTENSIONS + COMPRESSED_YAML_EXTENSIONS
+
+try:
+    from yaml import CSafeLoader
+    LIBYAML_AVAILABLE: bool = True
+
+except ImportError:
+    CSafeLoader = None
+    LIBYAML_AVAILABLE: bool = False
+
 
 class FileTypeError(Exception):
     """
     Instantiate this class to raise when the supplied files is not yaml
     """
     def __init__(self):
-        Exception.__init__(self, 'File extension must be .yaml or .yml')
+        Exception.__init__(self, 'File extension must be one of ' + ', '.join(ACCEPTED_EXTENSIONS))
+
+
+class LibYamlNotAvailable(Exception):
+    """
+    Instantiate this class to raise when pyyaml was built without the LibYAML bindings
+    """
+    def __init__(self):
+        Exception.__init__(self, 'pyyaml was installed without LibYAML support')
 
 
 class AbstractReader(abc.ABC):
@@ -29,31 +59,205 @@ class AbstractReader(abc.ABC):
     def load(self, filepath: PathLikeObj) -> Iterable:
         return NotImplemented
 
+    def iter_documents(self, filepath: PathLikeObj) -> Iterator:
+        """
+        Yield the documents of a file one at a time. Readers that cannot parse
+        lazily fall back to the list returned by load
+        """
+        return iter(self.load(filepath))
+
     @staticmethod
     def _validate_extension(filepath: PathLikeObj) -> None:
         filepath_str: str
         if isinstance(filepath, Path):
-            filepath_str = filepath.suffix
+            filepath_str = filepath.name
         else:
             filepath_str = filepath
 
-        if not (filepath_str[-4:]=='.yml' or filepath_str[-5:]=='.yaml'):
+        if not filepath_str.endswith(ACCEPTED_EXTENSIONS):
             raise FileTypeError()
 
 
+def detect_encoding(prefix: bytes) -> str:
+    """
+    Name the encoding of a yaml stream from its first 4 bytes, as the yaml spec does
+    through the byte order mark. Streams without BOM are utf-8
+    """
+    if prefix.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)):
+        return 'utf-32'
+
+    if prefix.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+
+    if prefix.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+
+    return 'utf-8'
+
+
+def compression_opener(filepath: PathLikeObj) -> Union[None, Callable]:
+    """
+    Function opening a compressed file, picked from its last suffix, or None
+    """
+    for compression, opener in COMPRESSION_OPENERS.items():
+        if str(filepath).endswith(compression):
+            return opener
+
+    return None
+
+
+def _decodable(stream: BinaryIO, prefix: Union[None, bytes] = None) -> BinaryIO:
+    """
+    pyyaml decodes utf-8 and utf-16 itself; utf-32 streams are wrapped in an
+    incremental decoder. The BOM is peeked, so nothing is consumed from the stream
+    """
+    if prefix is None:
+        prefix = stream.peek(4)[:4] if hasattr(stream, 'peek') else b''
+
+    if detect_encoding(prefix) == 'utf-32':
+        return codecs.getreader('utf-32')(stream)
+
+    return stream
+
+
+class _MappedStream:
+    """
+    Read-only file-like view over a memory-mapped file. The parser pulls small chunks
+    through read(), and pages already consumed are handed back to the kernel, so the
+    resident memory does not grow with the file size
+    """
+    release_every: int = 1024 * 1024
+
+    def __init__(self, buffer: mmap.mmap, name: str):
+        self._buffer: mmap.mmap = buffer
+        self._position: int = 0
+        self._released: int = 0
+        self.name: str = name
+
+    def read(self, size: int = -1) -> bytes:
+        start: int = self._position
+        end: int = len(self._buffer) if size < 0 else min(start + size, len(self._buffer))
+        self._position = end
+        chunk: bytes = self._buffer[start:end]
+        if end - self._released >= self.release_every:
+            self._release(end)
+
+        return chunk
+
+    def _release(self, end: int) -> None:
+        boundary: int = end - end % mmap.PAGESIZE
+        advice: Union[None, int] = getattr(mmap, 'MADV_DONTNEED', None)
+        if advice is not None and boundary > self._released:
+            self._buffer.madvise(advice, self._released, boundary - self._released)
+
+        self._released = boundary
+
+
 class PyYamlReader(AbstractReader):
     """
-    Implement a reader using third-party library pyyaml
+    Implement a reader using third-party library pyyaml.
+
+    Files are read in binary mode (memory-mapped if use_mmap is True) and the parser
+    decodes them chunk by chunk: no decoded copy of the whole file is made.
     """
+    loader: type = yaml.SafeLoader
+
+    def __init__(self, use_mmap: bool = False, *args, **kwargs):
+        AbstractReader.__init__(self, *args, **kwargs)
+        self.use_mmap: bool = use_mmap
+
     def load(self, filepath: PathLikeObj) -> List:
+        files: List = []
+        for file in self.iter_documents(filepath):
+            files.append(file)
+
+        return files
+
+    def iter_documents(self, filepath: PathLikeObj) -> Iterator:
+        """
+        The extension is checked eagerly; documents are then parsed and yielded
+        one by one, so only the current one is held in memory
+        """
         self._validate_extension(filepath)
+        return self._iter_file(filepath)
+
+    def load_stream(self, stream: BinaryIO) -> List:
+        """
+        Parse the documents of an already opened binary stream, e.g. an archive member
+        """
         files: List = []
-        with open(filepath, 'r') as f:
-            content: Generator = yaml.safe_load_all(f)
-            for file in content:
-                files.append(file)
+        for file in self._iter_stream(_decodable(stream)):
+            files.append(file)
 
         return files
 
+    def _iter_file(self, filepath: PathLikeObj) -> Generator:
+        with self._open_stream(filepath) as f:
+            for file in self._iter_stream(f):
+                yield file
+
+    def _iter_stream(self, stream: BinaryIO) -> Generator:
+        content: Generator = yaml.load_all(stream, Loader=self.loader)
+        for file in content:
+            yield file
+
+    @contextmanager
+    def _open_stream(self, filepath: PathLikeObj) -> Iterator:
+        """
+        Binary stream for the parser. utf-8 and utf-16 are decoded by pyyaml itself;
+        utf-32, which pyyaml does not know, goes through an incremental decoder.
+        Compressed files are decompressed chunk by chunk as the parser reads them
+        """
+        opener: Union[None, Callable] = compression_opener(filepath)
+        if opener is not None:
+            with opener(filepath, 'rb') as f:
+                yield _decodable(f)
+
+            return None
 
+        with open(filepath, 'rb') as f:
+            buffer: Union[None, mmap.mmap] = None
+            if self.use_mmap:
+                try:
+                    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+                except (ValueError, OSError):
+                    #Empty files and special files cannot be mapped
+                    buffer = None
+
+            try:
+                if buffer is not None:
+                    yield _decodable(_MappedStream(buffer, str(filepath)), buffer[:4])
+
+                else:
+                    yield _decodable(f)
+
+            finally:
+                if buffer is not None:
+                    buffer.close()
+
+
+class LibYamlReader(PyYamlReader):
+    """
+    Implement a reader using pyyaml's C bindings to LibYAML. Scanning, parsing and
+    composing run in C, whereas construction keeps the safe constructor, so the
+    returned documents are the same ones PyYamlReader would return.
+    """
+    loader: type = CSafeLoader
+
+    def __init__(self, *args, **kwargs):
+        if not LIBYAML_AVAILABLE:
+            raise LibYamlNotAvailable()
+
+        PyYamlReader.__init__(self, *args, **kwargs)
+
+
+def get_reader() -> AbstractReader:
+    """
+    Return the fastest reader available: LibYamlReader if pyyaml was built
+    against LibYAML, PyYamlReader otherwise
+    """
+    if LIBYAML_AVAILABLE:
+        return LibYamlReader()
 
+    return PyYamlReader()
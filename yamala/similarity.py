@@ -0,0 +1,142 @@
+"""
+Pairwise similarity between the input files, computed from their presence matrices
+"""
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+from .converters import unique_name
+from .matrix import PresenceMatrix, SparseMatrix, iter_set_bits, popcount
+
+#Name of the sheet added by add_similarity_sheet
+SIMILARITY_SHEET: str = 'similarity'
+METRICS: Tuple[str, ...] = ('jaccard', 'overlap')
+#Decimals kept in the similarity sheet
+PRECISION: int = 4
+#Rough cost of a Counter update, in 64-bit AND + popcount word operations
+_COUNTER_COST: int = 8
+
+
+def file_bitsets(
+        sheets: Dict[str, Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]]
+) -> Tuple[List[str], List[int]]:
+    """
+    Headers of the files, and one bitset per file holding its presence in every row of
+    every sheet. The sheets are laid one after the other, each padded to whole bytes
+    so that a file's bitset is a plain concatenation of its column bytes
+    """
+    headers: List[str] = []
+    chunks: List[List[bytes]] = []
+    for sheet in sheets.values():
+        matrix: PresenceMatrix = _as_bitset(sheet)
+        if not headers:
+            headers = list(matrix.headers)
+            chunks = [[] for _ in headers]
+
+        size: int = (len(matrix.rows) + 7) // 8
+        for position, bits in enumerate(matrix.columns):
+            chunks[position].append(bits.to_bytes(size, 'little'))
+
+    return headers, [int.from_bytes(b''.join(parts), 'little') for parts in chunks]
+
+
+def similarity_matrix(
+        sheets: Dict[str, Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]],
+        metric: str = 'jaccard'
+) -> Dict[str, Union[List, Dict]]:
+    """
+    Similarity of every pair of files, as a sheet whose rows and columns are the files:
+        - jaccard: shared items / items in either file
+        - overlap: shared items / items in the smaller file
+
+    The shared items of every pair are counted in bulk, whichever way is cheaper for
+    the density of the matrix (see _shared_items). Only the upper triangle is
+    computed, since both metrics are symmetric.
+    """
+    if metric not in METRICS:
+        raise ValueError('metric must be one of ' + ', '.join(METRICS))
+
+    headers, bitsets = file_bitsets(sheets)
+    counts: List[int] = [popcount(bits) for bits in bitsets]
+    values: List[List[float]] = [[0.0] * len(headers) for _ in headers]
+    for first, shared in enumerate(_shared_items(bitsets, counts)):
+        row: List[float] = values[first]
+        row[first] = 1.0
+        for second, common in shared:
+            if metric == 'jaccard':
+                total: int = counts[first] + counts[second] - common
+
+            else:
+                total = min(counts[first], counts[second])
+
+            row[second] = values[second][first] = round(common / total, PRECISION)
+
+    #Files without any item are alike
+    empty: List[int] = [position for position, count in enumerate(counts) if not count]
+    for first in empty:
+        for second in empty:
+            values[first][second] = 1.0
+
+    return {'rows': list(headers), 'columns': dict(zip(headers, values))}
+
+
+def _shared_items(bitsets: List[int], counts: List[int]) -> Iterator[Iterable[Tuple[int, int]]]:
+    """
+    For every file, the (following file, shared items) pairs with at least one item in
+    common. Two ways are available, and the cheapest one for the matrix is used:
+        - dense: AND and popcount of the file bitset against each following one, all
+          mapped in C. It costs files^2 / 2 * rows / 64 word operations.
+        - sparse: count, with a Counter, the files holding each item of the file. It
+          costs sum(files holding an item ^ 2), about ones^2 / rows Counter updates.
+    """
+    size: int = max((bits.bit_length() for bits in bitsets), default=0)
+    ones: int = sum(counts)
+    dense_cost: float = len(bitsets) ** 2 / 2 * (size / 64 + 1)
+    sparse_cost: float = _COUNTER_COST * ones ** 2 / max(size, 1)
+    if dense_cost <= sparse_cost:
+        for first, first_bits in enumerate(bitsets):
+            shared: List[int] = list(map(popcount, map(first_bits.__and__, bitsets[first + 1:])))
+            yield [(second, common) for second, common in enumerate(shared, start=first + 1) if common]
+
+        return None
+
+    holders: Dict[int, List[int]] = {}
+    items: List[List[int]] = [list(iter_set_bits(bits)) for bits in bitsets]
+    for position, rows in enumerate(items):
+        for row in rows:
+            holders.setdefault(row, []).append(position)
+
+    for first, rows in enumerate(items):
+        common: Counter = Counter(chain.from_iterable(map(holders.__getitem__, rows)))
+        yield sorted((second, shared) for second, shared in common.items() if second > first)
+
+
+def add_similarity_sheet(
+        sheets: Dict[str, Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]],
+        metric: str = 'jaccard',
+        measured: Union[None, Dict[str, Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]]] = None
+) -> Dict[str, Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]]:
+    """
+    Copy of sheets with the similarity sheet appended, renamed if an attribute already
+    took its name. The similarity is measured on sheets, or on measured when given
+    (e.g. the full matrix, when sheets only hold the differences)
+    """
+    result: Dict = dict(sheets)
+    result[unique_name(SIMILARITY_SHEET, set(sheets))] = similarity_matrix(
+        sheets if measured is None else measured, metric
+    )
+    return result
+
+
+def _as_bitset(sheet: Union[Dict[str, Union[List, Dict]], PresenceMatrix, SparseMatrix]) -> PresenceMatrix:
+    if isinstance(sheet, PresenceMatrix):
+        return sheet
+
+    if isinstance(sheet, SparseMatrix):
+        hits: List[List[int]] = [[] for _ in sheet.headers]
+        for row, column in sheet.iter_nonzero():
+            hits[column].append(row)
+
+        return PresenceMatrix.from_hits(sheet.rows, sheet.headers, hits, sheet.labels)
+
+    return PresenceMatrix.from_dict(sheet)
@@ -1 +1,3 @@
 from .writer import *
+from .xlsx import *
+from .delimited import *
@@ -0,0 +1,101 @@
+"""
+Delimited text writers: one csv or tsv file per sheet, for consumers that diff the
+result in scripts
+"""
+from pathlib import Path
+from typing import Dict, Iterator, List, TextIO, Tuple, Union
+import csv
+
+from ..matrix import PresenceMatrix, SparseMatrix
+from .writer import AbstractWriter, PathLikeObj
+
+
+class CsvWriter(AbstractWriter):
+    """
+    Writer that stores every sheet as a delimited text file, streamed row by row:
+    a header row (an empty corner, then the column headers) followed by a row per
+    label. Every value is written, zeros of a SparseMatrix included, since there is
+    no formatting to tell a blank cell apart.
+
+    Files are named after the file name given to save and the sheet name,
+    name_sheet.csv, in folderpath. With bundle=True they are stored as sheet.csv in a
+    folder named after the file name instead. Sheet names are cleaned as the xlsx
+    writers do, except for the 31 characters limit, which only Excel has.
+    """
+    delimiter: str = ','
+    extension: str = '.csv'
+
+    def __init__(self, folderpath: PathLikeObj, bundle: bool = False):
+        AbstractWriter.__init__(self, folderpath)
+        self.bundle: bool = bundle
+        self._input: Union[None, Dict[str, Union[Dict[str, Union[Dict, List]], PresenceMatrix, SparseMatrix]]] = None
+        self._sheets: List[Tuple[str, Union[Dict[str, Union[Dict, List]], PresenceMatrix, SparseMatrix]]] = []
+
+    def process(self, inputs: Dict[str, Dict[str, Union[Dict, List]]]) -> None:
+        """
+        input must have the following structure:
+
+            {
+                'sheet1_name: {
+                        'rows': ['row1_text', 'row2_text' ...],
+                        'columns: {
+                                'column1_header': [row1_col1_value, row2_col1_value, ...],
+                                'column2_header: ...
+                        }
+                },
+                'sheet2_name: ...
+            }
+
+        A sheet may also be given as a PresenceMatrix or a SparseMatrix. Nothing is
+        written until save is called.
+        """
+        self._input = inputs
+
+        self._validate_input()
+
+        self._sheets = []
+        names: List[str] = []
+        for sheet in self._input:
+            clean_name: str = self._clear_file_name(self._clear_sheet_name(sheet))
+            names.append(self._generate_worksheet_name(clean_name, names))
+            self._sheets.append((names[-1], self._input[sheet]))
+
+    def save(self, filename: str) -> None:
+        filename: str = self._clear_file_name(filename)
+        folder: Path = self.folderpath
+        if self.bundle:
+            folder = folder / filename
+            folder.mkdir(exist_ok=True)
+
+        for name, content in self._sheets:
+            target: str = name if self.bundle else '{}_{}'.format(filename, name)
+            with open(folder / (target + self.extension), 'w', newline='', encoding='utf-8') as stream:
+                self._write_sheet(stream, content)
+
+    def _write_sheet(
+            self,
+            stream: TextIO,
+            content: Union[Dict[str, Union[Dict, List]], PresenceMatrix, SparseMatrix]
+    ) -> None:
+        headers, rows = self._iter_delimited_rows(content)
+        writer = csv.writer(stream, delimiter=self.delimiter, lineterminator='\n')
+        writer.writerow([''] + headers)
+        writer.writerows([label] + values for label, values in rows)
+
+    def _iter_delimited_rows(
+            self,
+            sheet: Union[Dict[str, Union[Dict, List]], PresenceMatrix, SparseMatrix]
+    ) -> Tuple[List[str], Iterator[Tuple]]:
+        if isinstance(sheet, SparseMatrix):
+            #Zeros are written, not left blank
+            return list(sheet.headers), sheet.iter_rows()
+
+        return self._iter_sheet_rows(sheet)
+
+
+class TsvWriter(CsvWriter):
+    """
+    Same as CsvWriter, with tab-separated values
+    """
+    delimiter: str = '\t'
+    extension: str = '.tsv'
@@ -3,19 +3,28 @@ Module for Writer classes
 """
 import abc
 from openpyxl.formatting.rule import CellIsRule, Rule
-from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
 from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.cell import Cell, WriteOnlyCell
 from openpyxl.workbook.workbook import Workbook
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+from openpyxl.worksheet.dimensions import ColumnDimension
 from openpyxl.worksheet.worksheet import Worksheet
 from pathlib import Path
 from typing import Dict, Iterable, Iterator, List, Union, Tuple, TypeVar
 
+from ..matrix import PresenceMatrix, SparseMatrix
+
 PathLikeObj = TypeVar('PathLikeObj', str, Path)
 
 
 class ConditionalTableStyle:
 
     pixels_per_letter: float = 1.5
+    #Widest column Excel accepts, in characters
+    max_width: float = 255
+    column_header_name: str = 'yamala column header'
+    row_header_name: str = 'yamala row header'
 
     def __init__(self, anchor:str, row_header: bool = True):
         self._anchor_column: int = column_index_from_string(self._get_column_text(anchor))
@@ -61,19 +70,81 @@ class ConditionalTableStyle:
         self._anchor = value
 
     def apply(self, sheet: Worksheet, max_row: int, max_column: int) -> None:
+        """
+        Style the headers of a table whose values end at max_row and max_column, in a
+        single pass over the header cells, and size its columns to their labels
+        """
+        column_style, row_style = self.register(sheet.parent)
+        lengths: Dict[int, int] = {}
         for col_num in range(self._anchor_column, max_column + 1):
-            sheet.cell(self._anchor_row, col_num).font = self.font_style
-            sheet.cell(self._anchor_row, col_num).alignment = self.column_header_alignment
-            sheet.cell(self._anchor_row, col_num).fill = self.column_header_fill
+            cell: Cell = sheet.cell(self._anchor_row, col_num)
+            cell.style = column_style
+            lengths[col_num] = self._letters(cell.value)
+
+        for row_num in range(self._anchor_row, max_row + 1):
+            cell = sheet.cell(row_num, self._anchor_column)
+            if self.row_header:
+                cell.style = row_style
+
+            lengths[self._anchor_column] = max(lengths[self._anchor_column], self._letters(cell.value))
+
+        self.fit_columns(sheet, lengths)
+        self.format_values(sheet, max_row, max_column)
+
+    def register(self, workbook: Workbook) -> Tuple[str, str]:
+        """
+        Names of the column and row header styles, which are added to the workbook as
+        named styles the first time. A cell then takes its font, alignment and fill in
+        a single assignment, and the workbook stores each combination once
+        """
+        for name, alignment, fill in (
+                (self.column_header_name, self.column_header_alignment, self.column_header_fill),
+                (self.row_header_name, self.row_header_alignment, self.row_header_fill)
+        ):
+            if name not in workbook.named_styles:
+                workbook.add_named_style(NamedStyle(name=name, font=self.font_style, alignment=alignment, fill=fill))
+
+        return self.column_header_name, self.row_header_name
+
+    def header_cell(self, sheet: WriteOnlyWorksheet, value, row_header: bool = False) -> WriteOnlyCell:
+        """
+        Cell of a write-only sheet styled as a header, since its cells cannot be styled
+        once appended. register must have been called for the workbook of sheet
+        """
+        cell: WriteOnlyCell = WriteOnlyCell(sheet, value)
+        cell.style = self.row_header_name if row_header else self.column_header_name
+        return cell
 
-            #Enable column width autofit:
-            sheet.column_dimensions[get_column_letter(col_num)].bestFit = True
+    def column_lengths(self, headers: Iterable, labels: Iterable) -> Dict[int, int]:
+        """
+        Letters of the longest label of every column of a table, by column number
+        """
+        lengths: Dict[int, int] = {self._anchor_column: max(map(self._letters, labels), default=0)}
+        for col_num, header in enumerate(headers, start=self._anchor_column + 1):
+            lengths[col_num] = self._letters(header)
 
-        if self.row_header:
-            for row_num in range(self._anchor_row, max_row + 1):
-                sheet.cell(row_num, self._anchor_column).font = self.font_style
-                sheet.cell(row_num, self._anchor_column).alignment = self.row_header_alignment
-                sheet.cell(row_num, self._anchor_column).fill = self.row_header_fill
+        return lengths
+
+    def fit_columns(self, sheet: Union[Worksheet, WriteOnlyWorksheet], lengths: Dict[int, int]) -> None:
+        """
+        Size every column to its longest label, given in letters by column number.
+        Write-only sheets need it before their first row
+        """
+        for col_num, letters in lengths.items():
+            dimension: ColumnDimension = sheet.column_dimensions[get_column_letter(col_num)]
+            dimension.width = self.column_width(letters)
+            dimension.bestFit = True
+
+    def column_width(self, letters: int) -> float:
+        return min(self.max_width, max(letters, 1) * self.pixels_per_letter)
+
+    def format_values(self, sheet: Union[Worksheet, WriteOnlyWorksheet], max_row: int, max_column: int) -> None:
+        """
+        Add the 0/1 conditional formatting to the values below and right of the headers
+        """
+        if max_row <= self._anchor_row or max_column <= self._anchor_column:
+            #Headers only, there are no values to format
+            return None
 
         initial_cell_ref: str = get_column_letter(self._anchor_column + 1) + str(self._anchor_row + 1)
         final_cell_ref: str = get_column_letter(max_column) + str(max_row)
@@ -81,6 +152,10 @@ class ConditionalTableStyle:
         sheet.conditional_formatting.add(full_ref, self.true_format)
         sheet.conditional_formatting.add(full_ref, self.false_format)
 
+    @staticmethod
+    def _letters(value) -> int:
+        return 0 if value is None else len(str(value))
+
     @staticmethod
     def _get_row_int(cell_ref: str) -> int:
         row_substring: str = ''
@@ -132,76 +207,64 @@ class AbstractWriter(abc.ABC):
     @abc.abstractmethod
     def save(self, filename: str) -> None:
         """
-        filename will not require extension, since any saved must be .xlsx
+        filename will not require extension, since every writer adds the one of its format
         """
         return NotImplemented()
 
-
-class OpenxlpyWriter(AbstractWriter):
-
-    def __init__(self, folderpath: PathLikeObj):
-        AbstractWriter.__init__(self, folderpath)
-        self.workbook: Workbook = Workbook()
-        self._input: Union[None, Dict[str, Dict[str, Union[Dict, List]]]] = None
-        self._style: ConditionalTableStyle = ConditionalTableStyle(anchor='A1', row_header=True)
-
-    def process(self, inputs: Dict[str, Dict[str, Union[Dict, List]]]) -> None:
+    @staticmethod
+    def _iter_sheet_rows(
+            sheet: Union[Dict[str, Union[Dict, List]], PresenceMatrix, SparseMatrix]
+    ) -> Tuple[List[str], Iterator[Tuple]]:
         """
-        input must have the following structure:
+        Column headers of a sheet, and (row label, list of the row values) in row order,
+        whatever its representation. Zeros of a SparseMatrix are left blank (None)
+        """
+        if isinstance(sheet, PresenceMatrix):
+            return list(sheet.headers), sheet.iter_rows()
 
-            {
-                'sheet1_name: {
-                        'rows': ['row1_text', 'row2_text' ...],
-                        'columns: {
-                                'column1_header': [row1_col1_value, row2_col1_value, ...],
-                                'column2_header: ...
-                        }
-                },
-                'sheet2_name: ...
-            }
+        if isinstance(sheet, SparseMatrix):
+            return list(sheet.headers), AbstractWriter._iter_sparse_rows(sheet)
 
-        """
-        self._input = inputs
+        columns: Dict[str, List] = sheet['columns']
+        if not columns:
+            return [], ((label, []) for label in sheet['rows'])
 
-        self._validate_input()
+        return list(columns), zip(sheet['rows'], map(list, zip(*columns.values())))
 
-        #By default, a workbook instance holds a worksheet called 'Sheet'
-        self.workbook.remove(self.workbook.worksheets[0])
-        for index, sheet in enumerate(self._input):
-            clean_name: str = self._clear_sheet_name(sheet)
-            #A sheet's name have a maximum of 31 characters:
-            unique_name: str = self._generate_worksheet_name(clean_name[-31:], self.workbook.sheetnames)
-            current_sheet: Worksheet = self.workbook.create_sheet(title=unique_name, index=index)
-            #Build vertical axis
-            for row_number, row_content in enumerate(self._input[sheet]['rows'], start=2):
-                current_sheet.cell(row_number, 1, row_content)
+    @staticmethod
+    def _iter_row_labels(sheet: Union[Dict[str, Union[Dict, List]], PresenceMatrix, SparseMatrix]) -> Iterable:
+        if isinstance(sheet, (PresenceMatrix, SparseMatrix)):
+            return sheet.iter_row_labels()
 
-            #Build columns' headers and content
-            for col_number, header in enumerate(self._input[sheet]['columns'], start=2):
-                #Header
-                current_sheet.cell(1, col_number, header)
-                for row, row_content in enumerate(self._input[sheet]['columns'][header], start=2):
-                    current_sheet.cell(row, col_number, row_content)
+        return sheet['rows']
 
-            self._style.apply(current_sheet, row_number, col_number)
+    @staticmethod
+    def _iter_sparse_rows(matrix: SparseMatrix) -> Iterator[Tuple]:
+        width: int = len(matrix.headers)
+        for position, label in enumerate(matrix.iter_row_labels()):
+            values: List = [None] * width
+            for column in matrix.row_columns(position):
+                values[column] = 1
 
-    def save(self, filename: str) -> None:
-        filename: str = self._clear_file_name(filename)
-        final_path: Path = self.folderpath / filename
-        self.workbook.save(final_path.with_suffix('.xlsx'))
+            yield label, values
 
     def _validate_input(self) -> None:
         if isinstance(self._input, Dict):
             if len(self._input) > 0:
                 if all(
                         map(
-                            lambda v: isinstance(v, Dict),
+                            lambda v: isinstance(v, (Dict, PresenceMatrix, SparseMatrix)),
                             self._input.values()
                         )
                 ):
                     all_sheets_validated: bool = False
                     for sheet in self._input:
                         all_sheets_validated = False
+                        if isinstance(self._input[sheet], (PresenceMatrix, SparseMatrix)):
+                            #Its shape is checked when it is built
+                            all_sheets_validated = True
+                            continue
+
                         try:
                             rows = self._input[sheet]['rows']
                             columns = self._input[sheet]['columns']
@@ -235,7 +298,7 @@ class OpenxlpyWriter(AbstractWriter):
             return name.lower()
 
         else:
-            return OpenxlpyWriter._generate_worksheet_name(
+            return AbstractWriter._generate_worksheet_name(
                                         name.lower() + '_' + str(recursion_level),
                                         current_sheets,
                                         recursion_level + 1
@@ -260,3 +323,108 @@ class OpenxlpyWriter(AbstractWriter):
             name = name.replace(value, '_')
 
         return name
+
+
+class OpenxlpyWriter(AbstractWriter):
+    """
+    With write_only=True the workbook is a write-only one: rows are appended in order
+    and flushed to disk as they go, instead of keeping a Cell object for every cell,
+    so memory stays flat however large the sheets are. The output is the same, header
+    styles and conditional formatting included, but the sheets cannot be read back
+    from the workbook, and it can only be saved once.
+    """
+    def __init__(self, folderpath: PathLikeObj, write_only: bool = False):
+        AbstractWriter.__init__(self, folderpath)
+        self.write_only: bool = write_only
+        self.workbook: Workbook = Workbook(write_only=write_only)
+        self._input: Union[None, Dict[str, Dict[str, Union[Dict, List]]]] = None
+        self._style: ConditionalTableStyle = ConditionalTableStyle(anchor='A1', row_header=True)
+
+    def process(self, inputs: Dict[str, Dict[str, Union[Dict, List]]]) -> None:
+        """
+        input must have the following structure:
+
+            {
+                'sheet1_name: {
+                        'rows': ['row1_text', 'row2_text' ...],
+                        'columns: {
+                                'column1_header': [row1_col1_value, row2_col1_value, ...],
+                                'column2_header: ...
+                        }
+                },
+                'sheet2_name: ...
+            }
+
+        A sheet may also be given as a PresenceMatrix, whose bitsets are read directly,
+        or as a SparseMatrix, of which only the ones are written: blank cells still match
+        the '== 0' rule of the conditional formatting. Matrices holding label codes are
+        decoded through their LabelTable while the rows are written.
+        """
+        self._input = inputs
+
+        self._validate_input()
+
+        #By default, a workbook instance holds a worksheet called 'Sheet' (write-only ones hold none)
+        if not self.write_only:
+            self.workbook.remove(self.workbook.worksheets[0])
+
+        for index, sheet in enumerate(self._input):
+            clean_name: str = self._clear_sheet_name(sheet)
+            #A sheet's name have a maximum of 31 characters:
+            unique_name: str = self._generate_worksheet_name(clean_name[-31:], self.workbook.sheetnames)
+            current_sheet: Worksheet = self.workbook.create_sheet(title=unique_name, index=index)
+            if self.write_only:
+                self._stream_sheet(current_sheet, self._input[sheet])
+                continue
+
+            if isinstance(self._input[sheet], SparseMatrix):
+                self._write_sparse(current_sheet, self._input[sheet])
+                continue
+
+            #Whole rows are appended, which skips the cell lookup of every value
+            headers, rows = self._iter_sheet_rows(self._input[sheet])
+            current_sheet.append([None] + headers)
+            #Sheets may come without rows, e.g. when no list item differs between files
+            row_number: int = 1
+            for row_number, (label, values) in enumerate(rows, start=2):
+                values.insert(0, label)
+                current_sheet.append(values)
+
+            self._style.apply(current_sheet, row_number, len(headers) + 1)
+
+    def save(self, filename: str) -> None:
+        filename: str = self._clear_file_name(filename)
+        final_path: Path = self.folderpath / filename
+        self.workbook.save(final_path.with_suffix('.xlsx'))
+
+    def _write_sparse(self, sheet: Worksheet, matrix: SparseMatrix) -> None:
+        for row_number, row_content in enumerate(matrix.iter_row_labels(), start=2):
+            sheet.cell(row_number, 1, row_content)
+
+        for col_number, header in enumerate(matrix.headers, start=2):
+            sheet.cell(1, col_number, header)
+
+        for row, column in matrix.iter_nonzero():
+            sheet.cell(row + 2, column + 2, 1)
+
+        self._style.apply(sheet, len(matrix.rows) + 1, len(matrix.headers) + 1)
+
+    def _stream_sheet(
+            self,
+            sheet: WriteOnlyWorksheet,
+            content: Union[Dict[str, Union[Dict, List]], PresenceMatrix, SparseMatrix]
+    ) -> None:
+        headers, rows = self._iter_sheet_rows(content)
+        style: ConditionalTableStyle = self._style
+        style.register(self.workbook)
+        style.fit_columns(sheet, style.column_lengths(headers, self._iter_row_labels(content)))
+        sheet.append(
+            [style.header_cell(sheet, None, row_header=style.row_header)]
+            + [style.header_cell(sheet, header) for header in headers]
+        )
+        row_number: int = 1
+        for row_number, (label, values) in enumerate(rows, start=2):
+            values.insert(0, style.header_cell(sheet, label, row_header=True) if style.row_header else label)
+            sheet.append(values)
+
+        style.format_values(sheet, row_number, len(headers) + 1)
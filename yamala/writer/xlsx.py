@@ -0,0 +1,371 @@
+"""
+Direct xlsx serializer: SpreadsheetML written straight into the zip container
+"""
+from copy import copy
+from datetime import date, datetime
+from math import isfinite
+from openpyxl.formatting.rule import Rule
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.datetime import to_excel
+from openpyxl.xml.functions import tostring
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Tuple, Union
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+
+from ..matrix import PresenceMatrix, SparseMatrix
+from .writer import AbstractWriter, ConditionalTableStyle, PathLikeObj
+
+_XML_DECLARATION: str = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN_NS: str = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS: str = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PACKAGE_REL_NS: str = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_CONTENT_TYPE: str = 'application/vnd.openxmlformats-officedocument.spreadsheetml.{}+xml'
+#Characters XML 1.0 does not allow, which Excel escapes as _xHHHH_
+_ILLEGAL_CHARACTERS = re.compile('[\\x00-\\x08\\x0b\\x0c\\x0e-\\x1f\\ufffe\\uffff]')
+#XML pieces buffered before they are written to the zip member
+_CHUNK_SIZE: int = 16384
+
+#Indexes of the cellXfs written by _styles
+_PLAIN: int = 0
+_COLUMN_HEADER: int = 1
+_ROW_HEADER: int = 2
+_ROW_HEADER_DATE: int = 3
+_ROW_HEADER_DATETIME: int = 4
+_DATE: int = 5
+_DATETIME: int = 6
+
+
+class XlsxStreamWriter(AbstractWriter):
+    """
+    Writer that produces the same workbook as OpenxlpyWriter without building any
+    openpyxl object: process only validates the sheets and names them, and save
+    streams the XML of every sheet, row by row, to a temporary file that is then
+    deflated into the xlsx zip.
+
+    Strings (row labels and headers) go to a shared-strings table, so each one is
+    stored once in the file. Header styles, column widths and the 0/1 conditional
+    formatting come from the same ConditionalTableStyle as OpenxlpyWriter's, so both
+    outputs look alike. Dates become Excel serial numbers with a date format, as
+    openpyxl writes them.
+    """
+    def __init__(self, folderpath: PathLikeObj):
+        AbstractWriter.__init__(self, folderpath)
+        self._input: Union[None, Dict[str, Union[Dict[str, Union[Dict, List]], PresenceMatrix, SparseMatrix]]] = None
+        self._sheets: List[Tuple[str, Union[Dict[str, Union[Dict, List]], PresenceMatrix, SparseMatrix]]] = []
+        self._style: ConditionalTableStyle = ConditionalTableStyle(anchor='A1', row_header=True)
+        self._strings: Dict[str, int] = {}
+
+    def process(self, inputs: Dict[str, Dict[str, Union[Dict, List]]]) -> None:
+        """
+        input must have the following structure:
+
+            {
+                'sheet1_name: {
+                        'rows': ['row1_text', 'row2_text' ...],
+                        'columns: {
+                                'column1_header': [row1_col1_value, row2_col1_value, ...],
+                                'column2_header: ...
+                        }
+                },
+                'sheet2_name: ...
+            }
+
+        A sheet may also be given as a PresenceMatrix or a SparseMatrix, of which only
+        the ones are written. Nothing is serialized until save is called.
+        """
+        self._input = inputs
+
+        self._validate_input()
+
+        self._sheets = []
+        names: List[str] = []
+        for sheet in self._input:
+            clean_name: str = self._clear_sheet_name(sheet)
+            #A sheet's name have a maximum of 31 characters:
+            names.append(self._generate_worksheet_name(clean_name[-31:], names))
+            self._sheets.append((names[-1], self._input[sheet]))
+
+    def save(self, filename: str) -> None:
+        filename: str = self._clear_file_name(filename)
+        final_path: Path = (self.folderpath / filename).with_suffix('.xlsx')
+        self._strings = {}
+        with zipfile.ZipFile(final_path, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            for number, (_, content) in enumerate(self._sheets, start=1):
+                self._write_member(archive, 'xl/worksheets/sheet{}.xml'.format(number), content)
+
+            archive.writestr('xl/sharedStrings.xml', self._shared_strings())
+            archive.writestr('xl/styles.xml', self._styles())
+            archive.writestr('xl/workbook.xml', self._workbook())
+            archive.writestr('xl/_rels/workbook.xml.rels', self._workbook_relationships())
+            archive.writestr('_rels/.rels', self._package_relationships())
+            archive.writestr('[Content_Types].xml', self._content_types())
+
+    # #### Worksheets
+    def _write_member(
+            self,
+            archive: zipfile.ZipFile,
+            name: str,
+            content: Union[Dict[str, Union[Dict, List]], PresenceMatrix, SparseMatrix]
+    ) -> None:
+        """
+        The sheet is spooled to a temporary file first, so that its size is known
+        when the member is added: zipfile then only writes zip64 headers for members
+        that need them. Excel asks to repair files whose local headers are zip64
+        while their central directory entries are not
+        """
+        with tempfile.TemporaryFile() as spool:
+            self._write_sheet(spool, content)
+            info: zipfile.ZipInfo = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o600 << 16
+            info.file_size = spool.tell()
+            spool.seek(0)
+            with archive.open(info, 'w') as member:
+                shutil.copyfileobj(spool, member, 1024 * 1024)
+
+    def _write_sheet(
+            self,
+            member: BinaryIO,
+            content: Union[Dict[str, Union[Dict, List]], PresenceMatrix, SparseMatrix]
+    ) -> None:
+        headers, rows = self._iter_sheet_rows(content)
+        style: ConditionalTableStyle = self._style
+        row_count: int = len(content.rows if isinstance(content, (PresenceMatrix, SparseMatrix)) else content['rows'])
+        max_column: int = len(headers) + 1
+        letters: List[str] = [get_column_letter(number) for number in range(1, max_column + 1)]
+
+        chunk: List[str] = [
+            _XML_DECLARATION,
+            '<worksheet xmlns="{}" xmlns:r="{}">'.format(_MAIN_NS, _REL_NS),
+            '<dimension ref="A1:{}{}"/>'.format(letters[-1], row_count + 1),
+            self._columns(style.column_lengths(headers, self._iter_row_labels(content))),
+            '<sheetData>',
+            '<row r="1">',
+            self._cell('A1', None, _ROW_HEADER if style.row_header else _COLUMN_HEADER)
+        ]
+        for letter, header in zip(letters[1:], headers):
+            chunk.append(self._cell(letter + '1', header, _COLUMN_HEADER))
+
+        chunk.append('</row>')
+        for row_number, (label, values) in enumerate(rows, start=2):
+            row: str = str(row_number)
+            chunk.append('<row r="{}">'.format(row))
+            chunk.append(self._cell('A' + row, label, self._label_style(label)))
+            for letter, value in zip(letters[1:], values):
+                if value.__class__ is int:
+                    #Presence values, by far the most frequent cells
+                    chunk.append('<c r="{}{}"><v>{}</v></c>'.format(letter, row, value))
+
+                elif value is not None:
+                    chunk.append(self._cell(letter + row, value, _PLAIN))
+
+            chunk.append('</row>')
+            if len(chunk) >= _CHUNK_SIZE:
+                member.write(''.join(chunk).encode('utf-8'))
+                chunk = []
+
+        chunk.append('</sheetData>')
+        chunk.append(self._conditional_formatting(row_count + 1, max_column))
+        chunk.append('</worksheet>')
+        member.write(''.join(chunk).encode('utf-8'))
+
+    def _columns(self, lengths: Dict[int, int]) -> str:
+        columns: List[str] = [
+            '<col min="{0}" max="{0}" width="{1}" bestFit="1" customWidth="1"/>'.format(
+                number, self._style.column_width(letters)
+            )
+            for number, letters in sorted(lengths.items())
+        ]
+        return '<cols>{}</cols>'.format(''.join(columns))
+
+    def _conditional_formatting(self, max_row: int, max_column: int) -> str:
+        """
+        Same rules ConditionalTableStyle.format_values adds, pointing at the dxfs of
+        _styles
+        """
+        if max_row <= 1 or max_column <= 1:
+            #Headers only, there are no values to format
+            return ''
+
+        rules: List[str] = []
+        for priority, rule in enumerate((self._style.true_format, self._style.false_format), start=1):
+            rules.append(self._rule(rule, dxf=priority - 1, priority=priority))
+
+        return '<conditionalFormatting sqref="B2:{}{}">{}</conditionalFormatting>'.format(
+            get_column_letter(max_column), max_row, ''.join(rules)
+        )
+
+    @staticmethod
+    def _rule(rule: Rule, dxf: int, priority: int) -> str:
+        rule = copy(rule)
+        rule.dxf = None
+        rule.dxfId = dxf
+        rule.priority = priority
+        return tostring(rule.to_tree()).decode('utf-8')
+
+    def _label_style(self, label) -> int:
+        if isinstance(label, datetime):
+            return _ROW_HEADER_DATETIME if self._style.row_header else _DATETIME
+
+        if isinstance(label, date):
+            return _ROW_HEADER_DATE if self._style.row_header else _DATE
+
+        return _ROW_HEADER if self._style.row_header else _PLAIN
+
+    def _cell(self, reference: str, value, style: int) -> str:
+        """
+        XML of a single cell. Strings are stored in the shared-strings table, and
+        cells without value are only written when they carry a style
+        """
+        styled: str = ' s="{}"'.format(style) if style else ''
+        if value is None:
+            return '<c r="{}"{}/>'.format(reference, styled) if style else ''
+
+        if isinstance(value, bool):
+            return '<c r="{}"{} t="b"><v>{:d}</v></c>'.format(reference, styled, value)
+
+        if isinstance(value, (int, float)) and isfinite(value):
+            return '<c r="{}"{}><v>{!r}</v></c>'.format(reference, styled, value)
+
+        if isinstance(value, date):
+            if style == _PLAIN:
+                styled = ' s="{}"'.format(_DATETIME if isinstance(value, datetime) else _DATE)
+
+            return '<c r="{}"{}><v>{!r}</v></c>'.format(reference, styled, to_excel(value))
+
+        text: str = str(value)
+        index: Union[None, int] = self._strings.get(text)
+        if index is None:
+            index = self._strings[text] = len(self._strings)
+
+        return '<c r="{}"{} t="s"><v>{}</v></c>'.format(reference, styled, index)
+
+    # #### Workbook parts
+    def _shared_strings(self) -> str:
+        items: List[str] = []
+        for text in self._strings:
+            preserve: str = ' xml:space="preserve"' if text != text.strip() else ''
+            items.append('<si><t{}>{}</t></si>'.format(preserve, _escape(text)))
+
+        return '{}<sst xmlns="{}" count="{}" uniqueCount="{}">{}</sst>'.format(
+            _XML_DECLARATION, _MAIN_NS, len(items), len(items), ''.join(items)
+        )
+
+    def _styles(self) -> str:
+        """
+        Default font and fills first, as Excel expects them, then the header ones. The
+        header xfs are registered as named styles too, with the names
+        ConditionalTableStyle.register gives them
+        """
+        style: ConditionalTableStyle = self._style
+        fonts: List[str] = ['<font><sz val="11"/><name val="Calibri"/></font>', _tree(style.font_style)]
+        fills: List[str] = [
+            '<fill><patternFill patternType="none"/></fill>',
+            '<fill><patternFill patternType="gray125"/></fill>',
+            _tree(style.column_header_fill),
+            _tree(style.row_header_fill)
+        ]
+        column_header: str = '<xf numFmtId="{{}}" fontId="1" fillId="2" borderId="0"{{}} applyFont="1" applyFill="1"' \
+                             ' applyAlignment="1"{{}}>{}</xf>'.format(_tree(style.column_header_alignment))
+        row_header: str = '<xf numFmtId="{{}}" fontId="1" fillId="3" borderId="0"{{}} applyFont="1" applyFill="1"' \
+                          ' applyAlignment="1"{{}}>{}</xf>'.format(_tree(style.row_header_alignment))
+        named: List[str] = [
+            '<xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>',
+            column_header.format(0, '', ''),
+            row_header.format(0, '', '')
+        ]
+        cells: List[str] = [
+            '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>',
+            column_header.format(0, ' xfId="1"', ''),
+            row_header.format(0, ' xfId="2"', ''),
+            row_header.format(14, ' xfId="2"', ' applyNumberFormat="1"'),
+            row_header.format(22, ' xfId="2"', ' applyNumberFormat="1"'),
+            '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>',
+            '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        ]
+        names: List[str] = [
+            '<cellStyle name="Normal" xfId="0" builtinId="0"/>',
+            '<cellStyle name="{}" xfId="1"/>'.format(_escape(style.column_header_name, True)),
+            '<cellStyle name="{}" xfId="2"/>'.format(_escape(style.row_header_name, True))
+        ]
+        dxfs: List[str] = [_tree(rule.dxf) for rule in (style.true_format, style.false_format)]
+        return ''.join([
+            _XML_DECLARATION,
+            '<styleSheet xmlns="{}">'.format(_MAIN_NS),
+            _collection('fonts', fonts),
+            _collection('fills', fills),
+            _collection('borders', ['<border><left/><right/><top/><bottom/><diagonal/></border>']),
+            _collection('cellStyleXfs', named),
+            _collection('cellXfs', cells),
+            _collection('cellStyles', names),
+            _collection('dxfs', dxfs),
+            '</styleSheet>'
+        ])
+
+    def _workbook(self) -> str:
+        sheets: List[str] = [
+            '<sheet name="{}" sheetId="{}" r:id="rId{}"/>'.format(_escape(name, True), number, number)
+            for number, (name, _) in enumerate(self._sheets, start=1)
+        ]
+        return '{}<workbook xmlns="{}" xmlns:r="{}"><sheets>{}</sheets></workbook>'.format(
+            _XML_DECLARATION, _MAIN_NS, _REL_NS, ''.join(sheets)
+        )
+
+    def _workbook_relationships(self) -> str:
+        relationships: List[str] = [
+            _relationship(number, 'worksheet', 'worksheets/sheet{}.xml'.format(number))
+            for number in range(1, len(self._sheets) + 1)
+        ]
+        count: int = len(self._sheets)
+        relationships.append(_relationship(count + 1, 'styles', 'styles.xml'))
+        relationships.append(_relationship(count + 2, 'sharedStrings', 'sharedStrings.xml'))
+        return '{}<Relationships xmlns="{}">{}</Relationships>'.format(
+            _XML_DECLARATION, _PACKAGE_REL_NS, ''.join(relationships)
+        )
+
+    @staticmethod
+    def _package_relationships() -> str:
+        return '{}<Relationships xmlns="{}">{}</Relationships>'.format(
+            _XML_DECLARATION, _PACKAGE_REL_NS, _relationship(1, 'officeDocument', 'xl/workbook.xml')
+        )
+
+    def _content_types(self) -> str:
+        overrides: List[Tuple[str, str]] = [('/xl/workbook.xml', _CONTENT_TYPE.format('sheet.main'))]
+        for number in range(1, len(self._sheets) + 1):
+            overrides.append(('/xl/worksheets/sheet{}.xml'.format(number), _CONTENT_TYPE.format('worksheet')))
+
+        overrides.append(('/xl/styles.xml', _CONTENT_TYPE.format('styles')))
+        overrides.append(('/xl/sharedStrings.xml', _CONTENT_TYPE.format('sharedStrings')))
+        return ''.join([
+            _XML_DECLARATION,
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">',
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>',
+            '<Default Extension="xml" ContentType="application/xml"/>',
+            ''.join('<Override PartName="{}" ContentType="{}"/>'.format(*override) for override in overrides),
+            '</Types>'
+        ])
+
+
+def _escape(text: str, attribute: bool = False) -> str:
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    if attribute:
+        text = text.replace('"', '&quot;')
+
+    return _ILLEGAL_CHARACTERS.sub(lambda match: '_x{:04X}_'.format(ord(match.group())), text)
+
+
+def _tree(style) -> str:
+    return tostring(style.to_tree()).decode('utf-8')
+
+
+def _collection(tag: str, items: Iterable[str]) -> str:
+    items = list(items)
+    return '<{0} count="{1}">{2}</{0}>'.format(tag, len(items), ''.join(items))
+
+
+def _relationship(number: int, kind: str, target: str) -> str:
+    return '<Relationship Id="rId{}" Type="{}/{}" Target="{}"/>'.format(number, _REL_NS, kind, target)